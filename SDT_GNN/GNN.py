@@ -1,5 +1,6 @@
 import numpy as np
 import os
+import re
 os.environ["DGLBACKEND"] = "pytorch"
 import torch
 import torch.nn as nn
@@ -85,7 +86,7 @@ class GNN(object):
         self.output_path = output_path
         
         if number_partition == 'auto':
-            self.number_partition = len([f for f in os.listdir(self.output_path) if f.endswith('.bin') and os.path.isfile(os.path.join(self.output_path, f))])
+            self.number_partition = len([f for f in os.listdir(self.output_path) if re.fullmatch(r'partition_\d+\.(bin|bundle)', f) and os.path.isfile(os.path.join(self.output_path, f))])
         else:
             self.number_partition = number_partition
         
@@ -128,9 +129,7 @@ class GNN(object):
                                                                self.multilabel)
             self.in_feats = graph.ndata['feat'].shape[1]
         else:
-            graph = utils.load_dgl_graph(self.dataset, 
-                                         self.output_path, 
-                                         proc_id)[0]
+            graph = utils.load_partition_graph(self.output_path, proc_id)
         
         if self.model in ['GCN', 'GCN_Full', 'GAT', 'GAT_Full', 'GATv2', 'ClusterGCN', 'SGC', 'NGNN']:
             graph = dgl.add_self_loop(graph)
@@ -1,6 +1,10 @@
-import osfrom SDT_GNN.partition import Hashing, DBH, Clustering, Greedy, HDRF, TwoPSL, SPRING, CustomPartitioner
-from SDT_GNN.utils import utils
+import osfrom SDT_GNN.partition import Hashing, DBH, Clustering, Greedy, HDRF, TwoPSL, SPRING, CustomPartitioner
+from SDT_GNN.utils import utils
 from SDT_GNN.utils import info
+from SDT_GNN.utils import edge_io
+from SDT_GNN.utils import partition_io
+from SDT_GNN.utils import manifest
+from SDT_GNN.partition import sharded
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -32,6 +36,21 @@ class Partitioning(object):
         save_dgl_graph (bool): Save partitioned graph as dgl graph object if Ture else in txt file.
         T (float): Memory needed for GNN training. Default is 'None', which means T is 2/3 of the total available GPU mempry.
         K (int): Number of hops of neighbor maintained after partitioning. Default is 1.
+        chunk_size (int): Number of edges streamed per block by the partitioner.
+        output_format (str): Format of the partition edge files, 'txt' or 'bin'. Default is 'txt'.
+        num_workers (int): Number of processes materializing the partitions (features and DGL graphs). Default is 1.
+        hash_mode (str): Node hash of DBH, 'splitmix64' or the legacy 'sha256'. Default is 'splitmix64'.
+        feature_chunk_size (int): Number of nodes whose features are gathered per block when partitioning the features file.
+        checkpoint_interval (int): Number of edges streamed between checkpoints of the partitioning state. Default is None, no checkpoints.
+        partition_workers (int): Number of processes assigning the edges in parallel shards (HDRF, Greedy, DBH and the second phase of 2PSL). Default is 1, sequential.
+        sync_interval (int): Number of edges a parallel worker assigns between synchronizations of the partition loads.
+        direct (bool): Build the DGL graphs straight from the partition edges kept in memory, with the features, labels 
+                       and masks gathered from the dataset, instead of from the partition edge and feature files. 
+                       The partition edge files are written as 'bin'. Only applies if save_dgl_graph. Default is False.
+        spill_size (int): Number of partition edges kept in memory in direct mode before they are spilled to the binary edge files.
+        graph_format (str): Format of the saved partition graphs, 'dgl' for DGL graph objects in 'partition_i.bin', or 'bundle' 
+                            for memory-mappable 'partition_i.bundle' files holding the CSR structure, global node IDs, features, 
+                            labels and masks, which replace the per-partition feature files. Default is 'dgl'.
     """
 
     def __init__(self, 
@@ -46,7 +65,18 @@ class Partitioning(object):
                 print_partition_statistics: bool = True,
                 save_dgl_graph: bool = True,
                 T: float = None,
-                K: int = 1):
+                K: int = 1,
+                chunk_size: int = edge_io.DEFAULT_CHUNK_SIZE,
+                output_format: str = 'txt',
+                num_workers: int = 1,
+                hash_mode: str = 'splitmix64',
+                feature_chunk_size: int = partition_io.DEFAULT_GATHER_SIZE,
+                checkpoint_interval: int = None,
+                partition_workers: int = 1,
+                sync_interval: int = sharded.DEFAULT_SYNC_INTERVAL,
+                direct: bool = False,
+                spill_size: int = partition_io.DEFAULT_SPILL_SIZE,
+                graph_format: str = 'dgl'):
         
         self.dataset = dataset
         self.multilabel = multilabel
@@ -55,6 +85,25 @@ class Partitioning(object):
         self.number_partition = number_partition
         self.T = T
         self.K = K
+        self.chunk_size = chunk_size
+        self.output_format = output_format
+        self.num_workers = num_workers
+        self.hash_mode = hash_mode
+        self.feature_chunk_size = feature_chunk_size
+        self.checkpoint_interval = checkpoint_interval
+        self.partition_workers = partition_workers
+        self.sync_interval = sync_interval
+        self.direct = direct and save_dgl_graph
+        self.spill_size = spill_size
+        if self.direct:
+            # Spilled edges are read back as binary.
+            self.output_format = 'bin'
+        
+        if graph_format not in ['dgl', 'bundle']:
+            raise NotImplementedError('No Support for \'{}\' Yet. Please Try Different Graph Formats.'.format(graph_format))
+        self.graph_format = graph_format
+        # Direct runs and bundles gather the features with the graphs instead of into per-partition files.
+        self.features_with_graphs = save_dgl_graph and (self.direct or self.graph_format == 'bundle')
         
         isExist = os.path.exists(self.output_path)
         if not isExist:
@@ -90,7 +139,12 @@ class Partitioning(object):
                                  stream_iters=1,
                                  seed = self.seed,
                                  partition_features_file = self.partition_features_file,
-                                 print_partition_statistics = self.print_partition_statistics)
+                                 print_partition_statistics = self.print_partition_statistics,
+                                 chunk_size = self.chunk_size,
+                                 output_format = self.output_format,
+                                 num_workers = self.num_workers,
+                                 feature_chunk_size = self.feature_chunk_size,
+                                 checkpoint_interval = self.checkpoint_interval)
           
         elif self.method == 'SPRING':
             self.sp = SPRING(dataset = self.dataset, 
@@ -102,7 +156,12 @@ class Partitioning(object):
                              stream_iters=1,
                              seed = self.seed,
                              partition_features_file = self.partition_features_file, 
-                             print_partition_statistics = self.print_partition_statistics)
+                             print_partition_statistics = self.print_partition_statistics,
+                             chunk_size = self.chunk_size,
+                             output_format = self.output_format,
+                             num_workers = self.num_workers,
+                             feature_chunk_size = self.feature_chunk_size,
+                             checkpoint_interval = self.checkpoint_interval)
            
         elif self.method == 'Random':
             self.sp = Hashing(dataset = self.dataset, 
@@ -113,7 +172,12 @@ class Partitioning(object):
                               K = self.K,
                               seed = self.seed,
                               partition_features_file = self.partition_features_file,
-                              print_partition_statistics = self.print_partition_statistics)
+                              print_partition_statistics = self.print_partition_statistics,
+                              chunk_size = self.chunk_size,
+                              output_format = self.output_format,
+                              num_workers = self.num_workers,
+                              feature_chunk_size = self.feature_chunk_size,
+                              checkpoint_interval = self.checkpoint_interval)
         
         elif self.method == 'DBH':
             self.sp = DBH(dataset = self.dataset, 
@@ -124,7 +188,15 @@ class Partitioning(object):
                           K = self.K,
                           seed = self.seed,
                           partition_features_file = self.partition_features_file,
-                          print_partition_statistics = self.print_partition_statistics)
+                          print_partition_statistics = self.print_partition_statistics,
+                          chunk_size = self.chunk_size,
+                          output_format = self.output_format,
+                          num_workers = self.num_workers,
+                          feature_chunk_size = self.feature_chunk_size,
+                          checkpoint_interval = self.checkpoint_interval,
+                          partition_workers = self.partition_workers,
+                          sync_interval = self.sync_interval,
+                          hash_mode = self.hash_mode)
             
         elif self.method == 'Greedy':
             self.sp = Greedy(dataset = self.dataset, 
@@ -135,7 +207,14 @@ class Partitioning(object):
                              K = self.K, 
                              seed = self.seed,
                              partition_features_file = self.partition_features_file,
-                             print_partition_statistics = self.print_partition_statistics)
+                             print_partition_statistics = self.print_partition_statistics,
+                             chunk_size = self.chunk_size,
+                             output_format = self.output_format,
+                             num_workers = self.num_workers,
+                             feature_chunk_size = self.feature_chunk_size,
+                             checkpoint_interval = self.checkpoint_interval,
+                             partition_workers = self.partition_workers,
+                             sync_interval = self.sync_interval)
           
         elif self.method == 'HDRF':
             self.sp = HDRF(dataset = self.dataset, 
@@ -147,7 +226,14 @@ class Partitioning(object):
                            Lambda = 1.0, 
                            seed = self.seed,
                            partition_features_file = self.partition_features_file,
-                           print_partition_statistics = self.print_partition_statistics)
+                           print_partition_statistics = self.print_partition_statistics,
+                           chunk_size = self.chunk_size,
+                           output_format = self.output_format,
+                           num_workers = self.num_workers,
+                           feature_chunk_size = self.feature_chunk_size,
+                           checkpoint_interval = self.checkpoint_interval,
+                           partition_workers = self.partition_workers,
+                           sync_interval = self.sync_interval)
           
         elif self.method == '2PSL':
             self.sp = TwoPSL(dataset = self.dataset, 
@@ -161,7 +247,14 @@ class Partitioning(object):
                              eval_cluster=False, 
                              seed = self.seed,
                              partition_features_file = self.partition_features_file,
-                             print_partition_statistics = self.print_partition_statistics)
+                             print_partition_statistics = self.print_partition_statistics,
+                             chunk_size = self.chunk_size,
+                             output_format = self.output_format,
+                             num_workers = self.num_workers,
+                             feature_chunk_size = self.feature_chunk_size,
+                             checkpoint_interval = self.checkpoint_interval,
+                             partition_workers = self.partition_workers,
+                             sync_interval = self.sync_interval)
 
         elif self.method == 'custom':
             self.sp = CustomPartitioner(dataset = self.dataset, 
@@ -172,26 +265,171 @@ class Partitioning(object):
                                         K = self.K,
                                         seed = self.seed,
                                         partition_features_file = self.partition_features_file,
-                                        print_partition_statistics = self.print_partition_statistics)
+                                        print_partition_statistics = self.print_partition_statistics,
+                                        chunk_size = self.chunk_size,
+                                        output_format = self.output_format,
+                                        num_workers = self.num_workers,
+                                        feature_chunk_size = self.feature_chunk_size)
 
         elif self.method == None:
             print('No paritition method is selected.')
         
         else:
             raise NotImplementedError('No Support for \'{}\' Yet. Please Try Different Methods.'.format(self.method))
+        
+        if self.method != None:
+            self.sp.keep_edges = self.direct
+            self.sp.spill_size = self.spill_size
+            self.sp.features_with_graphs = self.features_with_graphs
 
     
-    def run(self):
+    def result_params(self, appended_edges=0):
+        """
+        Parameters that determine the outputs of a run, recorded in its manifest.
+        
+        The outputs of updates differ from those of a full run over the same edges, so the
+        number of edges appended by updates since the last full run is part of their parameters.
+        """
+        
+        params = {'dataset': self.dataset,
+                'multilabel': self.multilabel,
+                'method': self.method,
+                'number_partition': self.number_partition,
+                'K': self.K,
+                'seed': self.seed,
+                'chunk_size': self.chunk_size,
+                'output_format': self.output_format,
+                'hash_mode': self.hash_mode,
+                'partition_workers': self.partition_workers,
+                'sync_interval': self.sync_interval,
+                'partition_features_file': self.partition_features_file,
+                'save_dgl_graph': self.save_dgl_graph,
+                'direct': self.direct,
+                'graph_format': self.graph_format}
+        if appended_edges:
+            params['appended_edges'] = appended_edges
+        
+        return params
+    
+    
+    def result_key(self, appended_edges=0):
+        """Fingerprints of the input files and the key of the result of a run, or of updates appending appended_edges edges."""
+        
+        inputs = manifest.input_fingerprints(self.output_path, 
+                                             manifest.partition_inputs(self.path, 
+                                                                       self.dataset, 
+                                                                       self.partition_features_file, 
+                                                                       self.chunk_size))
+        
+        return inputs, manifest.result_key(inputs, self.result_params(appended_edges))
+    
+    
+    def save_manifest(self, inputs, key, appended_edges=0):
+        """Record the outputs of a finished run or update in 'manifest.json'."""
+        
+        manifest.save_manifest(self.output_path, key, inputs, self.result_params(appended_edges), 
+                               manifest.partition_artifacts(self.number_partition, 
+                                                            self.output_format, 
+                                                            self.partition_features_file, 
+                                                            self.save_dgl_graph, 
+                                                            self.features_with_graphs, 
+                                                            self.graph_format, 
+                                                            self.sp.INCREMENTAL))
+    
+    
+    def save_dgl_graphs(self, partitions=None):
+        """Save the partitions as DGL graph objects or bundles, straight from the kept edges in direct mode."""
+        
+        if self.direct:
+            utils.save_dgl_graph_direct(self.sp.writer, 
+                                        self.dataset, 
+                                        self.path, 
+                                        self.output_path, 
+                                        partitions=partitions, 
+                                        graph_format=self.graph_format)
+            self.sp.writer.release_edges()
+        
+        else:
+            utils.save_dgl_graph(self.dataset, 
+                                 self.path, 
+                                 self.output_path, 
+                                 self.number_partition, 
+                                 self.num_workers, 
+                                 partitions=partitions, 
+                                 graph_format=self.graph_format)
+    
+    
+    def run(self, resume=False, force=False):
         if self.number_partition == 1 or self.method == None:
             print('Graph will not be partitioned!')
         
         else:
-            self.sp.run()
+            # The outputs of a custom partitioning function cannot be keyed, so they are never reused.
+            use_manifest = self.method != 'custom'
+            if use_manifest:
+                inputs, key = self.result_key()
             
-            if self.save_dgl_graph:
-                utils.save_dgl_graph(self.dataset, 
-                                     self.path, 
-                                     self.output_path, 
-                                     self.number_partition)
+            if use_manifest and not force and manifest.valid_manifest(self.output_path, key):
+                print('Reusing the partitions in', self.output_path)
+                if self.print_partition_statistics:
+                    self.sp.partition_statistics()
+            
+            else:
+                # A resumed run keeps the outputs written before its checkpoint.
+                manifest.invalidate(self.output_path, remove_artifacts=not resume)
+                self.sp.run(resume)
+                
+                if self.save_dgl_graph:
+                    self.save_dgl_graphs()
+                
+                if use_manifest:
+                    self.save_manifest(inputs, key)
             print("Partitioning Done!")
-            print('='*60)
\ No newline at end of file
+            print('='*60)
+    
+    
+    def update(self, new_edges):
+        """
+        Partition new edges into the existing partitions and rebuild only the partitions they reach.
+        
+        Supported by the Random, DBH, Greedy, HDRF, Clustering and SPRING methods with K = 0 or 1.
+        The edges are appended to the dataset's edge lists. New nodes must already have
+        their rows in the features and labels.
+        
+        Args:
+            new_edges (np.ndarray): (n, 2) array of new src/dst edges.
+        
+        Returns:
+            list: The rebuilt partitions.
+        """
+        
+        if self.number_partition == 1 or self.method == None:
+            print('Graph will not be partitioned!')
+            return []
+        
+        # Raise before the edge lists grow and the manifest is invalidated.
+        self.sp.check_update()
+        previous = manifest.load_manifest(self.output_path)
+        appended_edges = previous.get('params', {}).get('appended_edges', 0) if previous is not None else 0
+        number_edges = self.sp.edge_stream().number_edges
+        
+        manifest.invalidate(self.output_path, remove_artifacts=False)
+        stale = self.sp.update(new_edges)
+        appended_edges += self.sp.edge_stream().number_edges - number_edges
+        
+        if self.partition_features_file and not self.features_with_graphs:
+            self.sp.partition_features(partitions=stale)
+        
+        if self.save_dgl_graph:
+            self.save_dgl_graphs(partitions=stale)
+        partition_io.clear_stale_partitions(self.output_path)
+        
+        if self.method != 'custom':
+            # Keyed apart from a full run over the same edges, which is not reused for it nor it for one.
+            self.save_manifest(*self.result_key(appended_edges), appended_edges=appended_edges)
+        
+        if self.print_partition_statistics:
+            self.sp.partition_statistics()
+        print('Updated partitions: ', stale)
+        
+        return stale
\ No newline at end of file
@@ -9,6 +9,7 @@ import torch.nn as nn
 import torch.nn.functional as F
 import dgl
 import sklearn.metrics
+from SDT_GNN.utils import node_io
 os.environ["DGLBACKEND"] = "pytorch"
 
 class GraphSAGE(nn.Module):
@@ -121,9 +122,7 @@ def create_dgl_graph(dataset, path, multilabel):
 
     graph.add_edges(src, dst)
 
-    labels = json.load(open(path + dataset + '/class_map.json'))
-    node_labels = np.array(list(labels.values()), dtype=np.int64)
-    node_labels = torch.from_numpy(node_labels)
+    node_labels = torch.from_numpy(node_io.load_labels(path, dataset, mmap_mode=None))
     graph.ndata['label'] = node_labels
 
     if multilabel:
@@ -135,24 +134,15 @@ def create_dgl_graph(dataset, path, multilabel):
     node_features = torch.from_numpy(feats).float()
     graph.ndata['feat'] = node_features
 
-    role = json.load(open(path + dataset +'/role.json'))
+    train_ids, val_ids, test_ids = node_io.load_splits(path, dataset, mmap_mode=None)
 
     train_mask = torch.zeros(graph.num_nodes(), dtype=torch.bool)
     test_mask = torch.zeros(graph.num_nodes(), dtype=torch.bool)
     val_mask = torch.zeros(graph.num_nodes(), dtype=torch.bool)
 
-    train_ids = role['tr']
-    test_ids = role['te']
-    val_ids = role['va']
-
-    for i in train_ids:
-        train_mask[i] = True
-
-    for i in test_ids:
-        test_mask[i] = True
-
-    for i in val_ids:
-        val_mask[i] = True
+    train_mask[torch.from_numpy(train_ids)] = True
+    test_mask[torch.from_numpy(test_ids)] = True
+    val_mask[torch.from_numpy(val_ids)] = True
 
     graph.ndata['train_mask'] = train_mask
     graph.ndata['val_mask'] = val_mask
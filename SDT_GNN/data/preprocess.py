@@ -11,6 +11,8 @@ import scipy
 random.seed(42)
 np.random.seed(42)
 from SDT_GNN.utils import utils
+from SDT_GNN.utils import edge_io
+from SDT_GNN.utils import node_io
 
 """
 Data preprocessing functions used in SDT-GNN.
@@ -55,12 +57,11 @@ def get_subgraph(node_ids,
 
     if save_dgl_graph:
         edge_list = pd.read_csv(output_path + dataset + '-' + name + '.csv', sep=',', names=['src','dst'])
-        edge_list, node_mapping = utils.pd_reindex_id(edge_list)
+        edge_list, node_set = utils.sorted_reindex_id(edge_list.values)
 
-        with open(output_path + dataset + '-' + name + '-mapping.json', 'wb') as json_file:
-            pickle.dump(node_mapping, json_file)
+        np.save(output_path + dataset + '-' + name + '-nodes.npy', node_set)
 
-        g = dgl.graph((torch.tensor(edge_list['src']), torch.tensor(edge_list['dst'])))
+        g = dgl.graph((torch.from_numpy(edge_list[:, 0]), torch.from_numpy(edge_list[:, 1])))
         g = dgl.to_bidirected(g, copy_ndata=True)
 
         feat = np.load(output_path + dataset + '-' + name + '-feats.npy')
@@ -69,22 +70,12 @@ def get_subgraph(node_ids,
         g.ndata['label'] = torch.from_numpy(label).to(torch.int64)
 
         # train_node_p = []
-        if name == 'val':
-            val_node_p = [node_mapping.get(item,item) for item in node_ids if item in node_mapping]
-            vest_node_p = []
-        if name == 'test':
-            val_node_p = []
-            test_node_p = [node_mapping.get(item,item) for item in node_ids if item in node_mapping]
+        val_node_p = node_ids if name == 'val' else []
+        test_node_p = node_ids if name == 'test' else []
 
         train_mask_p = torch.zeros(g.num_nodes(), dtype=torch.bool)
-        test_mask_p = torch.zeros(g.num_nodes(), dtype=torch.bool)
-        val_mask_p = torch.zeros(g.num_nodes(), dtype=torch.bool)
-
-        for j in val_node_p:
-            val_mask_p[j] = True
-
-        for j in test_node_p:
-            test_mask_p[j] = True
+        test_mask_p = utils.index_mask(node_set, test_node_p, g.num_nodes())
+        val_mask_p = utils.index_mask(node_set, val_node_p, g.num_nodes())
 
         g.ndata['train_mask'] = train_mask_p
         g.ndata['val_mask'] = val_mask_p
@@ -106,9 +97,7 @@ def random_features(dataset,
         output_path (str): Output path.
     """
 
-    isExist = os.path.exists(output_path + dataset)
-    if not isExist:
-        os.makedirs(dataset)
+    os.makedirs(output_path + dataset, exist_ok=True)
 
     features = np.random.random((n_nodes, feat_size)).astype(np.float32)
     np.save(output_path + dataset + '/feats.npy', features)
@@ -128,9 +117,7 @@ def random_labels(dataset,
         output_path (str): Output path.
     """
 
-    isExist = os.path.exists(output_path + dataset)
-    if not isExist:
-        os.makedirs(dataset)
+    os.makedirs(output_path + dataset, exist_ok=True)
     labels = np.random.randint(n_classes, size=n_nodes)
     labels_dict = dict()
     for i in range(len(labels)):
@@ -138,6 +125,7 @@ def random_labels(dataset,
 
     with open(output_path + dataset + '/class_map.json', 'w') as json_file:
         json.dump(labels_dict, json_file)
+    node_io.save_labels(output_path, dataset, labels)
 
     return labels_dict
 
@@ -155,9 +143,7 @@ def train_valid_test_split(dataset,
         path (str): Dataset path.
     """
 
-    isExist = os.path.exists(path + dataset)
-    if not isExist:
-        os.makedirs(dataset)
+    os.makedirs(path + dataset, exist_ok=True)
     nodes = [i for i in range(n_nodes)]
     random.shuffle(nodes)
     train_nodes = nodes[:int(ratio[0]*len(nodes))]
@@ -170,16 +156,83 @@ def train_valid_test_split(dataset,
 
     with open(path + dataset + '/role.json', 'w') as json_file:
         json.dump(role, json_file)
+    node_io.save_splits(path, dataset, role['tr'], role['va'], role['te'])
 
     return role
 
 
+def rmat_edges(scale,
+               number_edges,
+               probabilities=(0.57, 0.19, 0.19),
+               rng=None):
+    """
+    Draw R-MAT edges over 2**scale nodes
+    Args:
+        scale (int): Log2 of the number of nodes.
+        number_edges (int): Number of edges.
+        probabilities (tuple): Probabilities (a, b, c) of the top-left, top-right and bottom-left quadrants.
+        rng (np.random.Generator): Random generator.
+    """
+
+    if rng is None:
+        rng = np.random.default_rng()
+    a, b, c = probabilities
+
+    src = np.zeros(number_edges, dtype=np.int64)
+    dst = np.zeros(number_edges, dtype=np.int64)
+    for bit in range(scale):
+        r = rng.random(number_edges)
+        # Quadrants a, b, c, d split [0, 1) in that order; c and d set the src bit, b and d the dst bit.
+        src |= (r >= a + b).astype(np.int64) << bit
+        dst |= (((r >= a) & (r < a + b)) | (r >= a + b + c)).astype(np.int64) << bit
+
+    return src, dst
+
+
+def rmat_edge_list(dataset,
+                   scale,
+                   edge_factor,
+                   path,
+                   probabilities=(0.57, 0.19, 0.19),
+                   bidirected=True,
+                   seed=42,
+                   chunk_size=edge_io.DEFAULT_CHUNK_SIZE):
+    """
+    Generate a power-law R-MAT graph and write it straight to the binary edge list
+    Args:
+        dataset (str): Dataset.
+        scale (int): Log2 of the number of nodes.
+        edge_factor (int): Number of generated edges per node.
+        path (str): Dataset path.
+        probabilities (tuple): R-MAT quadrant probabilities (a, b, c). Default is the Graph500 (0.57, 0.19, 0.19).
+        bidirected (bool): Also write the reverse of every edge, as the processed datasets do.
+        seed (int): Random seed.
+        chunk_size (int): Number of edges generated at a time.
+    """
+
+    os.makedirs(path + dataset, exist_ok=True)
+
+    rng = np.random.default_rng(seed)
+    number_nodes = 1 << scale
+    number_edges = edge_factor * number_nodes
+    # Shuffle the node IDs so that the high-degree nodes are not the smallest IDs.
+    permutation = rng.permutation(number_nodes)
+
+    def edge_blocks():
+        for start in range(0, number_edges, chunk_size):
+            src, dst = rmat_edges(scale, min(chunk_size, number_edges - start), probabilities, rng)
+            src, dst = permutation[src], permutation[dst]
+            if bidirected:
+                src, dst = np.column_stack((src, dst)).ravel(), np.column_stack((dst, src)).ravel()
+            yield np.column_stack((src, dst))
+
+    return edge_io.write_edge_list(edge_io.binary_edge_list_path(path, dataset), edge_blocks(), number_nodes)
+
+
 def process_dataset(dataset, path):
     """Download and process the datasest"""
 
-    isExist = os.path.exists(path + dataset)
-    if not isExist:
-        os.makedirs(dataset)
+    os.makedirs(path + dataset, exist_ok=True)
 
     if dataset in ['citeseer', 'pubmed', 'cora', 'chameleon', 'squirrel', 'actor', 'coauthor-cs', 'coauthor-physics', 'flickr', 'yelp', 'reddit']:
         if dataset == 'citeseer':
@@ -219,6 +272,7 @@ def process_dataset(dataset, path):
         edge_list = pd.concat([src_node, dst_node], axis=1)
         np.savetxt(path + dataset + '/edge_list.txt', edge_list.values, fmt='%d')
         edge_list.to_csv(path + dataset + '/edge_list.csv', index=False, header=None)
+        edge_io.convert_edge_list(path + dataset + '/edge_list.csv', path + dataset + '/edge_list.bin')
 
         np.save(path + dataset + '/feats', features)
 
@@ -248,6 +302,7 @@ def process_dataset(dataset, path):
 
         with open(path + dataset + '/role.json', 'w') as json_file:
             json.dump(role, json_file)
+        node_io.save_splits(path, dataset, role['tr'], role['va'], role['te'])
 
         # labels_list = labels.tolist()
         labels_dict = dict()
@@ -256,6 +311,7 @@ def process_dataset(dataset, path):
 
         with open(path + dataset + '/class_map.json', 'w') as json_file:
             json.dump(labels_dict, json_file)
+        node_io.save_labels(path, dataset, list(labels_dict.values()))
 
 
     elif dataset in ['ppi', 'amazon']:
@@ -273,6 +329,10 @@ def process_dataset(dataset, path):
 
         edge_list = pd.concat([src_node, dst_node], axis=1)
         edge_list.to_csv(path + dataset + '/edge_list.csv', index=False, header=None)
+        edge_io.convert_edge_list(path + dataset + '/edge_list.csv', path + dataset + '/edge_list.bin')
+
+        node_io.convert_labels(path, dataset)
+        node_io.convert_splits(path, dataset)
 
 
     elif dataset in ['ogbn-arxiv', 'ogbn-products', 'ogbn-papers100M']:
@@ -294,6 +354,7 @@ def process_dataset(dataset, path):
         edge_list = pd.concat([src_node, dst_node], axis=1)
         np.savetxt(path + dataset + '/edge_list.txt', edge_list.values, fmt='%d')
         edge_list.to_csv(path + dataset + '/edge_list.csv', index=False, header=None)
+        edge_io.convert_edge_list(path + dataset + '/edge_list.csv', path + dataset + '/edge_list.bin')
 
         np.save(path + dataset + '/feats', features)
 
@@ -308,6 +369,7 @@ def process_dataset(dataset, path):
 
         with open(path + dataset + '/role.json', 'w') as json_file:
             json.dump(role, json_file)
+        node_io.save_splits(path, dataset, role['tr'], role['va'], role['te'])
 
         labels_list = labels.tolist()
         labels_dict = dict()
@@ -316,24 +378,23 @@ def process_dataset(dataset, path):
 
         with open(path + dataset + '/class_map.json', 'w') as json_file:
             json.dump(labels_dict, json_file)
+        node_io.save_labels(path, dataset, list(labels_dict.values()))
 
 
 
 def create_dgl_graph(dataset, path, multilabel):
     """Create the DGL graph object"""
 
-    edge_list = pd.read_csv(path + dataset + '/edge_list.csv', header = None, names = ['src','dst'], index_col=False)
+    edge_list = edge_io.load_edge_list(edge_io.ensure_binary_edge_list(path, dataset))
 
-    src = edge_list['src'].to_list()
-    dst = edge_list['dst'].to_list()
+    src = torch.from_numpy(edge_list[:, 0].astype(np.int64))
+    dst = torch.from_numpy(edge_list[:, 1].astype(np.int64))
 
     graph = dgl.DGLGraph()
 
     graph.add_edges(src, dst)
 
-    labels = json.load(open(path + dataset + '/class_map.json'))
-    node_labels = np.array(list(labels.values()), dtype=np.int64)
-    node_labels = torch.from_numpy(node_labels)
+    node_labels = torch.from_numpy(node_io.load_labels(path, dataset, mmap_mode=None))
     graph.ndata['label'] = node_labels
 
     if multilabel:
@@ -345,24 +406,15 @@ def create_dgl_graph(dataset, path, multilabel):
     node_features = torch.from_numpy(feats).float()
     graph.ndata['feat'] = node_features
 
-    role = json.load(open(path + dataset +'/role.json'))
+    train_ids, val_ids, test_ids = node_io.load_splits(path, dataset, mmap_mode=None)
 
     train_mask = torch.zeros(graph.num_nodes(), dtype=torch.bool)
     test_mask = torch.zeros(graph.num_nodes(), dtype=torch.bool)
     val_mask = torch.zeros(graph.num_nodes(), dtype=torch.bool)
 
-    train_ids = role['tr']
-    test_ids = role['te']
-    val_ids = role['va']
-
-    for i in train_ids:
-        train_mask[i] = True
-
-    for i in test_ids:
-        test_mask[i] = True
-
-    for i in val_ids:
-        val_mask[i] = True
+    train_mask[torch.from_numpy(train_ids)] = True
+    test_mask[torch.from_numpy(test_ids)] = True
+    val_mask[torch.from_numpy(val_ids)] = True
 
     graph.ndata['train_mask'] = train_mask
     graph.ndata['val_mask'] = val_mask
@@ -0,0 +1,100 @@
+import os
+import pickle
+import random
+import numpy as np
+
+"""
+Checkpoints of long-running partitionings.
+
+A partitioning runs as a sequence of steps; streaming steps also record how many
+edges of their pass were consumed. A checkpoint holds the index of the step to run
+next and its edge offset, the partitioner attributes listed in CHECKPOINT_STATE, the
+random generator states, and the size and edge count of every partition file and the
+tracked node sets of the writer. It is pickled to 'checkpoint.pkl' in the output path
+through a temporary file and an atomic rename, so a crash leaves either the previous
+or the new checkpoint, never a partial one.
+
+The state of a finished partitioning is kept the same way in 'partitioner_state.pkl',
+so that new edges can later be assigned incrementally on top of it.
+"""
+
+CHECKPOINT_FILE = 'checkpoint.pkl'
+STATE_FILE = 'partitioner_state.pkl'
+
+
+def checkpoint_file(output_path):
+    """Path of the checkpoint of a partitioning."""
+
+    return os.path.join(output_path, CHECKPOINT_FILE)
+
+
+def state_file(output_path):
+    """Path of the state of a finished partitioning."""
+
+    return os.path.join(output_path, STATE_FILE)
+
+
+def _dump(file, obj):
+    """Atomically pickle obj to file."""
+
+    tmp_file = file + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, file)
+
+
+def _load(file):
+    """Unpickle file, None if it does not exist."""
+
+    if not os.path.exists(file):
+        return None
+
+    with open(file, 'rb') as f:
+        return pickle.load(f)
+
+
+def save_checkpoint(output_path, checkpoint):
+    """Atomically save a checkpoint dict."""
+
+    _dump(checkpoint_file(output_path), checkpoint)
+
+
+def load_checkpoint(output_path):
+    """Load the checkpoint of a partitioning, None if there is none."""
+
+    return _load(checkpoint_file(output_path))
+
+
+def save_state(output_path, state):
+    """Atomically save the state of a finished partitioning."""
+
+    _dump(state_file(output_path), state)
+
+
+def load_state(output_path):
+    """Load the state of a finished partitioning, None if there is none."""
+
+    return _load(state_file(output_path))
+
+
+def remove_checkpoint(output_path):
+    """Remove the checkpoint of a finished partitioning."""
+
+    for f in [checkpoint_file(output_path), checkpoint_file(output_path) + '.tmp']:
+        if os.path.exists(f):
+            os.remove(f)
+
+
+def random_state():
+    """States of the Python and NumPy global random generators."""
+
+    return random.getstate(), np.random.get_state()
+
+
+def set_random_state(state):
+    """Restore the states returned by random_state."""
+
+    random.setstate(state[0])
+    np.random.set_state(state[1])
@@ -24,6 +24,7 @@ class CustomPartitioner(Partitioner):
         seed (int): Random seed. Default is 42.
         partition_features_file (bool): Partition the features file if True,
         print_partition_statistics (bool): Print out the statistics of the partitioned graph if True.
+        **kwargs: Streaming, output and checkpoint options of Partitioner, such as chunk_size and output_format.
     """
     
     def __init__(self,
@@ -35,8 +36,9 @@ class CustomPartitioner(Partitioner):
                  K: int = 1,
                  seed: int = 42,
                  partition_features_file: bool = True,
-                 print_partition_statistics: bool = True):
-        super().__init__()
+                 print_partition_statistics: bool = True,
+                 **kwargs):
+        super().__init__(**kwargs)
         
         self.dataset = dataset
         self.multilabel = multilabel
@@ -47,55 +49,49 @@ class CustomPartitioner(Partitioner):
         self.seed = seed
         self._set_seed()
 
+        self.partition_features_file = partition_features_file
+        self.print_partition_statistics = print_partition_statistics
+
     
     def partition(self):
-        self.node_degree = defaultdict(int)
         self.get_degree()
         self.v2p = defaultdict(int)
-        self.file = open(self.path + self.dataset + '/edge_list.csv', 'r')
-        reader = csv.reader(self.file, delimiter=',')
-        
-        for _, line in enumerate(reader):
-            i, j = int(line[0]), int(line[1])
-            ### Implement the user-defined algorithms here
+        for src, dst in self.edge_stream().chunks():
+            for i, j in zip(src.tolist(), dst.tolist()):
+                ### Implement the user-defined algorithms here
+                pass
 
         
         
-        self.file.close()
-        utils.partition_file(self.dataset, self.path, self.output_path, self.v2p)
+        self.writer = utils.partition_file(self.dataset, self.path, self.output_path, self.v2p, 
+                                           self.number_partition, self.output_format)
         
-        with open(self.output_path + 'partition' + '.json', 'wb') as json_file:
-            pickle.dump(self.v2p, json_file)
+        self.save_node_partition()
     
     
     """
     An example of Degree-based Hashing (DBH) partitioning method using the custom module.
  
     def partition(self):
-        self.node_degree = defaultdict(int)
         self.get_degree()
         self.v2p = defaultdict(int)
-        self.file = open(self.path + self.dataset + '/edge_list.csv', 'r')
-        reader = csv.reader(self.file, delimiter=',')
-        
-        for _, line in enumerate(reader):
-            i, j = int(line[0]), int(line[1])
+        for src, dst in self.edge_stream().chunks():
+            for i, j in zip(src.tolist(), dst.tolist()):
             
-            if self.node_degree[int(i)] < self.node_degree[int(j)]:
-                hash_val = utils.hash_function(i)
-                partition_id = hash_val % self.number_partition
+                if self.node_degree[i] < self.node_degree[j]:
+                    hash_val = utils.hash_function(i)
+                    partition_id = hash_val % self.number_partition
             
-            else:
-                hash_val = utils.hash_function(j)
-                partition_id = hash_val % self.number_partition  
+                else:
+                    hash_val = utils.hash_function(j)
+                    partition_id = hash_val % self.number_partition  
             
-            self.v2p[j] = partition_id
+                self.v2p[j] = partition_id
         
-        self.file.close()
-        utils.partition_file(self.dataset, self.path, self.output_path, self.v2p)
+        self.writer = utils.partition_file(self.dataset, self.path, self.output_path, self.v2p, 
+                                           self.number_partition, self.output_format)
         
-        with open(self.output_path + 'partition' + '.json', 'wb') as json_file:
-            pickle.dump(self.v2p, json_file)
+        self.save_node_partition()
     """
 
     
\ No newline at end of file
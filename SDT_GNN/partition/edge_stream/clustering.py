@@ -6,11 +6,15 @@ import pickle
 import os
 import csv
 import gzip
+import heapq
 from collections import defaultdict,  Counter
 import warnings
 warnings.filterwarnings('ignore')
 # from memory_profiler import profile
 from SDT_GNN.partition.partitioner import Partitioner
+from SDT_GNN.utils import node_io
+from SDT_GNN.utils.partition_io import partition_dtype
+from SDT_GNN.partition.streamcom import StreamClustering
 import pprint
 
 class Clustering(Partitioner):
@@ -29,8 +33,13 @@ class Clustering(Partitioner):
         seed (int): Random seed. Default is 42.
         partition_features_file (bool): Partition the features file if True,
         print_partition_statistics (bool): Print out the statistics of the partitioned graph if True.
+        **kwargs: Streaming, output and checkpoint options of Partitioner, such as chunk_size and output_format.
     """
 
+    CHECKPOINT_STATE = Partitioner.CHECKPOINT_STATE + ['v_max', 'train_ids', 'clustering', 'v2c', 'cluster_sizes', 
+                                                       'cluster_nodes', 'cluster_offsets', 'n_training']
+    INCREMENTAL = True
+
     def __init__(self, 
                  dataset: str = None, 
                  multilabel: bool=False, 
@@ -41,8 +50,9 @@ class Clustering(Partitioner):
                  stream_iters: int =1, 
                  seed: int = 42,
                  partition_features_file: bool = True,
-                 print_partition_statistics: bool = True):
-        super().__init__()
+                 print_partition_statistics: bool = True,
+                 **kwargs):
+        super().__init__(**kwargs)
         
         self.dataset = dataset
         self.multilabel = multilabel
@@ -52,154 +62,101 @@ class Clustering(Partitioner):
         self.K = K
         self.seed = seed
         self._set_seed()
-        self.node_degree = defaultdict(int)
         self.stream_iters = stream_iters
         
         self.partition_features_file = partition_features_file
         self.print_partition_statistics = print_partition_statistics
 
 
-    def do_clustering(self, i, j, c, v):
-        if c[i] == 0:
-            c[i] = self.next_c_id
-            v[c[i]] += self.node_degree[i]
-            self.next_c_id += 1
-        if c[j] == 0:
-            c[j] = self.next_c_id
-            v[c[j]] += self.node_degree[j]
-            self.next_c_id += 1
-        if v[c[i]] <= self.v_max and v[c[j]] <= self.v_max:
-            if v[c[i]] <= v[c[j]]:
-                v[c[j]] += self.node_degree[i]
-                v[c[i]] -= self.node_degree[i]
-                c[i] = c[j]
-            else:
-                v[c[i]] += self.node_degree[j]
-                v[c[j]] -= self.node_degree[j]
-                c[j] = c[i]
-                
-
     def restream_clustering(self):
-        self.v2c = defaultdict(int)
-        self.vol = defaultdict(int)
-        self.n_training = defaultdict(int)
-        self.next_c_id = 1
+        """Cluster the nodes in stream_iters streaming passes, one checkpointed step per pass."""
+
+        self.run_step(self.init_clustering)
+        for _ in range(self.stream_iters):
+            self.run_step(self.stream_clustering)
+        self.run_step(self.group_clusters)
+
+        return self.cluster_sizes
+
+
+    def init_clustering(self):
+        """Allocate the streaming clustering state."""
+
         self.v_max = 0.1*self.number_edges/self.number_partition
-        role = json.load(open(self.path + self.dataset + '/role.json'))
-        self.train_ids = role['tr']
+        self.train_ids = node_io.load_split(self.path, self.dataset, 'train')
         
-        for _ in range(self.stream_iters):
-            self.file = open(self.path + self.dataset + '/edge_list.csv', 'r')
-            reader = csv.reader(self.file, delimiter=',')
-            for _, line in enumerate(reader):
-                i, j = int(line[0]), int(line[1])
-                self.do_clustering(i, j, self.v2c, self.vol)
-            
-        # print('v2c', self.v2c)
-        # print('vol', self.vol)
-        com_dict = defaultdict(set)
-        for i in self.v2c:
-            com_dict[self.v2c[i]].add(i)
-        self.communities = list()
-        for com in com_dict.values():
-            if len(com) >= 1:
-                self.communities.append(com)
-
-        # print("com_dict: ", com_dict)
-        # print("# of clusters: ", len(self.communities))
-        # print('communities', self.communities)
-
-        #create self.n_training with size of len(self.communities)
-        self.n_training = []
-        for i in range(len(self.communities)):
-            self.n_training.append(len(self.communities[i] & set(self.train_ids)))
-        # print("n_training", self.n_training)
+        self.clustering = StreamClustering(self.node_degree, self.v_max, 'volume')
+        self.v2c = self.clustering.community
+
+
+    def stream_clustering(self):
+        """Run one clustering pass over the edges, checkpointed every checkpoint_interval edges."""
+
+        stream = self.edge_stream()
+        self.clustering.stream(stream, chunks=self.checkpointed_chunks(stream))
+
+
+    def group_clusters(self):
+        """Group the streamed nodes by cluster and count the training nodes of every cluster."""
+
+        # Streamed nodes grouped by cluster: cluster k holds cluster_nodes[cluster_offsets[k]:cluster_offsets[k + 1]].
+        _, self.cluster_sizes, self.cluster_nodes, self.cluster_offsets = self.clustering.clusters()
+
+        is_training = np.zeros(self.number_nodes, dtype=np.int64)
+        is_training[np.asarray(self.train_ids, dtype=np.int64)] = 1
+        self.n_training = np.zeros(len(self.cluster_sizes), dtype=np.int64)
+        if len(self.cluster_nodes) > 0:
+            self.n_training = np.add.reduceat(is_training[self.cluster_nodes], self.cluster_offsets[:-1])
         
-        # size_clusters = Counter(self.v2c.values())
-        # print('size_clusters: ', size_clusters)
-        return self.communities
+        return self.cluster_sizes
+
 
     def cluster2partition(self):
-        sort_c = sorted(self.communities, key=len, reverse=True)
-        # sort_c = [x for x, _ in sorted(zip(self.communities, self.n_training), reverse=True)]
+        """Assign the clusters, largest first, to the partition with the fewest nodes."""
+        
+        sort_c = np.argsort(-self.cluster_sizes, kind='stable')
+
+        c2p = np.zeros(len(self.cluster_sizes), dtype=np.int64)
+        list_p_size = [(0, p) for p in range(self.number_partition)]
+
+        for c in sort_c.tolist():
+            size, idx = heapq.heappop(list_p_size)
+            c2p[c] = idx
+            heapq.heappush(list_p_size, (size + int(self.cluster_sizes[c]), idx))
+
+        self.v2p = np.zeros(self.number_nodes, dtype=partition_dtype(self.number_partition))
+        self.v2p[self.cluster_nodes] = np.repeat(c2p, self.cluster_sizes)
+        
+        return self.v2p
 
-        self.list_p = [list() for i in range(self.number_partition)]
-        list_p_size = np.array([0 for i in range(self.number_partition)])
+    def update_partition(self):
+        """Cluster the new edges and place the new nodes with their clusters, then write the new edges if K = 0."""
 
-        for i in range(len(sort_c)):
-            idx = np.argmin(list_p_size)
-            self.list_p[idx] += sort_c[i]
-            list_p_size[idx] += len(sort_c[i])
+        self.get_degree()
+        self.clustering.update_degree(self.node_degree)
+        self.clustering.stream(self.edge_stream(), start=self.stream_start)
+        self.v2c = self.clustering.community
+        self.place_new_nodes(self.v2c)
+        if self.K == 0:
+            self.write_cut_edges()
 
-        # print("# of nodes for each partition: ", list_p_size)
-        # print('list_p, ', self.list_p)
-        return self.list_p
 
     def partition(self):
         """Partition a graph."""
 
-        for i in range(self.number_partition):
-            with open(os.path.join(self.output_path, 'partition_' + str(i) + '.txt'), 'w') as f:
-                pass
+        self.writer = self.open_writer()
         
         self.get_degree()
         self.restream_clustering()
-        self.cluster2partition()
-        self.v2p = defaultdict(int)
-        for i in range(len(self.list_p)):
-            for j in self.list_p[i]:
-                self.v2p[j] = i
-        
-        with open(self.output_path + 'partition' + '.json', 'wb') as json_file:
-            pickle.dump(self.v2p, json_file)
-
-        self.file = open(self.path + self.dataset + '/edge_list.csv', 'r')
-          
-        file_objects = []
-        for i in range(self.number_partition):
-            filename = os.path.join(self.output_path, 'partition_' + str(i) + '.txt')
-            files = open(filename, 'a', newline='')
-            # Append the file object to the list
-            file_objects.append(files)
-        
-        reader = csv.reader(self.file, delimiter=',')
+        self.run_step(self.cluster2partition)
         
+        self.run_step(self.save_node_partition)
+
         if self.K == 0:
-            for _, line in enumerate(reader):
-                i, j = int(line[0]), int(line[1])
-                if self.v2p[i] == self.v2p[j]:
-                    partition_id = self.v2p[j]
-                else:
-                    partition_id = self.v2p[i] if i < j else self.v2p[j]
-
-                writer = csv.writer(file_objects[partition_id], delimiter=' ')
-                writer.writerow(line)
-            self.file.close()
-        
-        elif self.K == 1:
-            for _, line in enumerate(reader):
-                i, j = int(line[0]), int(line[1])
-                partition_id = self.v2p[j]
-                writer = csv.writer(file_objects[partition_id], delimiter=' ')
-                writer.writerow(line)
-            self.file.close()
+            self.run_step(self.write_cut_edges)
         
         else:
-            for l in range(self.number_partition):
-                node_set = [k for k,v in self.v2p.items() if v == l]
-                new_node_set = set()
-                for _ in range(self.K):
-                    self.file = open(self.path + self.dataset + '/edge_list.csv', 'r')
-                    reader = csv.reader(self.file, delimiter=',')
-                    for _, line in enumerate(reader):
-                        i, j = int(line[0]), int(line[1])
-                        if j in node_set:
-                            writer = csv.writer(file_objects[l], delimiter=' ')
-                            writer.writerow(line)
-                            new_node_set.add(i)
-                    node_set = new_node_set
-                    self.file.close()
+            self.write_halo()
         
         
-        for files in file_objects:
-            files.close()
+        self.writer.close()
@@ -10,7 +10,8 @@ from collections import defaultdict
 import warnings
 warnings.filterwarnings('ignore')
 from SDT_GNN.partition.partitioner import Partitioner
-import hashlib
+from SDT_GNN.utils import hashing
+from SDT_GNN.utils.partition_io import partition_dtype, update_node_partition
 
 
 class DBH(Partitioner):
@@ -28,8 +29,12 @@ class DBH(Partitioner):
         seed (int): Random seed. Default is 42.
         partition_features_file (bool): Partition the features file if True,
         print_partition_statistics (bool): Print out the statistics of the partitioned graph if True.
+        hash_mode (str): Node hash, 'splitmix64' or the legacy 'sha256'. Default is 'splitmix64'.
+        **kwargs: Streaming, output and checkpoint options of Partitioner, such as chunk_size and output_format.
     """
 
+    INCREMENTAL = True
+
     def __init__(self, 
                  dataset: str = None, 
                  multilabel: bool=False, 
@@ -39,8 +44,10 @@ class DBH(Partitioner):
                  K: int = 1, 
                  seed: int = 42,
                  partition_features_file: bool = True,
-                 print_partition_statistics: bool = True):
-        super().__init__()
+                 print_partition_statistics: bool = True,
+                 hash_mode: str = 'splitmix64',
+                 **kwargs):
+        super().__init__(**kwargs)
         
         self.dataset = dataset
         self.multilabel = multilabel
@@ -50,80 +57,57 @@ class DBH(Partitioner):
         self.K = K
         self.seed = seed
         self._set_seed()
-        self.node_degree = defaultdict(int)
 
         self.partition_features_file = partition_features_file
         self.print_partition_statistics = print_partition_statistics
+        self.hash_mode = hash_mode
+
+
+    def assign_edges(self):
+        """Assign every edge by the hash of its lower-degree endpoint."""
+
+        if self.partition_workers > 1:
+            for src, dst, partition_ids in self.sharded_chunks('DBH', {'degree': self.node_degree}, 
+                                                               seed=self.seed, hash_mode=self.hash_mode):
+                update_node_partition(self.v2p, dst, partition_ids)
+                self.writer.write_block(src, dst, partition_ids)
+            return
+
+        degree = self.node_degree
+        
+        for src, dst in self.checkpointed_chunks():
+            # Hash the lower-degree endpoint of every edge in the block at once.
+            hashed = np.where(degree[src] < degree[dst], src, dst)
+            partition_ids = hashing.hash_partition(hashed, self.number_partition, self.seed, self.hash_mode)
+            
+            update_node_partition(self.v2p, dst, partition_ids)
+            self.writer.write_block(src, dst, partition_ids)
+
+
+    def update_partition(self):
+        """Assign the new edges by the degrees of the grown graph."""
+
+        self.get_degree()
+        self.assign_edges()
 
 
     def partition(self):
         """Partition a graph."""
         self.get_degree()
-        self.v2p = defaultdict(int)
-        
-        for i in range(self.number_partition):
-            with open(os.path.join(self.output_path, 'partition_' + str(i) + '.txt'), 'w') as f:
-                pass
+        self.v2p = np.zeros(self.number_nodes, dtype=partition_dtype(self.number_partition))
         
-        self.file = open(self.path + self.dataset + '/edge_list.csv', 'r')
-          
-        file_objects = []
-        for i in range(self.number_partition):
-            filename = os.path.join(self.output_path, 'partition_' + str(i) + '.txt')
-            files = open(filename, 'a', newline='')
-            # Append the file object to the list
-            file_objects.append(files)
+        self.writer = self.open_writer()
         
-        reader = csv.reader(self.file, delimiter=',')
+        self.run_step(self.assign_edges)
         
-        for _, line in enumerate(reader):
-            i, j = int(line[0]), int(line[1])
-            if self.node_degree[int(i)] < self.node_degree[int(j)]:
-                hash_val = int(hashlib.sha256(str(i).encode()).hexdigest(), 16)
-                partition_id = hash_val % self.number_partition
-            else:
-                hash_val = int(hashlib.sha256(str(j).encode()).hexdigest(), 16)
-                partition_id = hash_val % self.number_partition
-                
-            self.v2p[j] = partition_id
-            
-            writer = csv.writer(file_objects[partition_id], delimiter=' ')
-            writer.writerow(line)
-        
-        with open(self.output_path + 'partition' + '.json', 'wb') as json_file:
-            pickle.dump(self.v2p, json_file)
+        self.run_step(self.save_node_partition)
         
 
         if self.K == 0:
             pass
         
-        elif self.K == 1:
-            self.file = open(self.path + self.dataset + '/edge_list.csv', 'r')
-            reader = csv.reader(self.file, delimiter=',')
-            for _, line in enumerate(reader):
-                i, j = int(line[0]), int(line[1])
-                partition_id = self.v2p[j]
-                
-                writer = csv.writer(file_objects[partition_id], delimiter=' ')
-                writer.writerow(line)
-            self.file.close()
-            
         else:
-            for l in range(self.number_partition):
-                node_set = [k for k,v in self.v2p.items() if v == l]
-                new_node_set = set()
-                for _ in range(self.K):
-                    self.file = open(self.path + self.dataset + '/edge_list.csv', 'r')
-                    reader = csv.reader(self.file, delimiter=',')
-                    for _, line in enumerate(reader):
-                        i, j = int(line[0]), int(line[1])
-                        if j in node_set:
-                            writer = csv.writer(file_objects[l], delimiter=' ')
-                            writer.writerow(line)
-                            new_node_set.add(i)
-                    node_set = new_node_set
-                    self.file.close()
-
-        for files in file_objects:
-            files.close()
+            self.write_halo()
+
+        self.writer.close()
         
\ No newline at end of file
@@ -10,6 +10,9 @@ from collections import defaultdict
 import warnings
 warnings.filterwarnings('ignore')
 from SDT_GNN.partition.partitioner import Partitioner
+from SDT_GNN.utils.partition_io import partition_dtype, update_node_partition
+from SDT_GNN.partition.replica import ReplicaMatrix
+from SDT_GNN.partition import scoring
 
 
 class Greedy(Partitioner):
@@ -27,8 +30,12 @@ class Greedy(Partitioner):
         seed (int): Random seed. Default is 42.
         partition_features_file (bool): Partition the features file if True,
         print_partition_statistics (bool): Print out the statistics of the partitioned graph if True.
+        **kwargs: Streaming, output and checkpoint options of Partitioner, such as chunk_size and output_format.
     """
 
+    CHECKPOINT_STATE = Partitioner.CHECKPOINT_STATE + ['number_edges', 'vertex_partition_matrix', 'edge_load']
+    INCREMENTAL = True
+
     def __init__(self, dataset: str = None, 
                  multilabel: bool=False, 
                  path: str = None, 
@@ -37,8 +44,9 @@ class Greedy(Partitioner):
                  K: int = 1, 
                  seed: int = 42,
                  partition_features_file: bool = True,
-                 print_partition_statistics: bool = True):
-        super().__init__()
+                 print_partition_statistics: bool = True,
+                 **kwargs):
+        super().__init__(**kwargs)
 
         self.dataset = dataset
         self.multilabel = multilabel
@@ -53,109 +61,65 @@ class Greedy(Partitioner):
         self.print_partition_statistics = print_partition_statistics
         
         self.epsilon = 1
-        self.edge_load = [0 for _ in range(self.number_partition)]
-        self.vertex_partition_matrix  = defaultdict(list)
+        self.edge_load = scoring.EdgeLoad(self.number_partition)
         
 
-    def update_vertex_partition_matrix(self, i,j, max_p):
-        self.vertex_partition_matrix[i][max_p] = True
-        self.vertex_partition_matrix[j][max_p] = True
+    def assign_edges(self):
+        """Assign every edge greedily to a partition already holding its endpoints."""
+
+        if self.partition_workers > 1:
+            state = {'bits': self.vertex_partition_matrix.bits, 'load': self.edge_load.load}
+            for src, dst, partition_ids in self.sharded_chunks('Greedy', state, Lambda=1.0, epsilon=self.epsilon):
+                update_node_partition(self.v2p, dst, partition_ids)
+                self.writer.write_block(src, dst, partition_ids)
+                self.number_edges += len(src)
+            self.edge_load.set_loads(self.edge_load.load)
+            return
+
+        for src, dst in self.checkpointed_chunks():
+            partition_ids = scoring.assign_chunk(src, dst, 
+                                                 self.vertex_partition_matrix, 
+                                                 self.edge_load, 
+                                                 epsilon=self.epsilon)
+            update_node_partition(self.v2p, dst, partition_ids)
+            
+            self.writer.write_block(src, dst, partition_ids)
+            self.number_edges += len(src)
+
+
+    def resize_nodes(self, number_nodes):
+        """Grow the node arrays of the restored state to number_nodes nodes."""
+
+        super().resize_nodes(number_nodes)
+        self.vertex_partition_matrix.resize(number_nodes)
 
 
     def partition(self):
         """Partition a graph."""
         
-        self.v2p = defaultdict(int)
-        
-        for i in range(self.number_partition):
-            with open(os.path.join(self.output_path, 'partition_' + str(i) + '.txt'), 'w') as f:
-                pass
+        self.writer = self.open_writer()
 
-        self.file = open(self.path + self.dataset + '/edge_list.csv', 'r')
-        
-        file_objects = []
-        for i in range(self.number_partition):
-            filename = os.path.join(self.output_path, 'partition_' + str(i) + '.txt')
-            files = open(filename, 'a', newline='')
-            # Append the file object to the list
-            file_objects.append(files)
-        
-        reader = csv.reader(self.file, delimiter=',')
-        
-        for number_edges, line in enumerate(reader):
-            i, j = int(line[0]), int(line[1])
-        
-            if i not in self.vertex_partition_matrix.keys():
-                self.vertex_partition_matrix[int(i)] = [False for _ in range(self.number_partition)]
-            if j not in self.vertex_partition_matrix.keys():
-                self.vertex_partition_matrix[int(j)] = [False for _ in range(self.number_partition)]
-
-            maxsize = max(self.edge_load)
-            minsize = min(self.edge_load)
-
-            C_greedy = [0 for _ in range(self.number_partition)]
-            for p in range(self.number_partition):
-                g_i = 0
-                g_j = 0
-                if self.vertex_partition_matrix[i][p]:
-                    g_i = 1
-                if self.vertex_partition_matrix[j][p]:
-                    g_j = 1
-                load = self.edge_load[p]
-                C_rep = g_i + g_j
-                C_bal = (maxsize - load)/(self.epsilon + maxsize - minsize)
-                C_greedy[p] = C_rep + C_bal
-            partition_id = np.argmax(C_greedy)
-            self.edge_load[partition_id] += 1
-            self.update_vertex_partition_matrix(i, j, partition_id)
-            
-            self.v2p[j] = partition_id
-            
-            writer = csv.writer(file_objects[partition_id], delimiter=' ')
-            writer.writerow(line)
+        stream = self.edge_stream()
+        self.number_nodes = stream.number_nodes
+        self.v2p = np.zeros(self.number_nodes, dtype=partition_dtype(self.number_partition))
+        self.vertex_partition_matrix = ReplicaMatrix(self.number_nodes, self.number_partition)
+
+        self.number_edges = 0
+        self.run_step(self.assign_edges)
         
-        self.number_edges = number_edges + 1
-        self.number_nodes = max(self.v2p) + 1
-        self.file.close()
         print('Number of nodes: ', self.number_nodes)
         print('Number of edges: ', self.number_edges)
         
-        with open(self.output_path + 'partition' + '.json', 'wb') as json_file:
-            pickle.dump(self.v2p, json_file)
+        self.run_step(self.save_node_partition)
         
         
         if self.K == 0:
             pass
         
-        elif self.K == 1:
-            self.file = open(self.path + self.dataset + '/edge_list.csv', 'r')
-            reader = csv.reader(self.file, delimiter=',')
-            for _, line in enumerate(reader):
-                i, j = int(line[0]), int(line[1])
-                partition_id = self.v2p[j]
-                
-                writer = csv.writer(file_objects[partition_id], delimiter=' ')
-                writer.writerow(line)
-            self.file.close()
-            
         else:
-            for l in range(self.number_partition):
-                node_set = [k for k,v in self.v2p.items() if v == l]
-                new_node_set = set()
-                for _ in range(self.K):
-                    self.file = open(self.path + self.dataset + '/edge_list.csv', 'r')
-                    reader = csv.reader(self.file, delimiter=',')
-                    for _, line in enumerate(reader):
-                        i, j = int(line[0]), int(line[1])
-                        if j in node_set:
-                            writer = csv.writer(file_objects[l], delimiter=' ')
-                            writer.writerow(line)
-                            new_node_set.add(i)
-                    node_set = new_node_set
-                    self.file.close()
-
-        for files in file_objects:
-            files.close()
+            self.write_halo()
+
+        self.writer.close()
         
         
         
@@ -10,6 +10,7 @@ from collections import defaultdict
 import warnings
 warnings.filterwarnings('ignore')
 from SDT_GNN.partition.partitioner import Partitioner
+from SDT_GNN.utils.partition_io import partition_dtype, update_node_partition
 import hashlib
 
 class Hashing(Partitioner):
@@ -24,8 +25,12 @@ class Hashing(Partitioner):
         seed (int): Random seed. Default is 42.
         partition_features_file (bool): Partition the features file if True,
         print_partition_statistics (bool): Print out the statistics of the partitioned graph if True.
+        **kwargs: Streaming, output and checkpoint options of Partitioner, such as chunk_size and output_format.
     """
 
+    CHECKPOINT_STATE = Partitioner.CHECKPOINT_STATE + ['number_edges']
+    INCREMENTAL = True
+
     def __init__(self, 
                  dataset: str = None, 
                  multilabel: bool=False, 
@@ -35,8 +40,9 @@ class Hashing(Partitioner):
                  K: int = 1, 
                  seed: int = 42,
                  partition_features_file: bool = True,
-                 print_partition_statistics: bool = True):
-        super().__init__()
+                 print_partition_statistics: bool = True,
+                 **kwargs):
+        super().__init__(**kwargs)
         
         self.dataset = dataset
         self.multilabel = multilabel
@@ -53,75 +59,38 @@ class Hashing(Partitioner):
         self.partition_features_file = partition_features_file
         self.print_partition_statistics = print_partition_statistics
 
+    def assign_edges(self):
+        """Assign every edge to a random partition."""
+
+        for src, dst in self.checkpointed_chunks():
+            # One random draw per edge, in stream order, as in the edge-by-edge assignment.
+            partition_ids = np.abs((src * dst * np.random.random(len(src))).astype(np.int64) % self.number_partition)
+            update_node_partition(self.v2p, dst, partition_ids)
+            self.writer.write_block(src, dst, partition_ids)
+            self.number_edges += len(src)
+
+
     def partition(self):
         """Partition a graph."""
 
-        self.v2p = defaultdict(int)
-        
-        for i in range(self.number_partition):
-            with open(os.path.join(self.output_path, 'partition_' + str(i) + '.txt'), 'w') as f:
-                pass
+        self.writer = self.open_writer()
 
-        self.file = open(self.path + self.dataset + '/edge_list.csv', 'r')
-        
-        file_objects = []
-        for i in range(self.number_partition):
-            filename = os.path.join(self.output_path, 'partition_' + str(i) + '.txt')
-            files = open(filename, 'a', newline='')
-            # Append the file object to the list
-            file_objects.append(files)
-        
+        stream = self.edge_stream()
+        self.number_nodes = stream.number_nodes
+        self.v2p = np.zeros(self.number_nodes, dtype=partition_dtype(self.number_partition))
         
-        reader = csv.reader(self.file, delimiter=',')
-        for number_edges, line in enumerate(reader):
-            i, j = int(line[0]), int(line[1])
-            partition_id = np.abs(int(i*j*np.random.random()) % self.number_partition)
-            self.v2p[j] = partition_id
-            
-            writer = csv.writer(file_objects[partition_id], delimiter=' ')
-            writer.writerow(line)
-            
-        for files in file_objects:
-            files.close()
+        self.number_edges = 0
+        self.run_step(self.assign_edges)
         
-        self.number_edges = number_edges + 1
-        self.number_nodes = len(self.v2p)
-        self.file.close()
         print('Number of nodes: ', self.number_nodes)
         print('Number of edges: ', self.number_edges)
         
-        with open(self.output_path + 'partition' + '.json', 'wb') as json_file:
-            pickle.dump(self.v2p, json_file)
+        self.run_step(self.save_node_partition)
         
         if self.K == 0:
             pass
         
-        elif self.K == 1:
-            self.file = open(self.path + self.dataset + '/edge_list.csv', 'r')
-            reader = csv.reader(self.file, delimiter=',')
-            for _, line in enumerate(reader):
-                i, j = int(line[0]), int(line[1])
-                partition_id = self.v2p[j]
-                
-                writer = csv.writer(file_objects[partition_id], delimiter=' ')
-                writer.writerow(line)
-            self.file.close()
-            
         else:
-            for l in range(self.number_partition):
-                node_set = [k for k,v in self.v2p.items() if v == l]
-                new_node_set = set()
-                for _ in range(self.K):
-                    self.file = open(self.path + self.dataset + '/edge_list.csv', 'r')
-                    reader = csv.reader(self.file, delimiter=',')
-                    for _, line in enumerate(reader):
-                        i, j = int(line[0]), int(line[1])
-                        if j in node_set:
-                            writer = csv.writer(file_objects[l], delimiter=' ')
-                            writer.writerow(line)
-                            new_node_set.add(i)
-                    node_set = new_node_set
-                    self.file.close()
+            self.write_halo()
 
-        for files in file_objects:
-            files.close()
+        self.writer.close()
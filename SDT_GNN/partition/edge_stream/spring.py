@@ -6,74 +6,14 @@ import pickle
 import os
 import csv
 import gzip
+import heapq
 from collections import defaultdict, Counter
 import warnings
 warnings.filterwarnings('ignore')
 from SDT_GNN.partition.partitioner import Partitioner
-from sortedcontainers import SortedDict
-
-
-class SortedDictByValue:
-    """An implementation of SortedDictByValue data structure."""
-    
-    def __init__(self):
-        self.sorted_dict = SortedDict()
-        self.keys_by_value = []
-
-    def __setitem__(self, key, value):
-        # Remove the old key if it exists
-        if key in self.sorted_dict:
-            self.__delitem__(key)
-
-        # Add the key to the SortedDict
-        self.sorted_dict[key] = value
-
-        # Add the key to the list, maintaining the order based on values
-        index = self._find_insert_index(key, value)
-        self.keys_by_value.insert(index, key)
-
-    def __delitem__(self, key):
-        # Remove the key from the list
-        self.keys_by_value.remove(key)
-
-        # Remove the key from the SortedDict
-        del self.sorted_dict[key]
-
-    def _find_insert_index(self, key, value):
-        # Find the index to insert the key based on values
-        lo, hi = 0, len(self.keys_by_value)
-        while lo < hi:
-            mid = (lo + hi) // 2
-            mid_key = self.keys_by_value[mid]
-            mid_value = self.sorted_dict[mid_key]
-            if mid_value < value or (mid_value == value and mid_key < key):
-                lo = mid + 1
-            else:
-                hi = mid
-        return lo
-
-    def items(self):
-        # Yield items in sorted order based on values (and keys for equal values)
-        for key in self.keys_by_value:
-            yield key, self.sorted_dict[key]
-
-    def get_ith_element(self, i):
-        # Check if the index is within bounds
-        if 0 <= i < len(self):
-            # Use indexing to get the i-th element
-            key = self.keys_by_value[i]
-            return key, self.sorted_dict[key]
-        else:
-            raise IndexError("Index out of range")
-
-    def __len__(self):
-        # Get the length based on the length of keys_by_value
-        return len(self.keys_by_value)
-
-    def __str__(self):
-        # String representation of the sorted dictionary
-        return str(dict(self.items()))
-
+from SDT_GNN.utils import node_io
+from SDT_GNN.utils.partition_io import partition_dtype
+from SDT_GNN.partition.streamcom import StreamClustering
 
 
 class SPRING(Partitioner):
@@ -91,8 +31,13 @@ class SPRING(Partitioner):
         seed (int): Random seed. Default is 42.
         partition_features_file (bool): Partition the features file if True.
         print_partition_statistics (bool): Print out the statistics of the partitioned graph if True.
+        **kwargs: Streaming, output and checkpoint options of Partitioner, such as chunk_size and output_format.
     """
 
+    CHECKPOINT_STATE = Partitioner.CHECKPOINT_STATE + ['v_max', 'train_ids', 'clustering', 'v2c', 
+                                                       'max_degree_neighbor', 'best_degree', 'c2p']
+    INCREMENTAL = True
+
     def __init__(self, 
                  dataset: str = None, 
                  multilabel: bool=False, 
@@ -103,8 +48,9 @@ class SPRING(Partitioner):
                  stream_iters: int = 1, 
                  seed: int = 42,
                  partition_features_file: bool = True,
-                 print_partition_statistics: bool = True):
-        super().__init__()
+                 print_partition_statistics: bool = True,
+                 **kwargs):
+        super().__init__(**kwargs)
         
         self.dataset = dataset
         self.multilabel = multilabel
@@ -114,205 +60,221 @@ class SPRING(Partitioner):
         self.K = K
         self.seed = seed
         self._set_seed()
-        self.node_degree = defaultdict(int)
         self.stream_iters = stream_iters
         
         self.partition_features_file = partition_features_file
         self.print_partition_statistics = print_partition_statistics
         
-        self.max_degree_neighbor = defaultdict(int)
+        self.max_degree_neighbor = None
+        self.best_degree = None
 
  
-    def do_clustering(self, i, j, c, v):
-        if c[i] == 0:
-            c[i] = self.next_c_id
-            v[c[i]] += self.node_degree[i]
-            self.next_c_id += 1
-        if c[j] == 0:
-            c[j] = self.next_c_id
-            v[c[j]] += self.node_degree[j]
-            self.next_c_id += 1
-        if v[c[i]] <= self.v_max and v[c[j]] <= self.v_max:
-            if v[c[i]] <= v[c[j]]:
-                v[c[j]] += self.node_degree[i]
-                v[c[i]] -= self.node_degree[i]
-                c[i] = c[j]
-            else:
-                v[c[i]] += self.node_degree[j]
-                v[c[j]] -= self.node_degree[j]
-                c[j] = c[i]
+    def restream_clustering(self):
+        """Cluster the nodes in stream_iters streaming passes, one checkpointed step per pass."""
+
+        self.run_step(self.init_clustering)
+        for _ in range(self.stream_iters):
+            self.run_step(self.stream_clustering)
 
 
-    def restream_clustering(self):
-        self.v2c = defaultdict(int)
-        self.vol = defaultdict(int)
-        self.n_training = defaultdict(int)
-        self.next_c_id = 1
+    def init_clustering(self):
+        """Allocate the streaming clustering state."""
+
         self.v_max = 0.1*self.number_edges/self.number_partition
-        role = json.load(open(self.path + self.dataset + '/role.json'))
-        self.train_ids = role['tr']
+        self.train_ids = node_io.load_split(self.path, self.dataset, 'train')
         
-        for _ in range(self.stream_iters):
-            self.file = open(self.path + self.dataset + '/edge_list.csv', 'r')
-            reader = csv.reader(self.file, delimiter=',')
-            
-            for _, line in enumerate(reader):
-                i, j = int(line[0]), int(line[1])
-                self.do_clustering(i, j, self.v2c, self.vol)
-                
-                if int(j) not in self.max_degree_neighbor.keys():
-                    self.max_degree_neighbor[int(j)] = int(i)
-                
-                elif self.node_degree[self.max_degree_neighbor[int(j)]] < self.node_degree[int(i)]:
-                    self.max_degree_neighbor[int(j)] = int(i)
-            
+        self.clustering = StreamClustering(self.node_degree, self.v_max, 'volume')
+        self.v2c = self.clustering.community
 
-    def cluster_merge(self):
 
-        cluster_nodes_dict = defaultdict(set)
+    def stream_clustering(self):
+        """Run one clustering pass over the edges, checkpointed every checkpoint_interval edges."""
 
-        for node, cluster in self.v2c.items():
-            cluster_nodes_dict[cluster].add(node)
+        stream = self.edge_stream()
+        self.clustering.stream(stream, chunks=self.checkpointed_chunks(stream))
 
-        # Calculate the target size based on your condition
-        target_size = 1.05 * self.number_nodes / self.number_partition
 
-        # Create a dictionary to store cluster sizes
-        cluster_sizes = Counter(self.v2c.values())
-        # print('size_clusters: ', cluster_sizes)
-        
-        # Sort the clusters by size in ascending order
-        sorted_clusters = SortedDictByValue()
-        for cluster, size in cluster_sizes.items():
-            sorted_clusters[cluster] = size
+    def find_max_degree_neighbor(self):
+        """
+        Find the highest-degree in-neighbor of every node, as a dense array indexed by node ID.
 
+        A segmented arg-max of degree[src] grouped by dst, chunk by chunk. Ties go to the
+        neighbor streamed first. Nodes without in-neighbors are -1.
+        """
 
-        n_loop = len(sorted_clusters) - 1
-        for i in range(n_loop):
-            smallest_cluster, size_smallest_cluster = sorted_clusters.get_ith_element(i)
-            # print('smallest_cluster', smallest_cluster)
-            # print('size_smallest_cluster', size_smallest_cluster)
+        self.run_step(self.init_max_degree_neighbor)
+        self.run_step(self.stream_max_degree_neighbor)
 
-            # Find nodes in the smallest cluster
-            nodes_in_smallest_cluster = cluster_nodes_dict[smallest_cluster]
-            # print('nodes_in_smallest_cluster: ', nodes_in_smallest_cluster)
 
-            # Get the richest neighbor for each node in the smallest cluster
-            richest_neighbors = [self.max_degree_neighbor[node] for node in nodes_in_smallest_cluster]
-            richest_neighbors = list(set(richest_neighbors))  # Deduplicate neighbors
-            # print('richest_neighbors: ', richest_neighbors)
+    def init_max_degree_neighbor(self):
+        """Allocate the highest-degree in-neighbors and their degrees."""
+
+        self.max_degree_neighbor = np.full(self.number_nodes, -1, dtype=np.int64)
+        self.best_degree = np.full(self.number_nodes, -1, dtype=self.node_degree.dtype)
+
+
+    def stream_max_degree_neighbor(self):
+        """Stream the edges for the highest-degree in-neighbors, checkpointed every checkpoint_interval edges."""
+
+        degree = self.node_degree
+        best_degree = self.best_degree
 
-            # Calculate the degree of each neighbor
-            neighbor_degrees = {neighbor: self.node_degree[neighbor] for neighbor in richest_neighbors}
-            # print('sub_dict: ')
-            # pprint.pprint(neighbor_degrees)
+        for src, dst in self.checkpointed_chunks():
+            src_degree = degree[src]
+            # Sort by dst, then by descending degree, then by stream position.
+            order = np.lexsort((-src_degree, dst))
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = dst[order][1:] != dst[order][:-1]
+            best = order[first]
+
+            nodes = dst[best]
+            update = src_degree[best] > best_degree[nodes]
+            nodes = nodes[update]
+            self.max_degree_neighbor[nodes] = src[best[update]]
+            best_degree[nodes] = src_degree[best[update]]
+        self.best_degree = None
+
+
+    def cluster_merge(self):
+        """
+        Merge every small cluster into the cluster of its richest neighbor while the merged size fits.
+
+        Clusters are visited from the smallest current size upwards with a lazily
+        invalidated heap: a merge pushes the grown cluster again and outdated entries
+        are skipped when popped. Merged clusters are tracked with a union-find forest
+        over cluster IDs, and the nodes of a cluster are the concatenated slices of its
+        member streaming clusters in a node array grouped by cluster.
+        """
+
+        nodes = self.clustering.nodes()
+        clusters = self.v2c[nodes]
+        if len(nodes) == 0:
+            return
+
+        node_cluster = self.v2c
+
+        # Calculate the target size based on your condition
+        target_size = 1.05 * self.number_nodes / self.number_partition
+
+        # Nodes grouped by streaming cluster: cluster c owns grouped[start[c]:start[c] + count[c]].
+        order = np.argsort(clusters, kind='stable')
+        grouped = nodes[order]
+        cluster_ids, first, counts = np.unique(clusters[order], return_index=True, return_counts=True)
+        n_cluster_ids = int(cluster_ids[-1]) + 1
+        start = np.zeros(n_cluster_ids, dtype=np.int64)
+        start[cluster_ids] = first
+        count = np.zeros(n_cluster_ids, dtype=np.int64)
+        count[cluster_ids] = counts
+
+        cluster_size = count.tolist()
+        parent = list(range(n_cluster_ids))
+        members = {}
+        visited = [False] * n_cluster_ids
+
+        def find(c):
+            root = c
+            while parent[root] != root:
+                root = parent[root]
+            while parent[c] != root:
+                parent[c], c = root, parent[c]
+            return root
+
+        heap = list(zip(counts.tolist(), cluster_ids.tolist()))
+        heapq.heapify(heap)
+
+        n_loop = len(cluster_ids) - 1
+        while heap and n_loop > 0:
+            size_smallest_cluster, smallest_cluster = heapq.heappop(heap)
+            if visited[smallest_cluster] or size_smallest_cluster != cluster_size[smallest_cluster]:
+                continue
+            visited[smallest_cluster] = True
+            n_loop -= 1
+
+            # Get the richest neighbor for each node in the smallest cluster
+            member_clusters = members.get(smallest_cluster, [smallest_cluster])
+            nodes_in_smallest_cluster = np.concatenate([grouped[start[m]:start[m] + count[m]] 
+                                                        for m in member_clusters])
+            richest_neighbors = np.unique(self.max_degree_neighbor[nodes_in_smallest_cluster])
+            richest_neighbors = richest_neighbors[richest_neighbors >= 0]
+            if len(richest_neighbors) == 0:
+                continue
 
             # Find the neighbor with the highest degree
-            richest_of_richest_neighbors = max(neighbor_degrees, key=neighbor_degrees.get)
-            richest_of_richest_neighbors_cluster = self.v2c[richest_of_richest_neighbors]
-            # print('richest_of_richest_neighbors: ', richest_of_richest_neighbors)
-            # print('richest_of_richest_neighbors_cluster: ', richest_of_richest_neighbors_cluster)
+            richest_of_richest_neighbors = richest_neighbors[np.argmax(self.node_degree[richest_neighbors])]
+            if node_cluster[richest_of_richest_neighbors] == 0:
+                continue
+            richest_of_richest_neighbors_cluster = find(int(node_cluster[richest_of_richest_neighbors]))
 
             if richest_of_richest_neighbors_cluster != smallest_cluster:
-                # if richest_of_richest_neighbors_cluster in sorted_clusters.sorted_dict:
-                if sorted_clusters.sorted_dict[richest_of_richest_neighbors_cluster] + size_smallest_cluster <= target_size:
+                if cluster_size[richest_of_richest_neighbors_cluster] + size_smallest_cluster <= target_size:
                     # Merge the smallest cluster into the richest neighbor's cluster
-                    for node in nodes_in_smallest_cluster:
-                        self.v2c[node] = richest_of_richest_neighbors_cluster
-                    sorted_clusters.sorted_dict[richest_of_richest_neighbors_cluster] += size_smallest_cluster
-                    sorted_clusters.sorted_dict[smallest_cluster] -= size_smallest_cluster
+                    parent[smallest_cluster] = richest_of_richest_neighbors_cluster
+                    cluster_size[richest_of_richest_neighbors_cluster] += size_smallest_cluster
+                    cluster_size[smallest_cluster] = 0
 
-                    cluster_nodes_dict[richest_of_richest_neighbors_cluster].update(cluster_nodes_dict[smallest_cluster])
-                    del cluster_nodes_dict[smallest_cluster]
+                    merged = members.setdefault(richest_of_richest_neighbors_cluster, 
+                                                [richest_of_richest_neighbors_cluster])
+                    merged.extend(members.pop(smallest_cluster, [smallest_cluster]))
+                    if not visited[richest_of_richest_neighbors_cluster]:
+                        heapq.heappush(heap, (cluster_size[richest_of_richest_neighbors_cluster], 
+                                              richest_of_richest_neighbors_cluster))
 
-    def cluster2partition(self):
+        root = np.array([find(c) for c in range(n_cluster_ids)], dtype=np.int64)
+        self.v2c[nodes] = root[clusters]
 
-        self.v2p = defaultdict(int)
-        self.c2p = defaultdict(int)
+    def cluster2partition(self):
+        """Assign the clusters, in order of first appearance, to the partition with the fewest nodes."""
 
-        v2c_counts = Counter(self.v2c.values())
+        _, sizes, cluster_nodes, _ = self.clustering.clusters()
 
-        # p_size = np.array([0 for i in range(self.number_partition)])
-        p_size = [0 for i in range(self.number_partition)]
+        self.c2p = np.zeros(len(sizes), dtype=np.int64)
+        p_size = [(0, p) for p in range(self.number_partition)]
 
-        for value, count in v2c_counts.items():
-            index_min_p_size = np.argmin(p_size)
-            p_size[index_min_p_size] += count
-            self.c2p[value] = index_min_p_size
+        for c, count in enumerate(sizes.tolist()):
+            size, index_min_p_size = heapq.heappop(p_size)
+            self.c2p[c] = index_min_p_size
+            heapq.heappush(p_size, (size + count, index_min_p_size))
 
-        for key, value in self.v2c.items():
-            # if value in self.c2p:
-            self.v2p[key] = self.c2p[value]
+        self.v2p = np.zeros(self.number_nodes, dtype=partition_dtype(self.number_partition))
+        self.v2p[cluster_nodes] = np.repeat(self.c2p, sizes)
 
         return self.v2p
     
     
+    def update_partition(self):
+        """Cluster the new edges and place the new nodes with their clusters, then write the new edges if K = 0."""
+
+        self.get_degree()
+        self.clustering.update_degree(self.node_degree)
+        self.clustering.stream(self.edge_stream(), start=self.stream_start)
+        self.v2c = self.clustering.community
+        self.place_new_nodes(self.v2c)
+        if self.K == 0:
+            self.write_cut_edges()
+
+
     def partition(self):
         """Partition a graph."""
 
-        for i in range(self.number_partition):
-            with open(os.path.join(self.output_path, 'partition_' + str(i) + '.txt'), 'w') as f:
-                pass
+        self.writer = self.open_writer()
         
         self.get_degree()
         self.restream_clustering()
-        self.cluster_merge()
-        self.cluster2partition()
+        self.find_max_degree_neighbor()
+        self.run_step(self.cluster_merge)
+        self.run_step(self.cluster2partition)
         # self.v2p = defaultdict(int)
         
         # for i in range(len(self.list_p)):
         #     for j in self.list_p[i]:
         #         self.v2p[j] = i
         
-        with open(self.output_path + 'partition' + '.json', 'wb') as json_file:
-            pickle.dump(self.v2p, json_file)
+        self.run_step(self.save_node_partition)
                 
-        self.file = open(self.path + self.dataset + '/edge_list.csv', 'r')
-        
-        file_objects = []
-        for i in range(self.number_partition):
-            filename = os.path.join(self.output_path, 'partition_' + str(i) + '.txt')
-            files = open(filename, 'a', newline='')
-            # Append the file object to the list
-            file_objects.append(files)
-        
-        reader = csv.reader(self.file, delimiter=',')
-        
         if self.K == 0:
-            for _, line in enumerate(reader):
-                i, j = int(line[0]), int(line[1])
-                if self.v2p[i] == self.v2p[j]:
-                    partition_id = self.v2p[j]
-                else:
-                    partition_id = self.v2p[i] if i < j else self.v2p[j]
-
-                writer = csv.writer(file_objects[partition_id], delimiter=' ')
-                writer.writerow(line)
-            self.file.close()
-        
-        elif self.K == 1:
-            for _, line in enumerate(reader):
-                i, j = int(line[0]), int(line[1])
-                partition_id = self.v2p[j]
-                writer = csv.writer(file_objects[partition_id], delimiter=' ')
-                writer.writerow(line)
-            self.file.close()
+            self.run_step(self.write_cut_edges)
         
         else:
-            for l in range(self.number_partition):
-                node_set = [k for k,v in self.v2p.items() if v == l]
-                new_node_set = set()
-                for _ in range(self.K):
-                    self.file = open(self.path + self.dataset + '/edge_list.csv', 'r')
-                    reader = csv.reader(self.file, delimiter=',')
-                    for _, line in enumerate(reader):
-                        i, j = int(line[0]), int(line[1])
-                        if j in node_set:
-                            writer = csv.writer(file_objects[l], delimiter=' ')
-                            writer.writerow(line)
-                            new_node_set.add(i)
-                    node_set = new_node_set
-                    self.file.close()
+            self.write_halo()
         
-        for files in file_objects:
-            files.close()
+        self.writer.close()
@@ -6,11 +6,15 @@ import pickle
 import os
 import csv
 import gzip
-from collections import defaultdict
+import heapq
 import warnings
 warnings.filterwarnings('ignore')
 # from memory_profiler import profile
 from SDT_GNN.partition.partitioner import Partitioner
+from SDT_GNN.partition import sharded
+from SDT_GNN.utils.partition_io import partition_dtype, update_node_partition
+from SDT_GNN.partition.replica import ReplicaMatrix
+from SDT_GNN.partition.streamcom import StreamClustering
 UINT64_MAX = 2147483647
 
 
@@ -30,7 +34,12 @@ class TwoPSL(Partitioner):
         seed (int): Random seed. Default is 42.
         partition_features_file (bool): Partition the features file if True,
         print_partition_statistics (bool): Print out the statistics of the partitioned graph if True.
+        **kwargs: Streaming, output and checkpoint options of Partitioner, such as chunk_size and output_format.
     """
+
+    CHECKPOINT_STATE = Partitioner.CHECKPOINT_STATE + ['clustering', 'volumes', 'communities', 'quality_scores', 
+                                                       'com2part', 'partition_volume', 'node_p', 'edge_load', 
+                                                       'vertex_partition_matrix', 'max_load', 'min_load']
     
     def __init__(self, 
                  dataset: str = None, 
@@ -44,8 +53,9 @@ class TwoPSL(Partitioner):
                  K: int = 1,
                  seed: int = 42,
                  partition_features_file: bool = True,
-                 print_partition_statistics: bool = True):
-        super().__init__()
+                 print_partition_statistics: bool = True,
+                 **kwargs):
+        super().__init__(**kwargs)
     
         self.dataset = dataset
         self.multilabel = multilabel
@@ -59,157 +69,102 @@ class TwoPSL(Partitioner):
         self.partition_features_file = partition_features_file
         self.print_partition_statistics = print_partition_statistics
 
-        self.node_degree = defaultdict(int)
         self.stream_iters = stream_iters
         self.cluster_quality_eval = eval_cluster
         self.score = score
 
-        self.max_num_partition = 256
-        self.get_degree()
         ####################################### two phase parameters #######################################
         self.balance_ratio = 1.05
         self._lambda = 1
+        self.epsilon =1
+
+
+    def init_partitioning(self):
+        """Load the node degrees and allocate the clustering and partitioning state."""
+
+        self.get_degree()
         self.max_vol = int(0.1*self.number_edges/self.number_partition)
 
         self.max_partition_load = self.balance_ratio*self.number_edges/self.number_partition
         # for streamcom
-        self.volumes = [0 for _ in range(self.number_nodes+1)] #  index is community id, volume of a community
-        self.communities = [0 for _ in range(self.number_nodes)] # index is vertex id, community of a vertex
-        self.communities = defaultdict(int)
-        self.quality_scores = [0.0 for _ in range(self.number_nodes+1)] # quality of the communities (intra-cluster edges / inter-cluster edges)
-        self.next_community_id = 1
+        self.clustering = StreamClustering(self.node_degree, self.max_vol, 'real_volume')
+        self.volumes = self.clustering.volume #  index is community id, volume of a community
+        self.communities = self.clustering.community # index is vertex id, community of a vertex
+        self.quality_scores = self.clustering.quality # quality of the communities (intra-cluster edges / inter-cluster edges)
 
         # for partition
+        self.v2p = np.zeros(self.number_nodes, dtype=partition_dtype(self.number_partition))
         self.edge_load = [0 for _ in range(self.number_partition)]
-        self.vertex_partition_matrix = [ [False for _ in range(self.max_num_partition)] for _ in range(self.number_nodes)]
+        self.vertex_partition_matrix = ReplicaMatrix(self.number_nodes, self.number_partition)
 
         self.partition_volume = [0 for _ in range(self.number_partition)]
-        self.com2part = [0 for _ in range(self.number_nodes+1)]
+        self.com2part = np.zeros(self.number_nodes+1, dtype=np.int64)
         self.max_load = 0
         self.min_load = UINT64_MAX
-        self.epsilon =1
-        self.edge_p = defaultdict(list)
 
 
     def find_communities(self):
-        self.do_streamcom()
+        self.run_step(self.do_streamcom)
         if self.cluster_quality_eval:
-            self.evaluate_communities()
+            self.run_step(self.evaluate_communities)
         
-        self.do_streamcom()
+        self.run_step(self.do_streamcom)
         for i in range(3, self.stream_iters):
             if self.cluster_quality_eval:
-                self.evaluate_communities()
-            self.do_streamcom()
+                self.run_step(self.evaluate_communities)
+            self.run_step(self.do_streamcom)
 
 
     def do_streamcom(self):
-        
-        self.file = open(self.path + self.dataset + '/edge_list.csv', 'r')
-        
-        reader = csv.reader(self.file, delimiter=',')
-        for _, edge in enumerate(reader):
-            i, j = int(edge[0]), int(edge[1])
-        
-            if self.communities[i] == 0:
-                self.communities[i] = self.next_community_id
-                self.volumes[self.communities[i]] += self.node_degree[i]
-                self.next_community_id += 1
-
-            if self.communities[j] == 0:
-                self.communities[j] = self.next_community_id
-                self.volumes[self.communities[j]] += self.node_degree[j]
-                self.next_community_id += 1
-
-            real_vol_i = self.volumes[self.communities[i]]- self.node_degree[i]
-            real_vol_j = self.volumes[self.communities[j]] - self.node_degree[j]
-
-
-            if self.volumes[self.communities[i]] <= self.max_vol and self.volumes[self.communities[j]] <= self.max_vol:
-                if self.cluster_quality_eval:
-                    score_i = self.quality_scores[self.communities[i]]
-                    score_j = self.quality_scores[self.communities[j]]
-                    if real_vol_i <= real_vol_j and score_i >= score_j and self.volumes[self.communities[j]] + self.node_degree[i] <= self.max_vol:
-                        self.volumes[self.communities[i]] -= self.node_degree[i]
-                        self.volumes[self.communities[j]] += self.node_degree[i]
-                        self.communities[i] = self.communities[j]
-                    elif real_vol_j < real_vol_i and score_j >= score_i and self.volumes[self.communities[i]] + self.node_degree[j] <= self.max_vol:
-                        self.volumes[self.communities[j]] -= self.node_degree[j]
-                        self.volumes[self.communities[i]] += self.node_degree[j]
-                        self.communities[j] = self.communities[i]
-
-                else:
-                    if real_vol_i <= real_vol_j and self.volumes[self.communities[j]] + self.node_degree[i] <= self.max_vol:
-                        self.volumes[self.communities[i]] -= self.node_degree[i]
-                        self.volumes[self.communities[j]] += self.node_degree[i]
-                        self.communities[i] = self.communities[j]
-
-                    elif real_vol_j < real_vol_i and self.volumes[self.communities[i]] + self.node_degree[j] <= self.max_vol:
-                        self.volumes[self.communities[j]] -= self.node_degree[j]
-                        self.volumes[self.communities[i]] += self.node_degree[j]
-                        self.communities[j] = self.communities[i]
+        stream = self.edge_stream()
+        self.clustering.stream(stream, self.cluster_quality_eval, chunks=self.checkpointed_chunks(stream))
 
 
     def evaluate_communities(self):
-        self.external_degree = defaultdict(int)
-        
-        self.file = open(self.path + self.dataset + '/edge_list.csv', 'r')
-        
-        reader = csv.reader(self.file, delimiter=',')
-        for _, edge in enumerate(reader):
-            i, j = int(edge[0]), int(edge[1])
+        stream = self.edge_stream()
+        self.clustering.evaluate(stream, self.number_edges, chunks=self.checkpointed_chunks(stream))
 
-            if self.communities[i] != self.communities[j]:
-                self.external_degree[self.communities[i]] += 1
-                self.external_degree[self.communities[j]] += 1
+    def assign_communities(self):
+        # phase 1: communities, largest volume first, go to the partition of least volume
+        order = np.argsort(-self.volumes, kind='stable')
+        order = order[self.volumes[order] > 0]
 
-        for i in range(self.number_nodes):
-            demoniator = min(self.volumes[i], 2*self.number_edges - self.volumes[i])
-            if demoniator !=0:
-                score = self.external_degree[i] /demoniator
-                self.quality_scores[i] = score
+        partition_heap = [(0, p) for p in range(self.number_partition)]
+        for com, vol in zip(order.tolist(), self.volumes[order].tolist()):
+            p_vol, min_p = heapq.heappop(partition_heap)
+            self.com2part[com] = min_p
+            heapq.heappush(partition_heap, (p_vol + vol, min_p))
+        for p_vol, p in partition_heap:
+            self.partition_volume[p] = p_vol
 
-    def prepartition_and_partition(self):
-        # phase 1
-        sorted_communities = []
-        for i in range(len(self.volumes)):
-            sorted_communities.append((self.volumes[i], i))
-        sorted_communities = sorted(sorted_communities,key=lambda x: x[0], reverse=True)
-
-        for com_vol_pair in sorted_communities:
-            if com_vol_pair[0]==0: break
-            min_p = self.find_min_vol_partition()
-            self.partition_volume[min_p] += com_vol_pair[0]
-            self.com2part[com_vol_pair[1]] = min_p
-
-        self.node_p_dict = defaultdict(int)
-        for i in range(len(self.communities)):
-            self.node_p_dict[i] = self.com2part[self.communities[i]]
-            
-        size_p = defaultdict(int)
-        for k, v in self.node_p_dict.items():
+        self.node_p = self.com2part[self.communities]
 
-            size_p[v] += 1
+
+    def prepartition_and_partition(self):
+        self.run_step(self.assign_communities)
 
         # prepartition
-        self.sort_com_prepartitioning()
-        sum_edge_load = 0
-        for i in range(len(self.edge_load)):
-            sum_edge_load +=self.edge_load[i]
+        self.run_step(self.sort_com_prepartitioning)
 
         # phase 2 begin here
-        if self.score == 'hdrf':
-            self.do_hdrf()
+        if self.partition_workers > 1 and self.score in ('hdrf', 'linear'):
+            self.run_step(self.do_sharded)
+        elif self.score == 'hdrf':
+            self.run_step(self.do_hdrf)
         elif self.score == 'linear':
-            self.do_linear()
+            self.run_step(self.do_linear)
+
+
+    def checkpointed_edges(self):
+        """Stream the edges of the current step one by one, checkpointing between chunks."""
+
+        for src, dst in self.checkpointed_chunks():
+            yield from zip(src.tolist(), dst.tolist())
 
 
     def sort_com_prepartitioning(self):
-        self.file = open(self.path + self.dataset + '/edge_list.csv', 'r')
-        
-        reader = csv.reader(self.file, delimiter=',')
-        for _, edge in enumerate(reader):
-            i, j = int(edge[0]), int(edge[1])
+        for edge in self.checkpointed_edges():
+            i, j = edge
             com_i = self.communities[i]
             com_j = self.communities[j]
 
@@ -223,9 +178,7 @@ class TwoPSL(Partitioner):
                 self.update_min_max_load(partition)
                 self.v2p[j] = partition
                 # self.v2p_set[j].add(partition)
-                with open(os.path.join(self.output_path, 'partition_' + str(partition) + '.txt'), 'a') as f:
-                    writer = csv.writer(f, delimiter=' ')
-                    writer.writerow(edge)
+                self.writer.write(partition, i, j)
 
 
     def find_max_score_partition_linear(self, edge):
@@ -242,16 +195,15 @@ class TwoPSL(Partitioner):
             max_p = j%self.number_partition
 
         if self.edge_load[max_p] >= self.max_partition_load:
-            min_load = -1
-            min_p = 0
-            for i in range(self.number_partition):
-                if self.edge_load[i] < min_load:
-                    min_load = self.edge_load[i]
-                    min_p = i
-
-            max_p = min_p
+            max_p = self.least_loaded_partition()
         return max_p
 
+
+    def least_loaded_partition(self):
+        """The partition with the lowest edge load, the first one on ties."""
+
+        return int(np.argmin(self.edge_load))
+
     def find_max_score_partition(self, edge):
         # i, j = edge.strip().split(' ')
         # i, j = int(i), int(j)
@@ -271,14 +223,7 @@ class TwoPSL(Partitioner):
                 max_p = j%self.number_partition
 
             if self.edge_load[max_p] >= self.max_partition_load:
-                min_load = -1
-                min_p = 0
-                for i in range(self.number_partition):
-                    if self.edge_load[i] < min_load:
-                        min_load = self.edge_load[i]
-                        min_p = i
-
-                max_p = min_p
+                max_p = self.least_loaded_partition()
             return max_p
 
         else:
@@ -290,7 +235,7 @@ class TwoPSL(Partitioner):
                 gu = 0; gv = 0; gu_c = 0; gv_c = 0
                 sum = degree_i + degree_j
                 sum_of_volumes = self.volumes[self.communities[i]] + self.volumes[self.communities[j]]
-                if self.vertex_partition_matrix[i][p]:
+                if self.vertex_partition_matrix.has(i, p):
                     gu = degree_i
                     gu /= sum
                     gu = 1 + (1-gu)
@@ -298,7 +243,7 @@ class TwoPSL(Partitioner):
                         gu_c = self.volumes[self.communities[i]]
                         gu_c /= sum_of_volumes
 
-                if self.vertex_partition_matrix[j][p]:
+                if self.vertex_partition_matrix.has(j, p):
                     gv = degree_j
                     gv /= sum
                     gv = 1+(1-gv)
@@ -308,8 +253,7 @@ class TwoPSL(Partitioner):
 
                 score_p = gu+gv+gu_c+gv_c
                 if score_p < 0:
-                    print("ERROR score_p<0")
-                    exit()
+                    raise ValueError('Negative 2PSL partition score {} for edge ({}, {}).'.format(score_p, i, j))
                 if score_p >= max_score:
                     max_score = score_p
                     max_p = p
@@ -330,12 +274,12 @@ class TwoPSL(Partitioner):
 
             gu=0; gv=0
             sum = degree_i+degree_j
-            if self.vertex_partition_matrix[i][p]:
+            if self.vertex_partition_matrix.has(i, p):
                 gu=degree_i
                 gu/=sum
                 gu=1+(1-gu)
 
-            if self.vertex_partition_matrix[j][p]:
+            if self.vertex_partition_matrix.has(j, p):
                 gv = degree_j
                 gv/=sum
                 gv = 1+(1-gv)
@@ -346,8 +290,7 @@ class TwoPSL(Partitioner):
             score_p = gu+gv+self._lambda*bal
 
             if score_p <0:
-                print("ERROR: score_p <0")
-                exit()
+                raise ValueError('Negative 2PSL partition score {} for edge ({}, {}).'.format(score_p, i, j))
             if score_p > max_score:
                 max_score = score_p
                 max_p = p
@@ -358,8 +301,7 @@ class TwoPSL(Partitioner):
     def update_vertex_partition_matrix(self, e, max_p):
         i, j = int(e[0]), int(e[1])
         
-        self.vertex_partition_matrix[i][max_p] = True
-        self.vertex_partition_matrix[j][max_p] = True
+        self.vertex_partition_matrix.add_edge(i, j, max_p)
 
 
     def update_min_max_load(self, max_p):
@@ -370,11 +312,8 @@ class TwoPSL(Partitioner):
 
 
     def do_hdrf(self):
-        self.file = open(self.path + self.dataset + '/edge_list.csv', 'r')
-        
-        reader = csv.reader(self.file, delimiter=',')
-        for _, edge in enumerate(reader):
-            i, j = int(edge[0]), int(edge[1])
+        for edge in self.checkpointed_edges():
+            i, j = edge
 
             com_i = self.communities[i]
             com_j = self.communities[j]
@@ -386,18 +325,13 @@ class TwoPSL(Partitioner):
             self.update_min_max_load(max_p)
 
             self.v2p[j] = max_p
-            with open(os.path.join(self.output_path, 'partition_' + str(max_p) + '.txt'), 'a') as f:
-                writer = csv.writer(f, delimiter=' ')
-                writer.writerow(edge)
+            self.writer.write(max_p, i, j)
 
 
     def do_linear(self):
         
-        self.file = open(self.path + self.dataset + '/edge_list.csv', 'r')
-        
-        reader = csv.reader(self.file, delimiter=',')
-        for _, edge in enumerate(reader):
-            i, j = int(edge[0]), int(edge[1])
+        for edge in self.checkpointed_edges():
+            i, j = edge
 
             com_i = self.communities[i]
             com_j = self.communities[j]
@@ -408,75 +342,44 @@ class TwoPSL(Partitioner):
             self.update_min_max_load(max_p)
             
             self.v2p[j] = max_p
-            with open(os.path.join(self.output_path, 'partition_' + str(max_p) + '.txt'), 'a') as f:
-                writer = csv.writer(f, delimiter=' ')
-                writer.writerow(edge)
+            self.writer.write(max_p, i, j)
             
 
-    def find_min_vol_partition(self):
-        min_p_vol = self.partition_volume[0]
-        min_p = 0
-        for i in range(1, self.number_partition):
-            if self.partition_volume[i] < min_p_vol:
-                min_p_vol = self.partition_volume[i]
-                min_p = i
-        return min_p
+    def do_sharded(self):
+        """Phase 2 with the score of self.score, in parallel shards."""
+
+        state = {'bits': self.vertex_partition_matrix.bits,
+                 'load': np.array(self.edge_load, dtype=np.int64),
+                 'degree': self.node_degree,
+                 'communities': self.communities,
+                 'com2part': self.com2part}
+        for src, dst, partition_ids in self.sharded_chunks('2PSL-' + self.score, state,
+                                                           max_partition_load=self.max_partition_load,
+                                                           Lambda=self._lambda,
+                                                           epsilon=self.epsilon,
+                                                           min_load=(sharded.NO_MIN_LOAD if self.min_load == UINT64_MAX
+                                                                     else self.min_load)):
+            update_node_partition(self.v2p, dst, partition_ids)
+            self.writer.write_block(src, dst, partition_ids)
+
+        self.edge_load = state['load'].tolist()
+        self.max_load = max(self.max_load, max(self.edge_load))
 
 
     def partition(self):
         """Partition a graph."""
-        self.v2p = defaultdict(int)
-        for i in range(self.number_partition):
-            with open(os.path.join(self.output_path, 'partition_' + str(i) + '.txt'), 'w') as f:
-                pass
+        self.writer = self.open_writer()
 
+        self.init_partitioning()
         self.find_communities()
         self.prepartition_and_partition()
         
-        with open(self.output_path + 'partition' + '.json', 'wb') as json_file:
-            pickle.dump(self.v2p, json_file)
-        
-        self.file = open(self.path + self.dataset + '/edge_list.csv', 'r')
-        
-        file_objects = []
-        for i in range(self.number_partition):
-            filename = os.path.join(self.output_path, 'partition_' + str(i) + '.txt')
-            files = open(filename, 'a', newline='')
-            # Append the file object to the list
-            file_objects.append(files)
-        
-        reader = csv.reader(self.file, delimiter=',')
-        
+        self.run_step(self.save_node_partition)
         
         if self.K == 0:
             pass
         
-        elif self.K == 1:
-            self.file = open(self.path + self.dataset + '/edge_list.csv', 'r')
-            reader = csv.reader(self.file, delimiter=',')
-            for _, line in enumerate(reader):
-                i, j = int(line[0]), int(line[1])
-                partition_id = self.v2p[j]
-                
-                writer = csv.writer(file_objects[partition_id], delimiter=' ')
-                writer.writerow(line)
-            self.file.close()
-            
         else:
-            for l in range(self.number_partition):
-                node_set = [k for k,v in self.v2p.items() if v == l]
-                new_node_set = set()
-                for _ in range(self.K):
-                    self.file = open(self.path + self.dataset + '/edge_list.csv', 'r')
-                    reader = csv.reader(self.file, delimiter=',')
-                    for _, line in enumerate(reader):
-                        i, j = int(line[0]), int(line[1])
-                        if j in node_set:
-                            writer = csv.writer(file_objects[l], delimiter=' ')
-                            writer.writerow(line)
-                            new_node_set.add(i)
-                    node_set = new_node_set
-                    self.file.close()
-
-        for files in file_objects:
-            files.close()
\ No newline at end of file
+            self.write_halo()
+
+        self.writer.close()
\ No newline at end of file
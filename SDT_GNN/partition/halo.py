@@ -0,0 +1,55 @@
+import numpy as np
+
+"""
+K-hop halo expansion shared by the edge stream partitioners.
+
+Hop 1 writes every edge (i, j) to the partition of j. Hop h > 1 writes (i, j) to
+every partition whose frontier contains j, where the frontier of a partition is
+the set of source nodes of all edges it received in the earlier hops.
+The frontiers of all partitions are kept together as one packed bit matrix, so
+each hop is a single streaming pass over the edges, however many partitions there are.
+write_hop runs one pass over any iterable of edge chunks; the partitioner runs every hop
+as a checkpointed step (Partitioner.write_halo), so a hop can be resumed part way.
+"""
+
+
+def write_hop(chunks, partition, hop, K, reached, frontier, writer):
+    """
+    Write the edges of one halo hop.
+
+    Args:
+        chunks (iterable): (src, dst) blocks of the edges of the graph.
+        partition (np.ndarray): Partition of every node, dense.
+        hop (int): Hop index, from 0.
+        K (int): Number of hops.
+        reached (ReplicaMatrix): Frontiers of the partitions, updated for the next hop. Unused if K == 1.
+        frontier (np.ndarray): Packed frontier bits fixed for this hop, i.e., a copy of reached.bits
+                               taken before the hop. Unused in hop 0.
+        writer (PartitionWriter): Sink for the partition edge files.
+    """
+
+    number_partition = writer.number_partition
+
+    if hop == 0:
+        for src, dst in chunks:
+            partition_ids = partition[dst]
+            writer.write_block(src, dst, partition_ids)
+            if K > 1:
+                reached.add_block(src, partition_ids)
+        return
+
+    for src, dst in chunks:
+        rows = frontier[dst]
+        hit = np.flatnonzero(rows.any(axis=1))
+        if len(hit) == 0:
+            continue
+        src, dst, rows = src[hit], dst[hit], rows[hit]
+
+        mask = np.unpackbits(rows, axis=1, count=number_partition, bitorder='little').view(bool)
+        for p in range(number_partition):
+            idx = np.flatnonzero(mask[:, p])
+            writer.write_partition(p, src[idx], dst[idx])
+
+        if hop < K - 1:
+            reached.add_rows(src, rows)
+
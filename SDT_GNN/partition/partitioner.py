@@ -6,17 +6,72 @@ import pickle
 import os
 import csv
 import gzip
+import heapq
 from collections import Counter
+from SDT_GNN.utils import edge_io
+from SDT_GNN.utils import partition_io
+from SDT_GNN.utils import node_io
+from SDT_GNN.utils import parallel
+from SDT_GNN.partition import halo
+from SDT_GNN.partition import checkpoint
+from SDT_GNN.partition import sharded
+from SDT_GNN.partition.replica import ReplicaMatrix
 import warnings
 warnings.filterwarnings('ignore')
 
 class Partitioner(object):
     """
     Partitioner base class with constructor and private methods.
+
+    A partitioning runs as a sequence of steps (run_step). With a checkpoint_interval,
+    the attributes listed in CHECKPOINT_STATE are checkpointed after every step and
+    every checkpoint_interval edges of a streaming step (checkpointed_chunks), and
+    run(resume=True) continues from the last checkpoint.
+
+    Partitioners with INCREMENTAL set also keep the state of a finished run, so that
+    update(new_edges) assigns new edges on top of it instead of repartitioning.
+
+    Args:
+        chunk_size (int): Number of edges streamed per block.
+        output_format (str): Format of the partition edge files, 'txt' or 'bin'. Default is 'txt'.
+        num_workers (int): Number of processes partitioning the features. Default is 1.
+        feature_chunk_size (int): Number of nodes whose features are gathered per block.
+        checkpoint_interval (int): Number of edges streamed between checkpoints of the partitioning state. Default is None, no checkpoints.
+        partition_workers (int): Number of processes assigning the edges in parallel shards, for the partitioners that support it. Default is 1, sequential.
+        sync_interval (int): Number of edges a parallel worker assigns between synchronizations of the partition loads.
     """
+
+    CHECKPOINT_STATE = ['v2p', 'halo_edges', 'halo_reached', 'halo_frontier', 'halo_written']
+    INCREMENTAL = False
     
-    def __init__(self):
-        pass
+    def __init__(self,
+                 chunk_size: int = edge_io.DEFAULT_CHUNK_SIZE,
+                 output_format: str = 'txt',
+                 num_workers: int = 1,
+                 feature_chunk_size: int = partition_io.DEFAULT_GATHER_SIZE,
+                 checkpoint_interval: int = None,
+                 partition_workers: int = 1,
+                 sync_interval: int = sharded.DEFAULT_SYNC_INTERVAL):
+        self.chunk_size = chunk_size
+        self.output_format = output_format
+        self.num_workers = num_workers
+        self.feature_chunk_size = feature_chunk_size
+        self.checkpoint_interval = checkpoint_interval
+        self.partition_workers = partition_workers
+        self.sync_interval = sync_interval
+        self.halo_edges = []
+        self.halo_reached = None
+        self.halo_frontier = None
+        self.halo_written = None
+        self.stats = None
+        self.restored = None
+        self.step_index = 0
+        self.resume_step = 0
+        self.resume_offset = 0
+        self.stream_start = 0
+        self.keep_edges = False
+        self.spill_size = partition_io.DEFAULT_SPILL_SIZE
+        self.features_with_graphs = False
 
 
     def _set_seed(self):
@@ -26,33 +81,254 @@ class Partitioner(object):
         np.random.seed(self.seed)
     
     
-    def get_degree(self):
-        """Compute node degree."""
+    def edge_stream(self):
+        """Stream the edges of the graph from the binary edge list, converting 'edge_list.csv' on first use."""
 
-        self.file = open(self.path + self.dataset + '/edge_list.csv', 'r')
-        reader = csv.reader(self.file, delimiter=',')
+        bin_file = edge_io.ensure_binary_edge_list(self.path, self.dataset)
         
-        for number_edges, line in enumerate(reader):
-            i, j = int(line[0]), int(line[1])
-            self.node_degree[int(j)] += 1
+        return edge_io.EdgeStream(bin_file, self.chunk_size)
 
-        self.number_edges = number_edges + 1
-        self.number_nodes = max(self.node_degree) + 1
+
+    def get_degree(self):
+        """Compute node degree as a dense array indexed by node ID, reusing the on-disk degree cache."""
+
+        self.node_degree, self.number_nodes, self.number_edges = edge_io.load_degree(self.path, 
+                                                                                    self.dataset, 
+                                                                                    self.chunk_size)
         print('Number of nodes: ', self.number_nodes)
         print('Number of edges: ', self.number_edges)
 
     
+    def open_writer(self):
+        """Open the partition edge files, tracking the node set of every partition and keeping the edges if keep_edges."""
+
+        if self.restored is not None:
+            # Drop whatever was written after the checkpoint and append from there.
+            partition_io.truncate_partition_files(self.output_path, self.restored['writer']['sizes'], 
+                                                  self.output_format)
+            writer = partition_io.PartitionWriter(self.output_path, self.number_partition, self.output_format,
+                                                  append=True, number_nodes=self.edge_stream().number_nodes,
+                                                  keep_edges=self.keep_edges, spill_size=self.spill_size)
+            writer.restore(self.restored['writer'])
+            return writer
+
+        return partition_io.PartitionWriter(self.output_path, self.number_partition, self.output_format,
+                                            number_nodes=self.edge_stream().number_nodes,
+                                            keep_edges=self.keep_edges, spill_size=self.spill_size)
+
+
+    def begin_checkpointing(self, resume=False):
+        """Start the steps of a run, loading the last checkpoint if resuming."""
+
+        self.step_index = 0
+        self.resume_step = 0
+        self.resume_offset = 0
+        self.restored = None
+
+        if not resume:
+            checkpoint.remove_checkpoint(self.output_path)
+            return
+
+        self.restored = checkpoint.load_checkpoint(self.output_path)
+        if self.restored is None:
+            print('No checkpoint found, partitioning from the start.')
+        else:
+            self.check_state(self.restored)
+
+
+    def check_state(self, state):
+        """Raise if a checkpoint or saved state belongs to a different partitioning."""
+
+        if (state['method'] != type(self).__name__ or 
+            state['number_partition'] != self.number_partition or state['K'] != self.K):
+            raise ValueError('The saved state in \'{}\' belongs to a different partitioning.'.format(self.output_path))
+
+
+    def partitioner_state(self, step=None, offset=None):
+        """State of the run before edge 'offset' of step 'step', as checkpointed."""
+
+        return {'method': type(self).__name__,
+                'number_partition': self.number_partition,
+                'K': self.K,
+                'step': step,
+                'offset': offset,
+                'number_edges': self.edge_stream().number_edges,
+                'random': checkpoint.random_state(),
+                'writer': self.writer.checkpoint(),
+                'state': {name: getattr(self, name, None) for name in self.CHECKPOINT_STATE}}
+
+
+    def save_checkpoint(self, step, offset):
+        """Checkpoint the state of the run before edge 'offset' of step 'step'."""
+
+        if not self.checkpoint_interval:
+            return
+
+        checkpoint.save_checkpoint(self.output_path, self.partitioner_state(step, offset))
+
+
+    def save_state(self):
+        """Save the state of a finished run to 'partitioner_state.pkl' for later updates."""
+
+        checkpoint.save_state(self.output_path, self.partitioner_state())
+
+
+    def run_step(self, func, *args):
+        """
+        Run one step of the partitioning and checkpoint after it.
+
+        When resuming, the checkpointed state is restored at the first step,
+        and the steps finished before the checkpoint are skipped.
+        """
+
+        index = self.step_index
+        self.step_index += 1
+
+        if self.restored is not None:
+            for name, value in self.restored['state'].items():
+                setattr(self, name, value)
+            checkpoint.set_random_state(self.restored['random'])
+            self.resume_step = self.restored['step']
+            self.resume_offset = self.restored['offset']
+            self.restored = None
+            print('Resuming from step {} at edge {}.'.format(self.resume_step, self.resume_offset))
+
+        if index < self.resume_step:
+            return None
+
+        result = func(*args)
+        self.save_checkpoint(index + 1, 0)
+
+        return result
+
+
+    def checkpointed_chunks(self, stream=None):
+        """
+        Stream the edge chunks of the current step, checkpointing every checkpoint_interval edges.
+
+        A step resumed from a checkpoint starts at the checkpointed edge. The attributes
+        the step updates must be in CHECKPOINT_STATE and allocated before the step.
+        """
+
+        stream = stream if stream is not None else self.edge_stream()
+        step = self.step_index - 1
+        offset = max(self.stream_start, self.resume_offset if step == self.resume_step else 0)
+        self.resume_offset = 0
+
+        since_checkpoint = 0
+        for src, dst in stream.chunks(offset):
+            yield src, dst
+            offset += len(src)
+            since_checkpoint += len(src)
+            if self.checkpoint_interval and since_checkpoint >= self.checkpoint_interval:
+                self.save_checkpoint(step, offset)
+                since_checkpoint = 0
+
+
+    def sharded_chunks(self, method, state, **params):
+        """
+        Assign the edges in partition_workers parallel shards (see sharded.assign_sharded),
+        then yield the assigned (src, dst, partition_ids) blocks in stream order.
+
+        Edges the method leaves unassigned are skipped. The step is checkpointed as a whole.
+        """
+
+        stream = self.edge_stream()
+        assignment = sharded.assign_sharded(stream, self.output_path, method, self.number_partition, state,
+                                            num_workers=self.partition_workers,
+                                            sync_interval=self.sync_interval,
+                                            start=self.stream_start,
+                                            **params)
+
+        for src, dst, partition_ids in sharded.assigned_chunks(stream, assignment, self.stream_start):
+            assigned = partition_ids >= 0
+            if not assigned.all():
+                src, dst, partition_ids = src[assigned], dst[assigned], partition_ids[assigned]
+            yield src, dst, partition_ids
+
+        del assignment
+        sharded.remove_assignment(self.output_path)
+
+
+    def save_node_partition(self):
+        """Save the partition of every node to 'partition.npy' and keep self.v2p as the dense array."""
+
+        number_nodes = self.edge_stream().number_nodes
+        self.v2p = partition_io.save_node_partition(self.output_path, self.v2p, 
+                                                    number_nodes, self.number_partition)
+
+
+    def write_halo(self):
+        """Write the K-hop neighborhood of every partition, one checkpointed step per hop."""
+
+        self.run_step(self.begin_halo)
+        for hop in range(self.K):
+            self.run_step(self.write_halo_hop, hop)
+
+
+    def begin_halo(self):
+        """Allocate the frontiers of the halo hops."""
+
+        number_nodes = self.edge_stream().number_nodes
+        self.halo_reached = ReplicaMatrix(number_nodes, self.number_partition) if self.K > 1 else None
+        self.halo_frontier = None
+        self.halo_written = self.writer.edge_counts()
+        self.halo_edges = []
+
+
+    def write_halo_hop(self, hop):
+        """Write the edges of one halo hop (see halo.write_hop) in a checkpointed streaming pass."""
+
+        stream = self.edge_stream()
+        partition = partition_io.node_partition_array(self.v2p, stream.number_nodes)
+        if hop > 0 and self.halo_frontier is None:
+            # The frontier is fixed for the whole pass; sources reached in this hop join the next one.
+            self.halo_frontier = self.halo_reached.bits.copy()
+
+        halo.write_hop(self.checkpointed_chunks(stream), partition, hop, self.K, 
+                       self.halo_reached, self.halo_frontier, self.writer)
+
+        total = self.writer.edge_counts()
+        self.halo_edges.append((np.array(total) - self.halo_written).tolist())
+        self.halo_written = total
+        self.halo_frontier = None
+        if hop == self.K - 1:
+            self.halo_reached = None
+
+
+    def write_cut_edges(self):
+        """Write every edge to the partition of its endpoints, cut edges to the partition of the smaller endpoint ID."""
+
+        for src, dst in self.checkpointed_chunks():
+            p_src = self.v2p[src]
+            p_dst = self.v2p[dst]
+            partition_ids = np.where((p_src != p_dst) & (src < dst), p_src, p_dst)
+            self.writer.write_block(src, dst, partition_ids)
+
+
+    def save_partition_stats(self):
+        """Save the statistics gathered by the writer while partitioning to 'partition_stats.json'."""
+
+        stream = self.edge_stream()
+        splits = None
+        if node_io.has_splits(self.path, self.dataset):
+            splits = dict(zip(['train', 'val', 'test'], node_io.load_splits(self.path, self.dataset)))
+
+        self.stats = partition_io.partition_stats(self.writer, self.v2p, stream.number_nodes, stream.number_edges, 
+                                                  splits, self.halo_edges)
+        partition_io.save_partition_stats(self.output_path, self.stats)
+
+
     def partition(self):
         """Partition a graph."""
         pass
 
 
-    def partition_features(self):
-        """Partition the features of a graph."""
+    def save_feature_counts(self):
+        """Save the number of classes and features of the graph to 'num_classes.txt' and 'num_feats.txt'."""
         
         node_feats = np.load(self.path + self.dataset +'/feats.npy', mmap_mode='r')
-        labels = json.load(open(self.path + self.dataset + '/class_map.json'))
-        node_labels = np.array(list(labels.values()), dtype=np.int64)
+        node_labels = node_io.load_labels(self.path, self.dataset)
 
         if self.multilabel:
             n_classes = len(node_labels[0])
@@ -66,65 +342,203 @@ class Partitioner(object):
         
         with open(self.output_path + 'num_feats.txt', 'w') as f:
             f.write(str(n_feats))
+
+
+    def partition_features(self, partitions=None):
+        """Partition the features of a graph, only of the given partitions if not None."""
         
-        for i in range(self.number_partition):
-            edge_list = np.loadtxt(self.output_path + 'partition_' + str(i) + '.txt', dtype=int)
-            node_set = np.unique(edge_list)
-            feat = node_feats[node_set]
-            np.save(self.output_path + 'partition_' + str(i) + '-feats.npy', feat)
-
-            label = node_labels[node_set]
-            np.save(self.output_path + 'partition_' + str(i) + '-labels.npy', label)
+        self.save_feature_counts()
+        parallel.map_partitions(partition_io.save_partition_features, 
+                                self.number_partition, 
+                                self.num_workers, 
+                                self.output_path, 
+                                self.path + self.dataset + '/feats.npy', 
+                                node_io.labels_path(self.path, self.dataset), 
+                                self.feature_chunk_size, 
+                                partitions=partitions)
         
         
     def partition_statistics(self):
-        """Get the partitioning statistics."""
+        """Print the partitioning statistics saved in 'partition_stats.json'."""
         
-        # n_nodes_partitions = Counter(self.v2p.values())
-        # print('number of nodes of each partition: ', n_nodes_partitions)
-
-        role = json.load(open(self.path + self.dataset + '/role.json'))
-        self.train_ids = role['tr']
+        stats = self.stats if self.stats is not None else partition_io.load_partition_stats(self.output_path)
+        if stats is None or 'replication_factor' not in stats:
+            # Outputs of older versions: count the nodes of each partition from its edges.
+            n_nodes_list = [len(np.unique(partition_io.load_partition_edges(self.output_path, k)))
+                            for k in range(self.number_partition)]
+            print('Replication Factor: ', sum(n_nodes_list)/self.edge_stream().number_nodes)
+            return
         
-        # print('number of training node: ', len(self.train_ids))
-        with open(self.output_path + 'partition' + '.json', 'rb') as fp:
-            node_partition_dict = pickle.load(fp)
-        
-        n_nodes_list = []
-        for k in range(self.number_partition):
-            
-            # train_node_p = [j for j in self.train_ids if node_partition_dict[j]==k]
-            # val_node_p = [j for j in val_ids if node_partition_dict[j]==k]
-            # test_node_p = [j for j in test_ids if node_partition_dict[j]==k]
-            
-            with open(self.output_path + 'partition_' + str(k) + '.txt', 'r') as file:
-                n_edges = 0
-                node_set = set()
-                for line in file:
-                    n_edges += 1
-                    i, j = line.strip().split(' ')
-                    node_set.add(int(i))
-                    node_set.add(int(j))
-
-            n_nodes = len(node_set)
-            # print('Partition ', k)
-            # print('number of nodes: ', n_nodes)
-            # print('number of edges: ', n_edges)
-            # print('number of training nodes: ', len(set(self.train_ids) & node_set))
-            # print('number of training nodes: ', len(set(train_node_p) & node_set))
-            # print('='*30)
-            n_nodes_list.append(n_nodes)
-            
-        rf = sum(n_nodes_list)/self.number_nodes
-        print('Replication Factor: ', rf)
+        print('Replication Factor: ', stats['replication_factor'])
+        print('Edge Imbalance: ', stats['edge_imbalance'])
+        if sum(stats.get('halo_total_edges', [])) > 0:
+            print('Halo Edges: ', stats['halo_total_edges'])
+            print('Edge Imbalance with Halo: ', stats['total_edge_imbalance'])
 
     
-    def run(self):
-        """Run the partitioning algorithm."""
+    def resize_nodes(self, number_nodes):
+        """Grow the node arrays of the restored state to number_nodes nodes."""
+
+        if len(self.v2p) < number_nodes:
+            self.v2p = np.concatenate([self.v2p, np.zeros(number_nodes - len(self.v2p), dtype=self.v2p.dtype)])
+
+
+    def check_update(self):
+        """Raise if update is not supported by the method or K, before anything is appended."""
+
+        if not self.INCREMENTAL:
+            raise NotImplementedError('No Support for \'{}\' Yet. Please Try Different Methods.'.format(type(self).__name__ + '.update'))
+        if self.K > 1:
+            # The halo of K > 1 hops around the new edges can reach any partition.
+            raise NotImplementedError('No Support for \'K={}\' Yet. Please Try K=0 or K=1.'.format(self.K))
+
+
+    def update_halo(self, moved):
+        """
+        Write the first halo hop of an update to the partition of every destination.
+
+        The hop covers the new edges, and the earlier edges of the nodes in 'moved', whose
+        partition changed in the update, so that every node's partition keeps all its edges.
+        """
+
+        stream = self.edge_stream()
+        partition = partition_io.node_partition_array(self.v2p, stream.number_nodes)
+        written = self.writer.edge_counts()
+
+        halo.write_hop(stream.chunks(self.stream_start), partition, 0, 1, None, None, self.writer)
+        if len(moved) > 0:
+            is_moved = np.zeros(stream.number_nodes, dtype=bool)
+            is_moved[moved] = True
+            chunks = ((src[is_moved[dst]], dst[is_moved[dst]]) for src, dst in stream.chunks(0, self.stream_start))
+            halo.write_hop(chunks, partition, 0, 1, None, None, self.writer)
+
+        total = self.writer.edge_counts()
+        self.halo_edges[0] = (np.array(self.halo_edges[0]) + np.array(total) - written).tolist()
+        self.halo_written = total
+
+
+    def update_partition(self):
+        """Assign the edges from stream_start on and write them, by the streaming pass of the method."""
+
+        self.assign_edges()
+
+
+    def place_new_nodes(self, community):
+        """
+        Place the nodes that are in no partition yet by their clusters.
+
+        A node joins the partition of the placed nodes of its cluster. Clusters without
+        placed nodes go, largest first, to the partition with the fewest nodes.
+        """
+
+        placed = self.writer.node_bits.any(axis=1)
+        placed = np.concatenate([placed, np.zeros(len(community) - len(placed), dtype=bool)])
+        nodes = np.flatnonzero(~placed & (community != 0))
+        if len(nodes) == 0:
+            return
+
+        old = np.flatnonzero(placed & (community != 0))
+        c2p = np.full(int(community.max()) + 1, -1, dtype=np.int64)
+        c2p[community[old]] = self.v2p[old]
+        partition_ids = c2p[community[nodes]]
+        known = partition_ids >= 0
+        self.v2p[nodes[known]] = partition_ids[known]
+
+        rest = nodes[~known]
+        clusters, inverse, sizes = np.unique(community[rest], return_inverse=True, return_counts=True)
+        p_size = list(zip(np.bincount(self.v2p[np.flatnonzero(placed)], minlength=self.number_partition).tolist(), 
+                          range(self.number_partition)))
+        heapq.heapify(p_size)
+        cluster_partition = np.zeros(len(clusters), dtype=np.int64)
+        for c in np.argsort(-sizes, kind='stable').tolist():
+            size, p = heapq.heappop(p_size)
+            cluster_partition[c] = p
+            heapq.heappush(p_size, (size + int(sizes[c]), p))
+        self.v2p[rest] = cluster_partition[inverse]
+
+
+    def update(self, new_edges):
+        """
+        Assign new edges on top of the state of the last run or update.
+
+        The edges are appended to the dataset's edge lists, and only they are assigned
+        and appended to the partition outputs, so the cost is proportional to the new
+        edges. With K = 1, the new edges are also written to the partition of their
+        destination, and so are the earlier edges of the nodes that moved to another
+        partition. The partitions that received edges or lost nodes are added to
+        'stale_partitions.json' for their features and DGL graphs to be rebuilt.
+
+        Args:
+            new_edges (np.ndarray): (n, 2) array of new src/dst edges.
+
+        Returns:
+            list: Stale partitions, i.e., those that received new edges in this or an earlier update
+                  and were not rebuilt yet.
+        """
+
+        self.check_update()
+
+        state = checkpoint.load_state(self.output_path)
+        if state is None:
+            raise ValueError('No partitioner state in \'{}\'. Please run the partitioning first.'.format(self.output_path))
+        self.check_state(state)
+
+        stream = self.edge_stream()
+        if state['number_edges'] != stream.number_edges:
+            raise ValueError('The partitioner state in \'{}\' does not match the edge list.'.format(self.output_path))
+
+        edge_io.append_edges(self.path, self.dataset, new_edges, self.chunk_size)
+        stream = self.edge_stream()
+        self.number_nodes = stream.number_nodes
+
+        self.restored = state
+        self.writer = self.open_writer()
+        self.restored = None
+        for name, value in state['state'].items():
+            setattr(self, name, value)
+        checkpoint.set_random_state(state['random'])
+        old_v2p = self.v2p.copy()
+        self.resize_nodes(stream.number_nodes)
+
+        before = self.writer.edge_counts()
+        self.stream_start = state['number_edges']
+        try:
+            self.update_partition()
+            moved = np.flatnonzero(old_v2p != self.v2p[:len(old_v2p)])
+            if self.K == 1:
+                self.update_halo(moved)
+        finally:
+            self.stream_start = 0
+        stale = [p for p, (old, new) in enumerate(zip(before, self.writer.edge_counts())) if new != old]
+        # A node that moved changes the masks of the partition it left, if it is in its node set.
+        left = old_v2p[moved].astype(np.int64)
+        in_left = (self.writer.node_bits[moved, left >> 3] >> (left & 7)) & 1
+        stale = partition_io.mark_stale_partitions(self.output_path, stale + left[in_left == 1].tolist())
+
+        self.save_node_partition()
+        self.writer.close()
+        self.save_partition_stats()
+        self.save_state()
+        checkpoint.remove_checkpoint(self.output_path)
+
+        return stale
+
+
+    def run(self, resume=False):
+        """Run the partitioning algorithm, continuing from the last checkpoint if resume is True."""
+        self.begin_checkpointing(resume)
         self.partition()
+        self.save_partition_stats()
+        if self.INCREMENTAL:
+            self.save_state()
+        checkpoint.remove_checkpoint(self.output_path)
         
         if self.partition_features_file:
-            self.partition_features()
+            if self.features_with_graphs:
+                # The features are gathered from the dataset together with the graphs.
+                self.save_feature_counts()
+            else:
+                self.partition_features()
             
         if self.print_partition_statistics:
             self.partition_statistics()
\ No newline at end of file
@@ -0,0 +1,76 @@
+import numpy as np
+
+
+class ReplicaMatrix(object):
+    """
+    Vertex-partition replica matrix shared by the vertex-cut partitioners.
+
+    Bit p of row v is set when node v has a replica in partition p. Rows are stored
+    as packed bits, i.e., ceil(number_partition / 8) bytes per node, and can be
+    unpacked to boolean vectors for scoring all partitions at once.
+
+    Args:
+        number_nodes (int): Number of nodes.
+        number_partition (int): Number of partitions.
+        bits (np.ndarray): Packed rows to wrap, e.g., in shared memory. Allocated if None.
+    """
+
+    def __init__(self,
+                 number_nodes: int = 0,
+                 number_partition: int = 4,
+                 bits: np.ndarray = None):
+
+        self.number_nodes = number_nodes
+        self.number_partition = number_partition
+        self.n_bytes = (number_partition + 7) // 8
+        if bits is None:
+            bits = np.zeros((number_nodes, self.n_bytes), dtype=np.uint8)
+        self.bits = bits
+
+
+    def add(self, v, p):
+        """Mark node v as replicated in partition p."""
+
+        self.bits[v, p >> 3] |= np.uint8(1 << (p & 7))
+
+
+    def add_edge(self, i, j, p):
+        """Mark both endpoints of an edge assigned to partition p."""
+
+        self.add(i, p)
+        self.add(j, p)
+
+
+    def add_block(self, nodes, partition_ids):
+        """Mark a block of (node, partition) pairs."""
+
+        np.bitwise_or.at(self.bits, (nodes, partition_ids >> 3),
+                         np.left_shift(1, partition_ids & 7).astype(np.uint8))
+
+
+    def add_rows(self, nodes, bits):
+        """OR a block of packed rows into the rows of nodes."""
+
+        np.bitwise_or.at(self.bits, nodes, bits)
+
+
+    def has(self, v, p):
+        """Whether node v has a replica in partition p."""
+
+        return bool((self.bits[v, p >> 3] >> (p & 7)) & 1)
+
+
+    def row(self, v):
+        """Boolean vector over all partitions for node v."""
+
+        return np.unpackbits(self.bits[v], count=self.number_partition, bitorder='little').view(bool)
+
+
+    def resize(self, number_nodes):
+        """Grow the matrix to hold number_nodes nodes."""
+
+        if number_nodes > self.number_nodes:
+            bits = np.zeros((number_nodes, self.n_bytes), dtype=np.uint8)
+            bits[:self.number_nodes] = self.bits
+            self.bits = bits
+            self.number_nodes = number_nodes
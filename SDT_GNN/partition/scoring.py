@@ -0,0 +1,182 @@
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+"""
+Scoring kernel of the HDRF and Greedy vertex-cut partitioners.
+
+Both methods score every partition p for an edge (i, j) as
+    C(p) = C_rep(p) + Lambda * (maxsize - load[p]) / (epsilon + maxsize - minsize)
+and assign the edge to the first partition with the highest score.
+C_rep(p) adds g_i if i is already replicated in p and g_j if j is. Greedy uses
+g_i = g_j = 1, HDRF uses g_i = 1 + (1 - d_i / (d_i + d_j)) with the partial degrees.
+
+When numba is installed a whole chunk of edges is scored in compiled code,
+otherwise every edge is scored across all partitions with one NumPy expression.
+"""
+
+
+class EdgeLoad(object):
+    """
+    Edge load of every partition with incrementally maintained min and max.
+
+    state holds [min_load, max_load, number of partitions at min_load].
+
+    Args:
+        number_partition (int): Number of partitions.
+    """
+
+    def __init__(self, number_partition):
+        self.number_partition = number_partition
+        self.load = np.zeros(number_partition, dtype=np.int64)
+        self.state = np.array([0, 0, number_partition], dtype=np.int64)
+
+
+    @property
+    def min_load(self):
+        return int(self.state[0])
+
+
+    @property
+    def max_load(self):
+        return int(self.state[1])
+
+
+    def add(self, p):
+        """Assign one more edge to partition p."""
+
+        _add_load(self.load, self.state, p)
+
+
+    def set_loads(self, load):
+        """Replace the load of every partition, recomputing the min and max."""
+
+        self.load[:] = load
+        min_load = int(self.load.min())
+        self.state[:] = [min_load, int(self.load.max()), int(np.count_nonzero(self.load == min_load))]
+
+
+    def __getitem__(self, p):
+        return self.load[p]
+
+
+    def __len__(self):
+        return self.number_partition
+
+
+def _add_load(load, state, p):
+    load[p] += 1
+    if load[p] > state[1]:
+        state[1] = load[p]
+    if load[p] - 1 == state[0]:
+        state[2] -= 1
+        if state[2] == 0:
+            # Every partition has left the old minimum; the new one is one higher.
+            state[0] += 1
+            count = 0
+            for q in range(len(load)):
+                if load[q] == state[0]:
+                    count += 1
+            state[2] = count
+
+
+def _assign_chunk_kernel(src, dst, degree, bits, load, state, number_partition,
+                         Lambda, epsilon, hdrf, out):
+    for k in range(len(src)):
+        i = src[k]
+        j = dst[k]
+
+        g_i = 1.0
+        g_j = 1.0
+        if hdrf:
+            degree[i] += 1
+            degree[j] += 1
+            d_i = degree[i]
+            d_j = degree[j]
+            g_i = 1 + (1 - d_i/(d_i + d_j))
+            g_j = 1 + (1 - d_j/(d_i + d_j))
+
+        minsize = state[0]
+        maxsize = state[1]
+
+        best_score = -1.0
+        best_p = 0
+        for p in range(number_partition):
+            score = 0.0
+            if (bits[i, p >> 3] >> (p & 7)) & 1:
+                score += g_i
+            if (bits[j, p >> 3] >> (p & 7)) & 1:
+                score += g_j
+            score += Lambda * (maxsize - load[p])/(epsilon + maxsize - minsize)
+            if score > best_score:
+                best_score = score
+                best_p = p
+
+        bits[i, best_p >> 3] |= np.uint8(1 << (best_p & 7))
+        bits[j, best_p >> 3] |= np.uint8(1 << (best_p & 7))
+        _add_load(load, state, best_p)
+        out[k] = best_p
+
+
+if numba is not None:
+    _add_load = numba.njit(cache=True)(_add_load)
+    _assign_chunk_kernel = numba.njit(cache=True)(_assign_chunk_kernel)
+
+
+def _assign_chunk_numpy(src, dst, degree, replicas, edge_load, Lambda, epsilon, hdrf, out):
+    for k, (i, j) in enumerate(zip(src.tolist(), dst.tolist())):
+        g_i = 1.0
+        g_j = 1.0
+        if hdrf:
+            degree[i] += 1
+            degree[j] += 1
+            d_i = int(degree[i])
+            d_j = int(degree[j])
+            g_i = 1 + (1 - d_i/(d_i + d_j))
+            g_j = 1 + (1 - d_j/(d_i + d_j))
+
+        minsize = edge_load.min_load
+        maxsize = edge_load.max_load
+
+        C_rep = replicas.row(i) * g_i + replicas.row(j) * g_j
+        C_bal = Lambda * (maxsize - edge_load.load)/(epsilon + maxsize - minsize)
+        partition_id = int(np.argmax(C_rep + C_bal))
+
+        replicas.add_edge(i, j, partition_id)
+        edge_load.add(partition_id)
+        out[k] = partition_id
+
+
+def assign_chunk(src, dst, replicas, edge_load, Lambda=1.0, epsilon=1, degree=None):
+    """
+    Assign a chunk of edges to partitions, updating the replicas and edge loads in place.
+
+    Args:
+        src (np.ndarray): Source node of each edge.
+        dst (np.ndarray): Destination node of each edge.
+        replicas (ReplicaMatrix): Vertex-partition replica matrix.
+        edge_load (EdgeLoad): Edge load of every partition.
+        Lambda (float): Weight of the balance term.
+        epsilon (float): Smoothing constant of the balance term.
+        degree (np.ndarray): Partial degrees, counted while streaming, for HDRF scoring.
+                             Greedy scoring if None.
+
+    Returns:
+        np.ndarray: Partition of each edge.
+    """
+
+    hdrf = degree is not None
+    out = np.empty(len(src), dtype=np.int64)
+
+    if numba is not None:
+        if degree is None:
+            degree = np.empty(0, dtype=np.int64)
+        _assign_chunk_kernel(src, dst, degree, replicas.bits, edge_load.load, edge_load.state,
+                             replicas.number_partition, float(Lambda), float(epsilon), hdrf, out)
+    else:
+        _assign_chunk_numpy(src, dst, degree, replicas, edge_load, Lambda, epsilon, hdrf, out)
+
+    return out
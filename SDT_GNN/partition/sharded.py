@@ -0,0 +1,303 @@
+import os
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from SDT_GNN.utils import edge_io
+from SDT_GNN.utils import hashing
+from SDT_GNN.partition import scoring
+from SDT_GNN.partition.replica import ReplicaMatrix
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+"""
+Parallel sharded edge assignment of the streaming partitioners.
+
+The edge list is split into one contiguous shard per worker process. The state the
+workers score against (replica bits, partition loads, degrees, communities) lives in
+shared memory. Every worker keeps a private copy of the partition loads and, in the
+style of HoVerCut, synchronizes it with the shared loads under a lock every
+sync_interval edges: its new load is added to the shared loads and the loads of the
+other workers are read back. Between synchronizations a worker does not see the edges
+the others assign, so the load imbalance grows with num_workers * sync_interval.
+Replica bits and partial degrees are read and updated in shared memory without
+locking; a concurrent update can rarely drop a replica bit or a degree increment,
+which only affects later scores and never the written partitions. The lost quality is
+measured by the replication factor in 'partition_stats.json'.
+
+The partition of every edge is written to a memory-mapped 'edge_assignment.npy' in the
+output path, -1 for edges the method leaves to another pass, and the partitioner
+writes the partitions from it in stream order.
+"""
+
+DEFAULT_SYNC_INTERVAL = 1 << 16
+ASSIGNMENT_FILE = 'edge_assignment.npy'
+METHODS = ['Greedy', 'HDRF', 'DBH', '2PSL-linear', '2PSL-hdrf']
+NO_MIN_LOAD = np.iinfo(np.int64).max
+
+_shared = {}
+_blocks = []
+_lock = None
+_config = None
+
+
+def _twopsl_linear_kernel(src, dst, communities, com2part, degree, bits, load,
+                          max_partition_load, number_partition, out):
+    for k in range(len(src)):
+        i = src[k]
+        j = dst[k]
+        com_i = communities[i]
+        com_j = communities[j]
+        if com_i == com_j or com2part[com_i] == com2part[com_j]:
+            out[k] = -1
+            continue
+
+        if degree[i] > degree[j]:
+            max_p = i % number_partition
+        else:
+            max_p = j % number_partition
+        if load[max_p] >= max_partition_load:
+            max_p = 0
+            for p in range(1, number_partition):
+                if load[p] < load[max_p]:
+                    max_p = p
+
+        bits[i, max_p >> 3] |= np.uint8(1 << (max_p & 7))
+        bits[j, max_p >> 3] |= np.uint8(1 << (max_p & 7))
+        load[max_p] += 1
+        out[k] = max_p
+
+
+def _twopsl_hdrf_kernel(src, dst, communities, com2part, degree, bits, load,
+                        max_partition_load, number_partition, Lambda, epsilon, min_load, out):
+    max_load = 0
+    for p in range(number_partition):
+        if load[p] > max_load:
+            max_load = load[p]
+
+    for k in range(len(src)):
+        i = src[k]
+        j = dst[k]
+        com_i = communities[i]
+        com_j = communities[j]
+        if com_i == com_j or com2part[com_i] == com2part[com_j]:
+            out[k] = -1
+            continue
+
+        degree_i = degree[i]
+        degree_j = degree[j]
+        max_score = 0.0
+        max_p = 0
+        for p in range(number_partition):
+            if load[p] >= max_partition_load:
+                continue
+
+            gu = 0.0
+            gv = 0.0
+            if (bits[i, p >> 3] >> (p & 7)) & 1:
+                gu = 1 + (1 - degree_i/(degree_i + degree_j))
+            if (bits[j, p >> 3] >> (p & 7)) & 1:
+                gv = 1 + (1 - degree_j/(degree_i + degree_j))
+
+            bal = float(max_load - load[p])
+            if min_load != NO_MIN_LOAD:
+                bal /= epsilon + max_load - min_load
+            score_p = gu + gv + Lambda*bal
+            if score_p < 0:
+                raise ValueError('Negative 2PSL partition score.')
+            if score_p > max_score:
+                max_score = score_p
+                max_p = p
+
+        bits[i, max_p >> 3] |= np.uint8(1 << (max_p & 7))
+        bits[j, max_p >> 3] |= np.uint8(1 << (max_p & 7))
+        load[max_p] += 1
+        if load[max_p] > max_load:
+            max_load = load[max_p]
+        out[k] = max_p
+
+
+if numba is not None:
+    _twopsl_linear_kernel = numba.njit(cache=True)(_twopsl_linear_kernel)
+    _twopsl_hdrf_kernel = numba.njit(cache=True)(_twopsl_hdrf_kernel)
+
+
+def assignment_file(output_path):
+    """Path of the temporary edge assignment of a parallel run."""
+
+    return os.path.join(output_path, ASSIGNMENT_FILE)
+
+
+def remove_assignment(output_path):
+    """Remove the temporary edge assignment of a parallel run."""
+
+    if os.path.exists(assignment_file(output_path)):
+        os.remove(assignment_file(output_path))
+
+
+def assigned_chunks(stream, assignment, start=0):
+    """Yield (src, dst, partition_ids) blocks of a stream and its edge assignment, in stream order from edge 'start'."""
+
+    for src, dst in stream.chunks(start):
+        yield src, dst, np.asarray(assignment[start:start + len(src)], dtype=np.int64)
+        start += len(src)
+
+
+def _init_worker(specs, lock, config):
+    global _lock, _config
+    for name, (shm_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=shm_name)
+        _blocks.append(block)
+        _shared[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    _lock = lock
+    _config = config
+
+
+def _assign(method, src, dst, replicas, load, config):
+    if method in ('Greedy', 'HDRF'):
+        return scoring.assign_chunk(src, dst, replicas, load,
+                                    Lambda=config['Lambda'],
+                                    epsilon=config['epsilon'],
+                                    degree=_shared['degree'] if method == 'HDRF' else None)
+
+    out = np.empty(len(src), dtype=np.int64)
+    if method == '2PSL-linear':
+        _twopsl_linear_kernel(src, dst, _shared['communities'], _shared['com2part'], _shared['degree'],
+                              replicas.bits, load, config['max_partition_load'], config['number_partition'], out)
+    else:
+        _twopsl_hdrf_kernel(src, dst, _shared['communities'], _shared['com2part'], _shared['degree'],
+                            replicas.bits, load, config['max_partition_load'], config['number_partition'],
+                            float(config['Lambda']), float(config['epsilon']),
+                            int(config.get('min_load', NO_MIN_LOAD)), out)
+    return out
+
+
+def _assign_shard(start, end):
+    config = _config
+    method = config['method']
+    number_partition = config['number_partition']
+    stream = edge_io.EdgeStream(config['bin_file'], min(config['chunk_size'], config['sync_interval']))
+    assignment = np.load(config['assignment_file'], mmap_mode='r+')
+
+    if method == 'DBH':
+        degree = _shared['degree']
+        offset = start
+        for src, dst in stream.chunks(start, end):
+            hashed = np.where(degree[src] < degree[dst], src, dst)
+            assignment[offset:offset + len(src)] = hashing.hash_partition(hashed, number_partition,
+                                                                          config['seed'], config['hash_mode'])
+            offset += len(src)
+        assignment.flush()
+        return end - start
+
+    replicas = ReplicaMatrix(len(_shared['bits']), number_partition, bits=_shared['bits'])
+    if method in ('Greedy', 'HDRF'):
+        load = scoring.EdgeLoad(number_partition)
+    else:
+        load = np.zeros(number_partition, dtype=np.int64)
+    local_load = load.load if method in ('Greedy', 'HDRF') else load
+
+    for begin in range(start, end, config['sync_interval']):
+        stop = min(begin + config['sync_interval'], end)
+        # Read the loads of the other workers, then assign a window of edges privately.
+        with _lock:
+            if method in ('Greedy', 'HDRF'):
+                load.set_loads(_shared['load'])
+            else:
+                load[:] = _shared['load']
+        base = local_load.copy()
+
+        offset = begin
+        for src, dst in stream.chunks(begin, stop):
+            assignment[offset:offset + len(src)] = _assign(method, src, dst, replicas, load, config)
+            offset += len(src)
+
+        with _lock:
+            _shared['load'] += local_load - base
+
+    assignment.flush()
+    return end - start
+
+
+def shard_bounds(number_edges, num_shards, start=0):
+    """Start and end edge of every shard of the edges from 'start' on, split into num_shards contiguous shards."""
+
+    bounds = np.linspace(start, number_edges, num_shards + 1).astype(np.int64).tolist()
+    return bounds[:-1], bounds[1:]
+
+
+def assign_sharded(stream, output_path, method, number_partition, state,
+                   num_workers=2,
+                   sync_interval=DEFAULT_SYNC_INTERVAL,
+                   start=0,
+                   **params):
+    """
+    Assign the edges of a stream to partitions in num_workers parallel shards.
+
+    Args:
+        stream (EdgeStream): Edge stream of the graph.
+        output_path (str): Output path holding the temporary edge assignment.
+        method (str): 'Greedy', 'HDRF', 'DBH', '2PSL-linear' or '2PSL-hdrf'.
+        number_partition (int): Number of partitions.
+        state (dict): Arrays the workers share, by name: 'bits' (packed replica rows), 'load'
+                      (edge load of every partition), 'degree', and for 2PSL 'communities' and
+                      'com2part'. Updated in place with the final shared state.
+        num_workers (int): Number of worker processes, one shard each.
+        sync_interval (int): Number of edges a worker assigns between synchronizations of the loads.
+        start (int): First edge to assign; the edges before it are left unassigned.
+        params: Scoring parameters of the method (Lambda, epsilon, seed, hash_mode,
+                max_partition_load, min_load, NO_MIN_LOAD while no minimum load is known).
+
+    Returns:
+        np.ndarray: Memory-mapped partition of every edge, -1 for edges left unassigned.
+    """
+
+    if method not in METHODS:
+        raise NotImplementedError('No Support for \'{}\' Yet. Please Try Different Methods.'.format(method))
+
+    assignment = np.lib.format.open_memmap(assignment_file(output_path), mode='w+',
+                                           dtype=np.int16 if number_partition <= np.iinfo(np.int16).max else np.int32,
+                                           shape=(stream.number_edges,))
+    assignment.flush()
+
+    config = dict(params,
+                  method=method,
+                  number_partition=number_partition,
+                  bin_file=stream.bin_file,
+                  chunk_size=stream.chunk_size,
+                  sync_interval=max(1, int(sync_interval)),
+                  assignment_file=assignment_file(output_path))
+
+    blocks = []
+    specs = {}
+    shared = {}
+    try:
+        for name, array in state.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+            blocks.append(block)
+            shared[name] = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+            shared[name][...] = array
+            specs[name] = (block.name, array.shape, array.dtype.str)
+
+        context = multiprocessing.get_context('spawn')
+        starts, ends = shard_bounds(stream.number_edges, num_workers, start)
+        with ProcessPoolExecutor(max_workers=num_workers,
+                                 mp_context=context,
+                                 initializer=_init_worker,
+                                 initargs=(specs, context.Lock(), config)) as executor:
+            list(executor.map(_assign_shard, starts, ends))
+
+        for name in state:
+            state[name][...] = shared[name]
+
+    finally:
+        shared.clear()
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    return np.load(assignment_file(output_path), mmap_mode='r')
@@ -0,0 +1,268 @@
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+"""
+Volume-bounded streaming clustering shared by SPRING, Clustering and 2PSL.
+
+Every node starts in its own cluster when it is first streamed, with the node's degree
+as the cluster volume. For an edge (i, j) whose two clusters both have a volume of at
+most max_vol, one endpoint moves to the other endpoint's cluster:
+    'volume' rule (SPRING, Clustering): the endpoint in the cluster of smaller or equal volume moves.
+    'real_volume' rule (2PSL): the endpoint whose cluster has the smaller volume without the
+        endpoint itself moves, if the target cluster stays within max_vol and, when quality
+        scores are used, the target cluster scores at most as high.
+
+Node clusters and cluster volumes are dense arrays; cluster IDs start at 1 and 0 marks a node
+that was not streamed yet. When numba is installed each chunk of edges is clustered in
+compiled code, otherwise the same loop runs over Python lists for a whole pass. Passes
+can also run over given chunks, e.g., checkpointed ones, in which case the state arrays
+are up to date after every chunk; the Python loop then copies back only the entries of
+the nodes and clusters the chunk touched.
+"""
+
+CLUSTERING_RULES = ['volume', 'real_volume']
+
+
+def _cluster_chunk(src, dst, degree, community, volume, seen_nodes, state,
+                   max_vol, real_volume, quality, use_quality):
+    next_id = state[0]
+    for k in range(len(src)):
+        i = src[k]
+        j = dst[k]
+
+        if community[i] == 0:
+            community[i] = next_id
+            volume[next_id] += degree[i]
+            seen_nodes[next_id - 1] = i
+            next_id += 1
+        if community[j] == 0:
+            community[j] = next_id
+            volume[next_id] += degree[j]
+            seen_nodes[next_id - 1] = j
+            next_id += 1
+
+        c_i = community[i]
+        c_j = community[j]
+        if volume[c_i] > max_vol or volume[c_j] > max_vol:
+            continue
+
+        if not real_volume:
+            if volume[c_i] <= volume[c_j]:
+                volume[c_j] += degree[i]
+                volume[c_i] -= degree[i]
+                community[i] = c_j
+            else:
+                volume[c_i] += degree[j]
+                volume[c_j] -= degree[j]
+                community[j] = c_i
+
+        else:
+            real_vol_i = volume[c_i] - degree[i]
+            real_vol_j = volume[c_j] - degree[j]
+            if (real_vol_i <= real_vol_j and (not use_quality or quality[c_i] >= quality[c_j])
+                    and volume[c_j] + degree[i] <= max_vol):
+                volume[c_i] -= degree[i]
+                volume[c_j] += degree[i]
+                community[i] = c_j
+            elif (real_vol_j < real_vol_i and (not use_quality or quality[c_j] >= quality[c_i])
+                    and volume[c_i] + degree[j] <= max_vol):
+                volume[c_j] -= degree[j]
+                volume[c_i] += degree[j]
+                community[j] = c_i
+
+    state[0] = next_id
+
+
+_cluster_chunk_python = _cluster_chunk
+
+if numba is not None:
+    _cluster_chunk = numba.njit(cache=True)(_cluster_chunk)
+
+
+class StreamClustering(object):
+    """
+    Streaming clustering state and passes over an edge stream.
+
+    Args:
+        degree (np.ndarray): Degree of every node.
+        max_vol (float): Maximum volume of a cluster that can still grow.
+        rule (str): 'volume' or 'real_volume', see the module docstring.
+    """
+
+    def __init__(self,
+                 degree: np.ndarray = None,
+                 max_vol: float = 0,
+                 rule: str = 'volume'):
+
+        if rule not in CLUSTERING_RULES:
+            raise NotImplementedError('No Support for \'{}\' Yet. Please Try Different Clustering Rules.'.format(rule))
+
+        self.degree = np.ascontiguousarray(degree, dtype=np.int64)
+        self.number_nodes = len(self.degree)
+        self.max_vol = float(max_vol)
+        self.rule = rule
+
+        self.community = np.zeros(self.number_nodes, dtype=np.int64)
+        self.volume = np.zeros(self.number_nodes + 1, dtype=np.int64)
+        self.quality = np.zeros(self.number_nodes + 1, dtype=np.float64)
+        self.seen_nodes = np.zeros(self.number_nodes, dtype=np.int64)
+        self.state = np.array([1], dtype=np.int64)
+        self.external = None
+
+
+    @property
+    def number_seen(self):
+        """Number of nodes streamed so far."""
+
+        return int(self.state[0]) - 1
+
+
+    def nodes(self):
+        """Streamed nodes, in the order they were first streamed."""
+
+        return self.seen_nodes[:self.number_seen]
+
+
+    def stream(self, stream, use_quality=False, start=0, chunks=None):
+        """
+        Run one clustering pass over an EdgeStream.
+
+        Args:
+            stream (EdgeStream): Edge stream of the graph.
+            use_quality (bool): Only move nodes into clusters of lower or equal quality score.
+            start (int): First edge of the pass, e.g., the first new edge of an update.
+            chunks (iterable): (src, dst) blocks to stream instead of the edges of stream from start.
+                               The state arrays are updated after every block.
+        """
+
+        real_volume = self.rule == 'real_volume'
+        sync = chunks is not None
+        if chunks is None:
+            chunks = stream.chunks(start)
+
+        if numba is not None:
+            for src, dst in chunks:
+                _cluster_chunk(src, dst, self.degree, self.community, self.volume, self.seen_nodes,
+                               self.state, self.max_vol, real_volume, self.quality, use_quality)
+            return
+
+        degree = self.degree.tolist()
+        community = self.community.tolist()
+        volume = self.volume.tolist()
+        quality = self.quality.tolist()
+        seen_nodes = self.seen_nodes.tolist()
+        state = self.state.tolist()
+        for src, dst in chunks:
+            first_id = state[0]
+            _cluster_chunk_python(src.tolist(), dst.tolist(), degree, community, volume, seen_nodes,
+                                  state, self.max_vol, real_volume, quality, use_quality)
+            if sync:
+                self._sync_chunk(src, dst, first_id, community, volume, seen_nodes, state)
+
+        if not sync:
+            self.community[:] = community
+            self.volume[:] = volume
+            self.seen_nodes[:] = seen_nodes
+            self.state[:] = state
+
+
+    def _sync_chunk(self, src, dst, first_id, community, volume, seen_nodes, state):
+        """
+        Copy the entries a chunk changed from the list state of a Python pass back to the arrays.
+
+        A chunk only changes the clusters of its nodes, and the volumes of the clusters
+        those nodes were in before the chunk and of the clusters it created.
+        """
+
+        nodes = np.unique(np.concatenate([src, dst]))
+        clusters = np.union1d(self.community[nodes], np.arange(first_id, state[0], dtype=np.int64))
+
+        self.community[nodes] = [community[v] for v in nodes.tolist()]
+        self.volume[clusters] = [volume[c] for c in clusters.tolist()]
+        self.seen_nodes[first_id - 1:state[0] - 1] = seen_nodes[first_id - 1:state[0] - 1]
+        self.state[:] = state
+
+
+    def update_degree(self, degree):
+        """
+        Grow the state to the nodes of a new degree array, e.g., after edges were appended,
+        and add the degree the streamed nodes gained to the volumes of their clusters.
+        """
+
+        degree = np.ascontiguousarray(degree, dtype=np.int64)
+        number_nodes = len(degree)
+        if number_nodes > self.number_nodes:
+            grow = number_nodes - self.number_nodes
+            self.community = np.concatenate([self.community, np.zeros(grow, dtype=np.int64)])
+            self.volume = np.concatenate([self.volume, np.zeros(grow, dtype=np.int64)])
+            self.quality = np.concatenate([self.quality, np.zeros(grow, dtype=np.float64)])
+            self.seen_nodes = np.concatenate([self.seen_nodes, np.zeros(grow, dtype=np.int64)])
+
+        old = len(self.degree)
+        streamed = np.flatnonzero(self.community[:old] != 0)
+        np.add.at(self.volume, self.community[streamed], degree[streamed] - self.degree[streamed])
+
+        self.degree = degree
+        self.number_nodes = number_nodes
+
+
+    def evaluate(self, stream, number_edges, chunks=None):
+        """
+        Score every cluster by its external degree over min(volume, 2 * number_edges - volume).
+
+        Clusters with a zero denominator keep their previous score. The external degrees
+        counted so far are kept in self.external during the pass, so a pass over given
+        chunks (see stream) can be checkpointed with the object and resumed.
+        """
+
+        if self.external is None:
+            self.external = np.zeros(self.number_nodes + 1, dtype=np.int64)
+        external = self.external
+        for src, dst in (chunks if chunks is not None else stream.chunks()):
+            c_i = self.community[src]
+            c_j = self.community[dst]
+            cut = c_i != c_j
+            clusters = np.concatenate([c_i[cut], c_j[cut]])
+            if 8 * len(clusters) >= len(external):
+                external += np.bincount(clusters, minlength=len(external))
+            else:
+                # A small chunk over many clusters: avoid a full-length bincount per chunk.
+                clusters, counts = np.unique(clusters, return_counts=True)
+                external[clusters] += counts
+        self.external = None
+
+        volume = self.volume[:self.number_nodes]
+        denominator = np.minimum(volume, 2*number_edges - volume)
+        scored = np.flatnonzero(denominator != 0)
+        self.quality[scored] = external[scored] / denominator[scored]
+
+
+    def clusters(self):
+        """
+        Group the streamed nodes by cluster.
+
+        Clusters are listed in the order they first occur when walking the nodes in
+        streaming order.
+
+        Returns:
+            (cluster_ids, sizes, grouped_nodes, offsets): cluster i holds
+            grouped_nodes[offsets[i]:offsets[i + 1]].
+        """
+
+        nodes = self.nodes()
+        clusters = self.community[nodes]
+        cluster_ids, first, inverse, sizes = np.unique(clusters, return_index=True,
+                                                       return_inverse=True, return_counts=True)
+        rank = np.empty(len(cluster_ids), dtype=np.int64)
+        rank[np.argsort(first, kind='stable')] = np.arange(len(cluster_ids))
+
+        order = np.argsort(rank[inverse], kind='stable')
+        by_first = np.argsort(first, kind='stable')
+        offsets = np.zeros(len(cluster_ids) + 1, dtype=np.int64)
+        np.cumsum(sizes[by_first], out=offsets[1:])
+
+        return cluster_ids[by_first], sizes[by_first], nodes[order], offsets
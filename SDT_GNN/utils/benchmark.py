@@ -0,0 +1,172 @@
+import os
+import csv
+import time
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from SDT_GNN.utils import edge_io
+from SDT_GNN.utils import node_io
+from SDT_GNN.utils import partition_io
+from SDT_GNN.data import preprocess
+from SDT_GNN.Partitioning import Partitioning
+from SDT_GNN.version import __version__
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+"""
+Benchmark of the streaming partitioners.
+
+Every (method, number_partition) pair is partitioned in a fresh process, so that the
+peak RSS of a run is not inflated by the runs before it. Only the partitioning itself is
+timed; features and DGL graphs are not materialized. One row per run is appended to a CSV
+file, together with the library version, so results of different versions can be compared.
+Methods with a parallel mode are also run with every number of partition workers, so the
+speedup and the replication factor lost against the sequential run can be read off the CSV.
+"""
+
+METHODS = ['Random', 'DBH', 'Greedy', 'HDRF', '2PSL', 'Clustering', 'SPRING']
+PARALLEL_METHODS = ['DBH', 'Greedy', 'HDRF', '2PSL']
+FIELDS = ['version', 'dataset', 'method', 'number_partition', 'K', 'partition_workers', 'number_nodes', 'number_edges',
+          'seconds', 'edges_per_sec', 'peak_rss_mb', 'replication_factor', 'edge_imbalance', 'output_bytes']
+
+
+def synthetic_dataset(dataset, path, scale, edge_factor, ratio=(0.6, 0.2, 0.2), seed=42):
+    """
+    Generate an R-MAT graph with random train/val/test splits for benchmarking.
+
+    Args:
+        dataset (str): Dataset name.
+        path (str): Dataset root path.
+        scale (int): Log2 of the number of nodes.
+        edge_factor (int): Number of generated edges per node.
+        ratio (tuple): Train/val/test split ratio.
+        seed (int): Random seed.
+    """
+
+    header = preprocess.rmat_edge_list(dataset, scale, edge_factor, path, seed=seed)
+
+    nodes = np.random.default_rng(seed).permutation(header['number_nodes'])
+    n_train = int(ratio[0] * len(nodes))
+    n_val = int(ratio[1] * len(nodes))
+    node_io.save_splits(path, dataset, np.sort(nodes[:n_train]), np.sort(nodes[n_train:n_train + n_val]),
+                        np.sort(nodes[n_train + n_val:]))
+
+    return header
+
+
+def output_bytes(output_path, number_partition):
+    """Total size of the partition edge files and the node partition."""
+
+    files = [output_path + 'partition.npy']
+    for i in range(number_partition):
+        files += [partition_io.partition_edge_file(output_path, i, output_format)
+                  for output_format in partition_io.OUTPUT_FORMATS]
+
+    return sum(os.path.getsize(f) for f in files if os.path.exists(f))
+
+
+def peak_rss_mb():
+    """Peak resident set size of the calling process in MB, None where it is not available."""
+
+    if resource is None:
+        return None
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def benchmark_run(dataset, path, output_path, method, number_partition, K=0, output_format='bin',
+                  chunk_size=edge_io.DEFAULT_CHUNK_SIZE, partition_workers=1):
+    """Partition a dataset once and return its benchmark row."""
+
+    partitioner = Partitioning(dataset=dataset,
+                               number_partition=number_partition,
+                               path=path,
+                               method=method,
+                               output_path=output_path,
+                               partition_features_file=False,
+                               print_partition_statistics=False,
+                               save_dgl_graph=False,
+                               K=K,
+                               chunk_size=chunk_size,
+                               output_format=output_format,
+                               partition_workers=partition_workers)
+
+    start = time.perf_counter()
+    partitioner.sp.partition()
+    seconds = time.perf_counter() - start
+    partitioner.sp.save_partition_stats()
+    stats = partitioner.sp.stats
+
+    return {'version': __version__,
+            'dataset': dataset,
+            'method': method,
+            'number_partition': number_partition,
+            'K': K,
+            'partition_workers': partition_workers,
+            'number_nodes': stats['number_nodes'],
+            'number_edges': stats['number_edges'],
+            'seconds': seconds,
+            'edges_per_sec': stats['number_edges'] / seconds if seconds > 0 else float('inf'),
+            'peak_rss_mb': peak_rss_mb(),
+            'replication_factor': stats.get('replication_factor'),
+            'edge_imbalance': stats['edge_imbalance'],
+            'output_bytes': output_bytes(output_path, number_partition)}
+
+
+def run_benchmark(dataset,
+                  path,
+                  output_path,
+                  csv_file,
+                  methods=METHODS,
+                  partition_counts=(4,),
+                  K=0,
+                  output_format='bin',
+                  chunk_size=edge_io.DEFAULT_CHUNK_SIZE,
+                  worker_counts=(1,)):
+    """
+    Benchmark every method at every number of partitions and append the results to a CSV file.
+
+    Args:
+        dataset (str): Dataset name.
+        path (str): Dataset root path.
+        output_path (str): Root of the partition outputs, one directory per run.
+        csv_file (str): CSV file the result rows are appended to.
+        methods (list): Partitioning methods.
+        partition_counts (list): Numbers of partitions.
+        K (int): Number of hops of neighbor maintained after partitioning. Default is 0.
+        output_format (str): Format of the partition edge files. Default is 'bin'.
+        chunk_size (int): Number of edges streamed per block.
+        worker_counts (list): Numbers of partition workers the methods with a parallel mode are run with.
+
+    Returns:
+        list: The result rows.
+    """
+
+    # Convert the edge list and cache the degrees once, outside the timed runs.
+    edge_io.load_degree(path, dataset, chunk_size)
+
+    rows = []
+    for number_partition in partition_counts:
+        for method in methods:
+            for partition_workers in worker_counts:
+                if partition_workers > 1 and method not in PARALLEL_METHODS:
+                    continue
+
+                run_path = output_path + method + '-' + str(number_partition) + '/'
+                with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+                    row = executor.submit(benchmark_run, dataset, path, run_path, method, number_partition,
+                                          K, output_format, chunk_size, partition_workers).result()
+                print(row)
+                rows.append(row)
+
+                new_file = not os.path.exists(csv_file)
+                with open(csv_file, 'a', newline='') as f:
+                    writer = csv.DictWriter(f, fieldnames=FIELDS)
+                    if new_file:
+                        writer.writeheader()
+                    writer.writerow(row)
+
+    return rows
@@ -0,0 +1,172 @@
+import os
+import json
+import numpy as np
+
+"""
+Memory-mappable partition bundles.
+
+'partition_i.bundle' holds everything needed to train on partition i in one file:
+the structure of the bidirected partition graph in CSR ('indptr', 'indices'), the
+original ID of every node ('global_ids'), its features ('feat'), labels ('label') and
+train/val/test masks. The file starts with a 16-byte header:
+    magic (8 bytes), version (uint32), length of the section table (uint32),
+followed by the section table as JSON (name, dtype, shape and offset of every section),
+and the sections as raw arrays, each aligned to BUNDLE_ALIGNMENT bytes. A bundle is
+memory-mapped copy-on-write as a whole, and every section is a view of the mapping,
+so loading reads no data and all workers share the same page cache.
+"""
+
+BUNDLE_MAGIC = b'SDTBNDL\x00'
+BUNDLE_VERSION = 1
+HEADER_SIZE = 16
+BUNDLE_ALIGNMENT = 64
+
+
+def bundle_file(output_path, i):
+    """Path of the bundle of partition i."""
+
+    return os.path.join(output_path, 'partition_' + str(i) + '.bundle')
+
+
+def _align(offset):
+    return -(-offset // BUNDLE_ALIGNMENT) * BUNDLE_ALIGNMENT
+
+
+def save_bundle(file, sections):
+    """
+    Atomically write named arrays as the aligned sections of a bundle.
+
+    Args:
+        file (str): Bundle file.
+        sections (dict): Arrays by section name, written in order.
+    """
+
+    sections = {name: np.ascontiguousarray(array) for name, array in sections.items()}
+
+    entries = {}
+    offset = 0
+    for name, array in sections.items():
+        entries[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset = _align(offset + array.nbytes)
+    table = json.dumps(entries).encode()
+    data_start = _align(HEADER_SIZE + len(table))
+
+    tmp_file = file + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        f.write(BUNDLE_MAGIC)
+        f.write(np.array([BUNDLE_VERSION, len(table)], dtype=np.uint32).tobytes())
+        f.write(table)
+        for name, array in sections.items():
+            f.write(b'\x00' * (data_start + entries[name]['offset'] - f.tell()))
+            array.tofile(f)
+    os.replace(tmp_file, file)
+
+
+def load_bundle(file, mmap_mode='c'):
+    """
+    Memory-map a bundle and return its sections by name, as views of the mapping.
+
+    The default copy-on-write mapping gives writable arrays, e.g., for torch.from_numpy,
+    whose pages stay shared with the page cache until they are written to.
+    """
+
+    with open(file, 'rb') as f:
+        buf = f.read(HEADER_SIZE)
+        if len(buf) != HEADER_SIZE or buf[:8] != BUNDLE_MAGIC:
+            raise ValueError('\'{}\' is not a partition bundle.'.format(file))
+
+        version, table_size = np.frombuffer(buf, dtype=np.uint32, count=2, offset=8)
+        if version != BUNDLE_VERSION:
+            raise ValueError('Unsupported partition bundle version {}.'.format(version))
+        table = json.loads(f.read(int(table_size)))
+
+    data_start = _align(HEADER_SIZE + int(table_size))
+    data = np.memmap(file, dtype=np.uint8, mode=mmap_mode)
+
+    sections = {}
+    for name, entry in table.items():
+        dtype = np.dtype(entry['dtype'])
+        shape = tuple(entry['shape'])
+        start = data_start + entry['offset']
+        nbytes = dtype.itemsize * int(np.prod(shape, dtype=np.int64))
+        sections[name] = data[start:start + nbytes].view(dtype).reshape(shape)
+
+    return sections
+
+
+def symmetric_csr(edge_list, num_nodes):
+    """
+    CSR structure of the bidirected simple graph of a re-indexed edge list.
+
+    Both directions of every edge are kept once, and the neighbors of every node are sorted.
+
+    Returns:
+        (np.ndarray, np.ndarray): indptr and indices, int64.
+    """
+
+    edge_list = np.asarray(edge_list, dtype=np.int64).reshape(-1, 2)
+    keys = np.concatenate([edge_list[:, 0] * num_nodes + edge_list[:, 1],
+                           edge_list[:, 1] * num_nodes + edge_list[:, 0]])
+    keys = np.unique(keys)
+    src = keys // num_nodes if num_nodes > 0 else keys
+    indices = keys - src * num_nodes
+
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=num_nodes), out=indptr[1:])
+
+    return indptr, indices
+
+
+def index_mask(node_set, node_ids, num_nodes):
+    """Boolean mask over the re-indexed nodes, set for the original IDs in node_ids that are in node_set."""
+
+    mask = np.zeros(num_nodes, dtype=bool)
+    node_ids = np.asarray(node_ids, dtype=np.int64)
+    if len(node_set) == 0 or len(node_ids) == 0:
+        return mask
+
+    index = np.searchsorted(node_set, node_ids)
+    index[index == len(node_set)] = 0
+    index = index[node_set[index] == node_ids]
+    mask[index] = True
+
+    return mask
+
+
+def save_partition_bundle(i,
+                          output_path,
+                          edge_list,
+                          node_set,
+                          feat,
+                          label,
+                          node_partition,
+                          train_ids,
+                          val_ids,
+                          test_ids):
+    """
+    Save partition i as a bundle with its structure, global node IDs, features, labels and train/val/test masks.
+
+    Args:
+        i (int): Partition ID.
+        output_path (str): Output path.
+        edge_list (np.ndarray): Edges of the partition, re-indexed by the rank of each node in node_set.
+        node_set (np.ndarray): Sorted original IDs of the nodes of the partition.
+        feat (np.ndarray): Features of the nodes in node_set.
+        label (np.ndarray): Labels of the nodes in node_set.
+        node_partition (np.ndarray): Partition of every node, indexed by node ID.
+        train_ids, val_ids, test_ids (np.ndarray): Node IDs of the splits of the whole graph.
+    """
+
+    num_nodes = len(node_set)
+    indptr, indices = symmetric_csr(edge_list, num_nodes)
+
+    sections = {'indptr': indptr,
+                'indices': indices,
+                'global_ids': np.asarray(node_set, dtype=np.int64),
+                'feat': np.asarray(feat, dtype=np.float32),
+                'label': np.asarray(label, dtype=np.int64)}
+    for split, node_ids in zip(['train', 'val', 'test'], [train_ids, val_ids, test_ids]):
+        node_ids = node_ids[node_partition[node_ids] == i]
+        sections[split + '_mask'] = index_mask(node_set, node_ids, num_nodes)
+
+    save_bundle(bundle_file(output_path, i), sections)
@@ -0,0 +1,307 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+"""
+Binary edge list used by the streaming partitioners.
+
+'edge_list.bin' holds the same edges as 'edge_list.csv' as a (number_edges, 2) array
+of src/dst columns (int32 when all node IDs fit, int64 otherwise), preceded by a
+32-byte header:
+    magic (8 bytes), version (uint32), itemsize (uint32),
+    number_nodes (uint64), number_edges (uint64).
+The file is written once and then memory-mapped, so partitioners never parse text.
+"""
+
+EDGE_MAGIC = b'SDTEDGE\x00'
+EDGE_VERSION = 1
+HEADER_SIZE = 32
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+def csv_edge_list_path(path, dataset):
+    """Path of the csv edge list of a dataset."""
+
+    return path + dataset + '/edge_list.csv'
+
+
+def binary_edge_list_path(path, dataset):
+    """Path of the binary edge list of a dataset."""
+
+    return path + dataset + '/edge_list.bin'
+
+
+def write_header(f, itemsize, number_nodes, number_edges):
+    """Write the header of a binary edge list at the current position of f."""
+
+    f.write(EDGE_MAGIC)
+    f.write(np.array([EDGE_VERSION, itemsize], dtype=np.uint32).tobytes())
+    f.write(np.array([number_nodes, number_edges], dtype=np.uint64).tobytes())
+
+
+def read_header(bin_file):
+    """Read the header of a binary edge list."""
+
+    with open(bin_file, 'rb') as f:
+        buf = f.read(HEADER_SIZE)
+
+    if len(buf) != HEADER_SIZE or buf[:8] != EDGE_MAGIC:
+        raise ValueError('\'{}\' is not a binary edge list.'.format(bin_file))
+
+    version, itemsize = np.frombuffer(buf, dtype=np.uint32, count=2, offset=8)
+    number_nodes, number_edges = np.frombuffer(buf, dtype=np.uint64, count=2, offset=16)
+    if version != EDGE_VERSION:
+        raise ValueError('Unsupported binary edge list version {}.'.format(version))
+
+    return {'dtype': np.dtype('int' + str(8 * int(itemsize))),
+            'number_nodes': int(number_nodes),
+            'number_edges': int(number_edges)}
+
+
+def convert_edge_list(csv_file, bin_file, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Convert a csv edge list to the binary edge list format.
+
+    Args:
+        csv_file (str): Input csv edge list, one 'src,dst' pair per line.
+        bin_file (str): Output binary edge list.
+        chunk_size (int): Number of csv rows parsed at a time.
+    """
+
+    tmp_file = bin_file + '.tmp'
+    number_edges = 0
+    max_id = -1
+
+    with open(tmp_file, 'wb') as f:
+        write_header(f, 8, 0, 0)
+        try:
+            reader = pd.read_csv(csv_file, header=None, names=['src', 'dst'],
+                                 dtype=np.int64, chunksize=chunk_size)
+            for chunk in reader:
+                edges = np.ascontiguousarray(chunk.values, dtype=np.int64)
+                if len(edges) == 0:
+                    continue
+                f.write(edges.tobytes())
+                number_edges += len(edges)
+                max_id = max(max_id, int(edges.max()))
+        except pd.errors.EmptyDataError:
+            pass
+
+    number_nodes = max_id + 1
+
+    if number_nodes <= np.iinfo(np.int32).max:
+        # Downcast the int64 columns in binary, which is far cheaper than parsing twice.
+        with open(bin_file + '.part', 'wb') as f:
+            write_header(f, 4, number_nodes, number_edges)
+            if number_edges > 0:
+                edges = np.memmap(tmp_file, dtype=np.int64, mode='r',
+                                  offset=HEADER_SIZE, shape=(number_edges, 2))
+                for start in range(0, number_edges, chunk_size):
+                    f.write(edges[start:start + chunk_size].astype(np.int32).tobytes())
+                del edges
+        os.remove(tmp_file)
+        os.replace(bin_file + '.part', bin_file)
+
+    else:
+        with open(tmp_file, 'r+b') as f:
+            write_header(f, 8, number_nodes, number_edges)
+        os.replace(tmp_file, bin_file)
+
+    return read_header(bin_file)
+
+
+def write_edge_list(bin_file, edge_blocks, number_nodes):
+    """
+    Write blocks of edges straight to the binary edge list format.
+
+    Args:
+        bin_file (str): Output binary edge list.
+        edge_blocks (iterable): (n, 2) arrays of edges, written in order.
+        number_nodes (int): Number of nodes; all node IDs must be below it.
+    """
+
+    itemsize = 4 if number_nodes <= np.iinfo(np.int32).max else 8
+    dtype = np.dtype('int' + str(8 * itemsize))
+    number_edges = 0
+
+    with open(bin_file + '.part', 'wb') as f:
+        write_header(f, itemsize, number_nodes, 0)
+        for edges in edge_blocks:
+            f.write(np.ascontiguousarray(edges, dtype=dtype).tobytes())
+            number_edges += len(edges)
+        f.seek(0)
+        write_header(f, itemsize, number_nodes, number_edges)
+    os.replace(bin_file + '.part', bin_file)
+
+    return read_header(bin_file)
+
+
+def append_edges(path, dataset, edges, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Append edges to the csv and binary edge lists of a dataset.
+
+    The csv edge list is appended first, so an interrupted append leaves a binary
+    edge list older than the csv, which is then converted again.
+
+    Args:
+        path (str): Dataset root path.
+        dataset (str): Dataset name.
+        edges (np.ndarray): (n, 2) array of new src/dst edges.
+        chunk_size (int): Number of edges copied at a time when the binary edge list is widened to int64.
+
+    Returns:
+        dict: Header of the grown binary edge list.
+    """
+
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    bin_file = ensure_binary_edge_list(path, dataset, chunk_size)
+    header = read_header(bin_file)
+    if len(edges) == 0:
+        return header
+
+    if edges.min() < 0:
+        raise ValueError('Node IDs must be non-negative.')
+    number_nodes = max(header['number_nodes'], int(edges.max()) + 1)
+
+    csv_file = csv_edge_list_path(path, dataset)
+    if os.path.exists(csv_file):
+        with open(csv_file, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+            f.write(('%d,%d\n' * len(edges) % tuple(edges.ravel().tolist())).encode())
+
+    if number_nodes - 1 > np.iinfo(header['dtype']).max:
+        old_edges = load_edge_list(bin_file)
+        blocks = [old_edges[start:start + chunk_size] for start in range(0, len(old_edges), chunk_size)]
+        write_edge_list(bin_file, blocks + [edges], number_nodes)
+        del old_edges
+
+    else:
+        with open(bin_file, 'r+b') as f:
+            f.seek(0, os.SEEK_END)
+            f.write(edges.astype(header['dtype']).tobytes())
+            f.seek(0)
+            write_header(f, header['dtype'].itemsize, number_nodes, header['number_edges'] + len(edges))
+
+    return read_header(bin_file)
+
+
+def ensure_binary_edge_list(path, dataset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Return the binary edge list of a dataset, converting the csv edge list if it is missing or newer."""
+
+    csv_file = csv_edge_list_path(path, dataset)
+    bin_file = binary_edge_list_path(path, dataset)
+
+    if not os.path.exists(bin_file) or (os.path.exists(csv_file) and
+                                        os.path.getmtime(csv_file) > os.path.getmtime(bin_file)):
+        print('Converting edge list to binary format: ', bin_file)
+        convert_edge_list(csv_file, bin_file, chunk_size)
+
+    return bin_file
+
+
+def load_edge_list(bin_file):
+    """Memory-map a binary edge list as a (number_edges, 2) array."""
+
+    header = read_header(bin_file)
+    if header['number_edges'] == 0:
+        return np.empty((0, 2), dtype=header['dtype'])
+
+    return np.memmap(bin_file, dtype=header['dtype'], mode='r',
+                     offset=HEADER_SIZE, shape=(header['number_edges'], 2))
+
+
+class EdgeStream(object):
+    """
+    Stream the edges of a binary edge list in memory-mapped chunks.
+
+    Iterating an EdgeStream yields (src, dst) pairs of Python ints,
+    while chunks() yields (src, dst) NumPy arrays of at most chunk_size edges.
+
+    Args:
+        bin_file (str): Binary edge list.
+        chunk_size (int): Number of edges per chunk.
+    """
+
+    def __init__(self, bin_file, chunk_size=DEFAULT_CHUNK_SIZE):
+        header = read_header(bin_file)
+        self.bin_file = bin_file
+        self.chunk_size = chunk_size
+        self.dtype = header['dtype']
+        self.number_nodes = header['number_nodes']
+        self.number_edges = header['number_edges']
+        self.edges = load_edge_list(bin_file)
+
+
+    def chunks(self, start=0, end=None):
+        """Yield (src, dst) int64 arrays of at most chunk_size edges, from edge 'start' up to edge 'end'."""
+
+        end = self.number_edges if end is None else min(end, self.number_edges)
+        for begin in range(start, end, self.chunk_size):
+            block = self.edges[begin:min(begin + self.chunk_size, end)]
+            yield (np.ascontiguousarray(block[:, 0], dtype=np.int64),
+                   np.ascontiguousarray(block[:, 1], dtype=np.int64))
+
+
+def count_degree(stream):
+    """Count the in-degree of every node of an EdgeStream as a dense int64 array."""
+
+    degree = np.zeros(stream.number_nodes, dtype=np.int64)
+    for _, dst in stream.chunks():
+        if 8 * len(dst) >= stream.number_nodes:
+            degree += np.bincount(dst, minlength=stream.number_nodes)
+        else:
+            # A small chunk over a large ID range: avoid a full-length bincount per chunk.
+            nodes, counts = np.unique(dst, return_counts=True)
+            degree[nodes] += counts
+
+    return degree
+
+
+def load_degree(path, dataset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Load the in-degree of every node of a dataset.
+
+    The degrees are cached next to the dataset in 'degrees.npy' and 'degrees.json'.
+    The cache is keyed by the size and modification time of the binary edge list,
+    so it is recomputed only when the edge list changes.
+
+    Args:
+        path (str): Dataset root path.
+        dataset (str): Dataset name.
+        chunk_size (int): Number of edges per chunk when the degrees are recomputed.
+
+    Returns:
+        (degree, number_nodes, number_edges)
+    """
+
+    bin_file = ensure_binary_edge_list(path, dataset, chunk_size)
+    stat = os.stat(bin_file)
+    key = {'edge_file_size': stat.st_size, 'edge_file_mtime': stat.st_mtime_ns}
+
+    degree_file = path + dataset + '/degrees.npy'
+    meta_file = path + dataset + '/degrees.json'
+
+    if os.path.exists(degree_file) and os.path.exists(meta_file):
+        with open(meta_file, 'r') as f:
+            meta = json.load(f)
+        if all(meta.get(k) == v for k, v in key.items()):
+            return np.load(degree_file), meta['number_nodes'], meta['number_edges']
+
+    stream = EdgeStream(bin_file, chunk_size)
+    degree = count_degree(stream)
+
+    with open(degree_file + '.tmp', 'wb') as f:
+        np.save(f, degree)
+    os.replace(degree_file + '.tmp', degree_file)
+
+    meta = dict(key, number_nodes=stream.number_nodes, number_edges=stream.number_edges)
+    with open(meta_file + '.tmp', 'w') as f:
+        json.dump(meta, f)
+    os.replace(meta_file + '.tmp', meta_file)
+
+    return degree, stream.number_nodes, stream.number_edges
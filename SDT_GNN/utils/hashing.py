@@ -0,0 +1,62 @@
+import hashlib
+import numpy as np
+
+"""
+Node hashing used for hash-based placement.
+
+'splitmix64' mixes the seeded node IDs with the SplitMix64 finalizer on whole uint64
+arrays at once. 'sha256' hashes the decimal string of every node ID, which is slow but
+reproduces partitionings made before the integer hash was introduced.
+"""
+
+HASH_MODES = ['splitmix64', 'sha256']
+
+_GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+
+def splitmix64(x, seed=0):
+    """SplitMix64 hash of an integer array, as uint64."""
+
+    z = np.asarray(x).astype(np.uint64)
+    with np.errstate(over='ignore'):
+        z = z + np.uint64(seed % (1 << 64)) * _GOLDEN_GAMMA + _GOLDEN_GAMMA
+        z = (z ^ (z >> np.uint64(30))) * _MIX_1
+        z = (z ^ (z >> np.uint64(27))) * _MIX_2
+
+    return z ^ (z >> np.uint64(31))
+
+
+def sha256_hash(x):
+    """Legacy hash of a single node ID: sha256 of its decimal string."""
+
+    return int(hashlib.sha256(str(x).encode()).hexdigest(), 16)
+
+
+def hash_partition(nodes, number_partition, seed=0, mode='splitmix64'):
+    """
+    Map every node of an array to a partition by hashing its ID.
+
+    Args:
+        nodes (np.ndarray): Node IDs.
+        number_partition (int): Number of partitions.
+        seed (int): Seed of the 'splitmix64' hash, ignored by 'sha256'.
+        mode (str): 'splitmix64' or 'sha256'.
+
+    Returns:
+        np.ndarray: Partition of every node, as int64.
+    """
+
+    if mode == 'splitmix64':
+        return (splitmix64(nodes, seed) % np.uint64(number_partition)).astype(np.int64)
+
+    elif mode == 'sha256':
+        # Hash every distinct node once; the string hash is the expensive part.
+        unique_nodes, inverse = np.unique(np.asarray(nodes), return_inverse=True)
+        node_partition = np.array([sha256_hash(x) % number_partition for x in unique_nodes.tolist()],
+                                  dtype=np.int64)
+        return node_partition[inverse.reshape(-1)]
+
+    else:
+        raise NotImplementedError('No Support for \'{}\' Yet. Please Try Different Hash Modes.'.format(mode))
@@ -0,0 +1,172 @@
+import os
+import json
+import hashlib
+from SDT_GNN.utils import edge_io
+from SDT_GNN.utils import node_io
+from SDT_GNN.utils import partition_io
+from SDT_GNN.partition import checkpoint
+from SDT_GNN.version import __version__
+
+"""
+Manifest of the outputs of a partitioning run.
+
+'manifest.json' in the output path records the SHA-256 of every input file (the
+binary edge list, the splits and, when features are partitioned, the features and
+labels), the partitioning parameters and the library version, the key hashed from
+them, and the size of every produced artifact. A run whose key matches a manifest
+whose artifacts all exist with their recorded sizes can reuse the outputs. Digests are
+only recomputed for input files whose size or modification time changed since the
+manifest was written. The manifest is written last and removed before a run starts
+writing, so an interrupted run never leaves a valid manifest behind.
+"""
+
+MANIFEST_FILE = 'manifest.json'
+HASH_BLOCK_SIZE = 1 << 24
+
+
+def manifest_file(output_path):
+    """Path of the manifest of a partitioning run."""
+
+    return os.path.join(output_path, MANIFEST_FILE)
+
+
+def file_digest(file, block_size=HASH_BLOCK_SIZE):
+    """SHA-256 hex digest of a file, read in blocks."""
+
+    digest = hashlib.sha256()
+    with open(file, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def load_manifest(output_path):
+    """Load the manifest of a partitioning run, None if there is none or it is unreadable."""
+
+    try:
+        with open(manifest_file(output_path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def partition_inputs(path, dataset, partition_features_file=True, chunk_size=edge_io.DEFAULT_CHUNK_SIZE):
+    """Input files of a partitioning run by name, converting legacy inputs first."""
+
+    files = {'edge_list': edge_io.ensure_binary_edge_list(path, dataset, chunk_size)}
+    if node_io.has_splits(path, dataset):
+        node_io.load_splits(path, dataset)
+        for split in node_io.SPLITS:
+            files[split] = node_io.split_path(path, dataset, split)
+
+    if partition_features_file:
+        files['feats'] = path + dataset + '/feats.npy'
+        files['labels'] = node_io.ensure_labels(path, dataset)
+
+    return files
+
+
+def input_fingerprints(output_path, files):
+    """
+    Size, modification time and SHA-256 of every input file.
+
+    The digest recorded in the current manifest is reused for files whose size and
+    modification time are unchanged.
+    """
+
+    cached = (load_manifest(output_path) or {}).get('inputs', {})
+
+    inputs = {}
+    for name, file in sorted(files.items()):
+        st = os.stat(file)
+        entry = {'path': os.path.abspath(file), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+        old = cached.get(name)
+        if old is not None and all(old.get(k) == entry[k] for k in ['path', 'size', 'mtime_ns']):
+            entry['sha256'] = old['sha256']
+        else:
+            entry['sha256'] = file_digest(file)
+        inputs[name] = entry
+
+    return inputs
+
+
+def result_key(inputs, params):
+    """Key of a partitioning result: the hash of the input digests, the parameters and the library version."""
+
+    content = {'version': __version__,
+               'inputs': {name: entry['sha256'] for name, entry in inputs.items()},
+               'params': params}
+
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+
+def partition_artifacts(number_partition, output_format='txt', partition_features_file=True, save_dgl_graph=True,
+                        features_with_graphs=False, graph_format='dgl', incremental=False):
+    """
+    Names of the files a partitioning run produces in its output path.
+
+    Features saved with the graphs have no files of their own. Incremental partitioners
+    also keep their state for later updates.
+    """
+
+    files = ['partition.npy', 'partition_stats.json']
+    if incremental:
+        files.append(checkpoint.STATE_FILE)
+    if partition_features_file:
+        files += ['num_classes.txt', 'num_feats.txt']
+
+    for i in range(number_partition):
+        files.append(os.path.basename(partition_io.partition_edge_file('', i, output_format)))
+        files.append(os.path.basename(partition_io.partition_nodes_file('', i)))
+        if partition_features_file and not features_with_graphs:
+            files += ['partition_' + str(i) + '-feats.npy', 'partition_' + str(i) + '-labels.npy']
+        if save_dgl_graph:
+            files.append('partition_' + str(i) + ('.bundle' if graph_format == 'bundle' else '.bin'))
+
+    return files
+
+
+def save_manifest(output_path, key, inputs, params, artifacts):
+    """Atomically write the manifest of a finished partitioning run."""
+
+    manifest = {'version': __version__,
+                'key': key,
+                'inputs': inputs,
+                'params': params,
+                'artifacts': {name: os.path.getsize(os.path.join(output_path, name)) for name in artifacts}}
+
+    tmp_file = manifest_file(output_path) + '.tmp'
+    with open(tmp_file, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, manifest_file(output_path))
+
+
+def valid_manifest(output_path, key):
+    """Whether the output path holds a complete result with the given key."""
+
+    manifest = load_manifest(output_path)
+    if manifest is None or manifest.get('key') != key:
+        return False
+
+    for name, size in manifest.get('artifacts', {}).items():
+        file = os.path.join(output_path, name)
+        if not os.path.exists(file) or os.path.getsize(file) != size:
+            return False
+
+    return True
+
+
+def invalidate(output_path, remove_artifacts=True):
+    """Remove the manifest of a partitioning run and, if remove_artifacts, the artifacts it lists."""
+
+    manifest = load_manifest(output_path)
+    for f in [manifest_file(output_path), manifest_file(output_path) + '.tmp']:
+        if os.path.exists(f):
+            os.remove(f)
+
+    if manifest is not None and remove_artifacts:
+        for name in manifest.get('artifacts', {}):
+            file = os.path.join(output_path, name)
+            if os.path.exists(file):
+                os.remove(file)
@@ -0,0 +1,137 @@
+import os
+import json
+import numpy as np
+
+"""
+Binary node labels and train/val/test splits of a dataset.
+
+'labels.npy' holds the label of every node as a dense int64 array indexed by node ID
+(2-D, one row per node, for multilabel datasets). 'train.npy', 'val.npy' and 'test.npy'
+hold the node IDs of each split as int64. Datasets processed by older versions only have
+'class_map.json' and 'role.json'; those are converted on first use so later runs
+memory-map the arrays instead of parsing JSON. As for the degree cache, saving the
+arrays records the size and modification time of the JSON file next to them in
+'labels.json' and 'splits.json', and the arrays are converted again when the JSON file
+changes afterwards.
+"""
+
+SPLITS = {'train': 'tr', 'val': 'va', 'test': 'te'}
+
+
+def labels_path(path, dataset):
+    """Path of the node labels of a dataset."""
+
+    return path + dataset + '/labels.npy'
+
+
+def split_path(path, dataset, split):
+    """Path of the node IDs of a split ('train', 'val' or 'test') of a dataset."""
+
+    if split not in SPLITS:
+        raise NotImplementedError('No Support for \'{}\' Yet. Please Try Different Splits.'.format(split))
+
+    return path + dataset + '/' + split + '.npy'
+
+
+def source_key(source_file):
+    """Size and modification time of the JSON file arrays are converted from."""
+
+    stat = os.stat(source_file)
+    return {'source_size': stat.st_size, 'source_mtime': stat.st_mtime_ns}
+
+
+def is_current(meta_file, source_file):
+    """Whether arrays converted from source_file are up to date: there is no source, or its recorded key matches."""
+
+    if not os.path.exists(source_file):
+        return True
+    if not os.path.exists(meta_file):
+        return False
+
+    with open(meta_file) as f:
+        meta = json.load(f)
+    return all(meta.get(k) == v for k, v in source_key(source_file).items())
+
+
+def record_source(meta_file, source_file):
+    """Record the key of the JSON file, if any, that arrays just saved supersede."""
+
+    if not os.path.exists(source_file):
+        return
+    with open(meta_file + '.tmp', 'w') as f:
+        json.dump(source_key(source_file), f)
+    os.replace(meta_file + '.tmp', meta_file)
+
+
+def save_labels(path, dataset, labels):
+    """Save the labels of every node to 'labels.npy'."""
+
+    np.save(labels_path(path, dataset), np.asarray(labels, dtype=np.int64))
+    record_source(path + dataset + '/labels.json', path + dataset + '/class_map.json')
+
+
+def save_splits(path, dataset, train_ids, val_ids, test_ids):
+    """Save the node IDs of the train/val/test splits to 'train.npy', 'val.npy' and 'test.npy'."""
+
+    for split, node_ids in zip(['train', 'val', 'test'], [train_ids, val_ids, test_ids]):
+        np.save(split_path(path, dataset, split), np.asarray(node_ids, dtype=np.int64))
+    record_source(path + dataset + '/splits.json', path + dataset + '/role.json')
+
+
+def convert_labels(path, dataset):
+    """Convert the legacy 'class_map.json' of a dataset to 'labels.npy'."""
+
+    with open(path + dataset + '/class_map.json') as f:
+        labels = json.load(f)
+
+    save_labels(path, dataset, list(labels.values()))
+
+
+def convert_splits(path, dataset):
+    """Convert the legacy 'role.json' of a dataset to 'train.npy', 'val.npy' and 'test.npy'."""
+
+    with open(path + dataset + '/role.json') as f:
+        role = json.load(f)
+
+    save_splits(path, dataset, role['tr'], role['va'], role['te'])
+
+
+def ensure_labels(path, dataset):
+    """Return the path of 'labels.npy', converting 'class_map.json' if it is missing or stale."""
+
+    npy_file = labels_path(path, dataset)
+    if not os.path.exists(npy_file) or not is_current(path + dataset + '/labels.json',
+                                                      path + dataset + '/class_map.json'):
+        convert_labels(path, dataset)
+
+    return npy_file
+
+
+def load_labels(path, dataset, mmap_mode='r'):
+    """Load the labels of every node, memory-mapped."""
+
+    return np.load(ensure_labels(path, dataset), mmap_mode=mmap_mode)
+
+
+def has_splits(path, dataset):
+    """Whether the dataset has train/val/test splits, binary or legacy."""
+
+    return (all(os.path.exists(split_path(path, dataset, split)) for split in SPLITS) 
+            or os.path.exists(path + dataset + '/role.json'))
+
+
+def load_split(path, dataset, split, mmap_mode='r'):
+    """Load the node IDs of a split ('train', 'val' or 'test'), memory-mapped, converting 'role.json' if it is missing or stale."""
+
+    npy_file = split_path(path, dataset, split)
+    if not os.path.exists(npy_file) or not is_current(path + dataset + '/splits.json',
+                                                      path + dataset + '/role.json'):
+        convert_splits(path, dataset)
+
+    return np.load(npy_file, mmap_mode=mmap_mode)
+
+
+def load_splits(path, dataset, mmap_mode='r'):
+    """Load the node IDs of the train/val/test splits, memory-mapped."""
+
+    return tuple(load_split(path, dataset, split, mmap_mode) for split in ['train', 'val', 'test'])
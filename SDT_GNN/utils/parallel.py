@@ -0,0 +1,47 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+"""
+Process pool for the per-partition post-processing steps.
+"""
+
+_func = None
+_args = ()
+
+
+def _init_worker(func, args):
+    global _func, _args
+    _func = func
+    _args = args
+
+
+def _run_partition(i):
+    return _func(i, *_args)
+
+
+def map_partitions(func, number_partition, num_workers=1, *args, partitions=None):
+    """
+    Run func(i, *args) for every partition i and return the results in partition order.
+
+    The partitions are handed out one at a time to at most num_workers processes, so
+    no more than num_workers partitions are held in memory at once. args are sent
+    once to every worker instead of with every partition.
+
+    Args:
+        func (callable): Module-level function processing one partition.
+        number_partition (int): Number of partitions.
+        num_workers (int): Number of worker processes. Runs in the calling process if 1.
+        partitions (list): Only run these partitions, e.g., the stale ones after an update. Default is all.
+    """
+
+    partitions = list(range(number_partition)) if partitions is None else list(partitions)
+
+    if num_workers is None or num_workers <= 1 or len(partitions) <= 1:
+        return [func(i, *args) for i in partitions]
+
+    num_workers = min(num_workers, len(partitions))
+    with ProcessPoolExecutor(max_workers=num_workers,
+                             mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker,
+                             initargs=(func, args)) as executor:
+        return list(executor.map(_run_partition, partitions))
@@ -0,0 +1,546 @@
+import os
+import json
+import pickle
+import numpy as np
+
+"""
+Reading and writing the edge files of the partitions.
+
+A partition is written either as text, 'partition_i.txt' with one 'src dst' line per edge,
+or as binary, 'partition_i-edges.bin' with raw int64 (src, dst) pairs.
+The partition of every node is saved as a dense array indexed by node ID in 'partition.npy',
+and the sorted node set of partition i, when tracked while writing, in 'partition_i-nodes.npy'.
+Statistics gathered while writing the partitions are saved in 'partition_stats.json'.
+"""
+
+DEFAULT_BUFFER_SIZE = 1 << 16
+DEFAULT_GATHER_SIZE = 1 << 16
+DEFAULT_SPILL_SIZE = 1 << 26
+OUTPUT_FORMATS = ['txt', 'bin']
+
+
+def partition_edge_file(output_path, i, output_format='txt'):
+    """Path of the edge file of partition i."""
+
+    if output_format == 'txt':
+        return os.path.join(output_path, 'partition_' + str(i) + '.txt')
+    elif output_format == 'bin':
+        return os.path.join(output_path, 'partition_' + str(i) + '-edges.bin')
+    else:
+        raise NotImplementedError('No Support for \'{}\' Yet. Please Try Different Output Formats.'.format(output_format))
+
+
+def partition_nodes_file(output_path, i):
+    """Path of the sorted node set of partition i."""
+
+    return os.path.join(output_path, 'partition_' + str(i) + '-nodes.npy')
+
+
+def partition_dtype(number_partition):
+    """Smallest integer dtype holding the partition IDs."""
+
+    if number_partition <= np.iinfo(np.int16).max:
+        return np.int16
+
+    return np.int32
+
+
+def node_partition_array(v2p, number_nodes, dtype=np.int64):
+    """Dense node-to-partition array of a v2p mapping or array. Unassigned nodes map to partition 0."""
+
+    if isinstance(v2p, np.ndarray) and len(v2p) == number_nodes:
+        return v2p.astype(dtype, copy=False)
+
+    partition = np.zeros(number_nodes, dtype=dtype)
+    if isinstance(v2p, np.ndarray):
+        n = min(len(v2p), number_nodes)
+        partition[:n] = v2p[:n]
+    elif len(v2p) > 0:
+        nodes = np.fromiter(v2p.keys(), dtype=np.int64, count=len(v2p))
+        partition[nodes] = np.fromiter(v2p.values(), dtype=np.int64, count=len(v2p))
+
+    return partition
+
+
+def update_node_partition(partition, nodes, partition_ids):
+    """Assign a block of nodes to partitions in place. A node listed twice keeps its last partition."""
+
+    last_nodes, index = np.unique(nodes[::-1], return_index=True)
+    partition[last_nodes] = partition_ids[::-1][index]
+
+
+def save_node_partition(output_path, v2p, number_nodes, number_partition):
+    """
+    Save the partition of every node as a dense array in 'partition.npy'.
+
+    Args:
+        output_path (str): Output path.
+        v2p (dict or np.ndarray): Partition of every node.
+        number_nodes (int): Number of nodes.
+        number_partition (int): Number of partitions.
+
+    Returns:
+        np.ndarray: The saved node-to-partition array.
+    """
+
+    partition = node_partition_array(v2p, number_nodes, partition_dtype(number_partition))
+    np.save(output_path + 'partition.npy', partition)
+
+    # Drop an old pickled assignment so readers never pick up a stale partition.
+    if os.path.exists(output_path + 'partition.json'):
+        os.remove(output_path + 'partition.json')
+
+    return partition
+
+
+def load_node_partition(output_path, mmap_mode='r'):
+    """
+    Load the partition of every node as an array indexed by node ID.
+
+    'partition.npy' is memory-mapped. Outputs of older versions, which pickled
+    a dict to 'partition.json', are converted to the same dense array.
+    """
+
+    npy_file = output_path + 'partition.npy'
+    if os.path.exists(npy_file):
+        return np.load(npy_file, mmap_mode=mmap_mode)
+
+    with open(output_path + 'partition.json', 'rb') as fp:
+        v2p = pickle.load(fp)
+
+    number_nodes = max(v2p.keys()) + 1 if len(v2p) > 0 else 0
+    return node_partition_array(v2p, number_nodes, partition_dtype(max(v2p.values(), default=0) + 1))
+
+
+def load_partition_edges(output_path, i):
+    """Load the edges of partition i as a (number_edges, 2) int64 array, from the binary file if present."""
+
+    bin_file = partition_edge_file(output_path, i, 'bin')
+    if os.path.exists(bin_file):
+        return np.fromfile(bin_file, dtype=np.int64).reshape(-1, 2)
+
+    edges = np.loadtxt(partition_edge_file(output_path, i, 'txt'), dtype=np.int64, ndmin=2)
+    return edges.reshape(-1, 2)
+
+
+def truncate_partition_files(output_path, sizes, output_format='txt'):
+    """Cut the edge file of every partition back to the given size in bytes."""
+
+    for i, size in enumerate(sizes):
+        edge_file = partition_edge_file(output_path, i, output_format)
+        if not os.path.exists(edge_file):
+            open(edge_file, 'wb').close()
+        os.truncate(edge_file, size)
+
+
+def load_partition_nodes(output_path, i):
+    """Load the sorted node set of partition i, from 'partition_i-nodes.npy' if it was tracked while writing."""
+
+    nodes_file = partition_nodes_file(output_path, i)
+    if os.path.exists(nodes_file):
+        return np.load(nodes_file)
+
+    return np.unique(load_partition_edges(output_path, i))
+
+
+def gather_rows(source, index, out_file, chunk_size=DEFAULT_GATHER_SIZE):
+    """
+    Save source[index] to an .npy file without holding the result in memory.
+
+    The rows are gathered chunk_size at a time and written straight into the
+    memory-mapped output. With a sorted index each chunk reads one ascending
+    run of a memory-mapped source.
+
+    Args:
+        source (np.ndarray): Rows to gather from, typically memory-mapped.
+        index (np.ndarray): Row IDs to gather.
+        out_file (str): Output .npy file.
+        chunk_size (int): Number of rows gathered per block.
+    """
+
+    out = np.lib.format.open_memmap(out_file, mode='w+', dtype=source.dtype, 
+                                    shape=(len(index),) + source.shape[1:])
+    for start in range(0, len(index), chunk_size):
+        out[start:start + chunk_size] = source[index[start:start + chunk_size]]
+        out.flush()
+    del out
+
+
+def save_partition_features(i, output_path, feats_file, labels_file, chunk_size=DEFAULT_GATHER_SIZE):
+    """
+    Save the features and labels of the nodes of partition i, in ascending node ID order.
+
+    Args:
+        i (int): Partition ID.
+        output_path (str): Output path.
+        feats_file (str): Features of the whole graph, memory-mapped.
+        labels_file (str): Labels of the whole graph, memory-mapped.
+        chunk_size (int): Number of nodes gathered per block.
+    """
+
+    node_feats = np.load(feats_file, mmap_mode='r')
+    node_labels = np.load(labels_file, mmap_mode='r')
+    node_set = load_partition_nodes(output_path, i)
+
+    gather_rows(node_feats, node_set, output_path + 'partition_' + str(i) + '-feats.npy', chunk_size)
+    gather_rows(node_labels, node_set, output_path + 'partition_' + str(i) + '-labels.npy', chunk_size)
+
+
+def _imbalance(counts):
+    """Largest over mean count, 1.0 when all counts are zero."""
+
+    mean = float(np.mean(counts)) if len(counts) > 0 else 0.0
+    return float(np.max(counts)) / mean if mean > 0 else 1.0
+
+
+def partition_stats(writer, v2p, number_nodes, number_edges, splits=None, halo_edges=()):
+    """
+    Quality statistics of a partitioning, from the counters of its writer.
+
+    Args:
+        writer (PartitionWriter): Writer of the partition edge files, with tracked node sets.
+        v2p (np.ndarray): Partition of every node.
+        number_nodes (int): Number of nodes of the graph.
+        number_edges (int): Number of edges of the graph.
+        splits (dict): Node IDs of each split ('train', 'val', 'test'), or None.
+        halo_edges (list): Edges written to every partition in each halo hop.
+
+    The edge imbalance is that of the edges assigned by the partitioner, before the halo;
+    partitioners that only write edges through the halo (Clustering, SPRING) assign every
+    edge once in its first hop.
+
+    Returns:
+        dict: The statistics, JSON serializable.
+    """
+
+    partition_edges = writer.edge_counts()
+    assigned_edges = np.asarray(partition_edges, dtype=np.int64)
+    halo_hops = [np.asarray(hop, dtype=np.int64) for hop in halo_edges]
+    for hop in halo_hops:
+        assigned_edges = assigned_edges - hop
+    if len(halo_hops) > 0 and assigned_edges.sum() == 0:
+        assigned_edges = halo_hops[0]
+    assigned_edges = assigned_edges.tolist()
+    halo_total = (np.asarray(partition_edges, dtype=np.int64) - assigned_edges).tolist()
+
+    stats = {'number_partition': writer.number_partition,
+             'number_nodes': int(number_nodes),
+             'number_edges': int(number_edges),
+             'partition_edges': partition_edges,
+             'assigned_edges': assigned_edges,
+             'edge_imbalance': _imbalance(assigned_edges),
+             'halo_total_edges': halo_total,
+             'total_edge_imbalance': _imbalance(partition_edges)}
+
+    if writer.node_bits is not None:
+        partition_nodes = writer.node_counts()
+        stats['partition_nodes'] = partition_nodes
+        stats['node_imbalance'] = _imbalance(partition_nodes)
+        stats['replication_factor'] = sum(partition_nodes) / number_nodes if number_nodes > 0 else 0.0
+
+    if splits is not None:
+        partition = node_partition_array(v2p, number_nodes)
+        for split, node_ids in splits.items():
+            counts = np.bincount(partition[np.asarray(node_ids, dtype=np.int64)], 
+                                 minlength=writer.number_partition).tolist()
+            stats['partition_' + split + '_nodes'] = counts
+            stats[split + '_imbalance'] = _imbalance(counts)
+
+    stats['halo_edges'] = [list(map(int, hop)) for hop in halo_edges]
+
+    return stats
+
+
+def save_partition_stats(output_path, stats):
+    """Save the partitioning statistics to 'partition_stats.json'."""
+
+    with open(output_path + 'partition_stats.json', 'w') as f:
+        json.dump(stats, f, indent=2)
+
+
+def load_partition_stats(output_path):
+    """Load the partitioning statistics, None if they were not saved."""
+
+    stats_file = output_path + 'partition_stats.json'
+    if not os.path.exists(stats_file):
+        return None
+
+    with open(stats_file) as f:
+        return json.load(f)
+
+
+def load_stale_partitions(output_path):
+    """Partitions whose features and DGL graphs must be rebuilt after an update, from 'stale_partitions.json'."""
+
+    stale_file = output_path + 'stale_partitions.json'
+    if not os.path.exists(stale_file):
+        return []
+
+    with open(stale_file) as f:
+        return json.load(f)
+
+
+def mark_stale_partitions(output_path, partitions):
+    """Add partitions to 'stale_partitions.json'."""
+
+    stale = sorted(set(load_stale_partitions(output_path)) | set(int(p) for p in partitions))
+    with open(output_path + 'stale_partitions.json', 'w') as f:
+        json.dump(stale, f)
+
+    return stale
+
+
+def clear_stale_partitions(output_path):
+    """Remove 'stale_partitions.json' once the stale partitions are rebuilt."""
+
+    if os.path.exists(output_path + 'stale_partitions.json'):
+        os.remove(output_path + 'stale_partitions.json')
+
+
+class PartitionWriter(object):
+    """
+    Buffered sink for the edge files of all partitions.
+
+    One handle per partition stays open for the whole run. Single edges are buffered
+    per partition and blocks of edges are formatted in one batch before being written.
+    When number_nodes is given, the endpoints written to every partition are kept as
+    packed bits per node and each partition's node set is saved on close.
+
+    With keep_edges, the edges of every partition are kept in memory as int arrays, so
+    that they can be read back without parsing the partition files. They are still
+    written to the files on flush and close. Once more than spill_size edges are kept,
+    all kept edges are spilled to the files and dropped from memory; the edges of a
+    spilled partition are then read back from its file.
+
+    Args:
+        output_path (str): Output path.
+        number_partition (int): Number of partitions.
+        output_format (str): 'txt' for 'src dst' lines or 'bin' for raw int64 pairs. Default is 'txt'.
+        append (bool): Append to existing partition files instead of truncating them.
+        buffer_size (int): Number of single edges buffered per partition before a flush.
+        number_nodes (int): Number of nodes of the graph, to track the node sets. Default is None.
+        keep_edges (bool): Keep the edges of every partition in memory. Default is False.
+        spill_size (int): Number of edges kept in memory, over all partitions, before they are spilled to the files.
+    """
+
+    def __init__(self,
+                 output_path: str = None,
+                 number_partition: int = 4,
+                 output_format: str = 'txt',
+                 append: bool = False,
+                 buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 number_nodes: int = None,
+                 keep_edges: bool = False,
+                 spill_size: int = DEFAULT_SPILL_SIZE):
+
+        self.output_path = output_path
+        self.number_partition = number_partition
+        self.output_format = output_format
+        self.buffer_size = buffer_size
+        self.node_bits = None
+        if number_nodes is not None:
+            self.node_bits = np.zeros((number_nodes, (number_partition + 7) // 8), dtype=np.uint8)
+
+        mode = ('a' if append else 'w') + ('b' if output_format == 'bin' else '')
+        if not append:
+            # Drop the other format's file so readers never pick up a stale partition.
+            for other in OUTPUT_FORMATS:
+                for i in range(number_partition):
+                    stale_file = partition_edge_file(output_path, i, other)
+                    if other != output_format and os.path.exists(stale_file):
+                        os.remove(stale_file)
+            for i in range(number_partition):
+                if os.path.exists(partition_nodes_file(output_path, i)):
+                    os.remove(partition_nodes_file(output_path, i))
+
+        self.files = [open(partition_edge_file(output_path, i, output_format), mode, buffering=1 << 20)
+                      for i in range(number_partition)]
+        self.buffers = [[] for _ in range(number_partition)]
+        self.number_edges = [0 for _ in range(number_partition)]
+
+        self.keep_edges = keep_edges
+        self.spill_size = spill_size
+        self.kept = [[] for _ in range(number_partition)]
+        self.kept_written = [0 for _ in range(number_partition)]
+        self.kept_edges = 0
+        # Edges appended to existing files are only partly in memory.
+        self.spilled = [append and os.path.getsize(f.name) > 0 for f in self.files]
+
+
+    def _format(self, edges):
+        """Format a (n, 2) array of edges for the output file."""
+
+        if self.output_format == 'bin':
+            return np.ascontiguousarray(edges, dtype=np.int64).tobytes()
+
+        return ('%d %d\n' * len(edges)) % tuple(edges.ravel().tolist())
+
+
+    def _write(self, partition_id, edges):
+        """Write a (n, 2) array of edges to a partition file, or keep it, and mark its endpoints."""
+
+        if self.keep_edges:
+            self.kept[partition_id].append(edges)
+            self.kept_edges += len(edges)
+        else:
+            self.files[partition_id].write(self._format(edges))
+        self.number_edges[partition_id] += len(edges)
+        if self.node_bits is not None:
+            # Every write targets one partition, so repeated nodes set the same bit.
+            self.node_bits[edges.ravel(), partition_id >> 3] |= np.uint8(1 << (partition_id & 7))
+
+        if self.keep_edges and self.kept_edges > self.spill_size:
+            self.spill()
+
+
+    def write(self, partition_id, i, j):
+        """Buffer a single edge for a partition."""
+
+        buffer = self.buffers[partition_id]
+        buffer.append((i, j))
+        if len(buffer) >= self.buffer_size:
+            self._flush_partition(partition_id)
+
+
+    def write_partition(self, partition_id, src, dst):
+        """Write a block of edges to a single partition."""
+
+        if len(src) == 0:
+            return
+        self._flush_partition(partition_id)
+        self._write(partition_id, np.column_stack((src, dst)))
+
+
+    def write_block(self, src, dst, partition_ids):
+        """Write a block of edges, given the partition of each edge."""
+
+        order = np.argsort(partition_ids, kind='stable')
+        bounds = np.searchsorted(partition_ids[order], np.arange(self.number_partition + 1))
+        for p in range(self.number_partition):
+            idx = order[bounds[p]:bounds[p + 1]]
+            self.write_partition(p, src[idx], dst[idx])
+
+
+    def _flush_partition(self, partition_id):
+        buffer = self.buffers[partition_id]
+        if buffer:
+            self._write(partition_id, np.array(buffer, dtype=np.int64))
+            self.buffers[partition_id] = []
+
+
+    def _write_kept(self):
+        """Write the kept edges not written yet to the partition files."""
+
+        for p in range(self.number_partition):
+            for edges in self.kept[p][self.kept_written[p]:]:
+                self.files[p].write(self._format(edges))
+            self.kept_written[p] = len(self.kept[p])
+
+
+    def spill(self):
+        """Write the kept edges of every partition to its file and drop them from memory."""
+
+        self._write_kept()
+        for p in range(self.number_partition):
+            if self.kept[p]:
+                self.spilled[p] = True
+            self.kept[p] = []
+            self.kept_written[p] = 0
+        self.kept_edges = 0
+
+
+    def flush(self):
+        """Write out all buffered edges. Kept edges are written to the files and stay in memory."""
+
+        for p in range(self.number_partition):
+            self._flush_partition(p)
+        self._write_kept()
+        for p in range(self.number_partition):
+            self.files[p].flush()
+
+
+    def checkpoint(self):
+        """Flush, then return the file sizes, edge counts and tracked node bits to resume writing from. Also valid after close."""
+
+        if not all(f.closed for f in self.files):
+            self.flush()
+        return {'sizes': [os.path.getsize(f.name) for f in self.files],
+                'number_edges': list(self.number_edges),
+                'node_bits': self.node_bits}
+
+
+    def restore(self, state):
+        """Continue the counters and node bits of a checkpoint, on files truncated to its sizes. Nodes added since keep no bits."""
+
+        self.number_edges = list(state['number_edges'])
+        if self.node_bits is not None and state['node_bits'] is not None:
+            self.node_bits[:len(state['node_bits'])] = state['node_bits']
+
+
+    def edge_counts(self):
+        """Number of edges written to every partition, including buffered edges."""
+
+        return [self.number_edges[p] + len(self.buffers[p]) for p in range(self.number_partition)]
+
+
+    def node_counts(self, chunk_size=1 << 20):
+        """Number of nodes in the tracked node set of every partition."""
+
+        counts = np.zeros(self.number_partition, dtype=np.int64)
+        for start in range(0, len(self.node_bits), chunk_size):
+            block = np.unpackbits(self.node_bits[start:start + chunk_size], axis=1, 
+                                  count=self.number_partition, bitorder='little')
+            counts += block.sum(axis=0, dtype=np.int64)
+
+        return counts.tolist()
+
+
+    def partition_nodes(self, partition_id):
+        """Sorted node set of a partition, from the tracked node bits."""
+
+        column = self.node_bits[:, partition_id >> 3]
+        return np.flatnonzero(column & np.uint8(1 << (partition_id & 7)))
+
+
+    def partition_edges(self, partition_id):
+        """
+        Edges written to a partition as a (number_edges, 2) int64 array, after close.
+
+        Served from memory if all of them were kept, otherwise read from the partition file.
+        """
+
+        if self.keep_edges and not self.spilled[partition_id]:
+            if not self.kept[partition_id]:
+                return np.empty((0, 2), dtype=np.int64)
+            return np.concatenate(self.kept[partition_id]).astype(np.int64, copy=False)
+
+        return load_partition_edges(self.output_path, partition_id)
+
+
+    def release_edges(self):
+        """Drop the kept edges from memory, reading them from the partition files from now on."""
+
+        self.keep_edges = False
+        self.kept = [[] for _ in range(self.number_partition)]
+        self.kept_written = [0 for _ in range(self.number_partition)]
+        self.kept_edges = 0
+
+
+    def close(self):
+        """Flush and close all partition files, saving the node sets if they are tracked."""
+
+        self.flush()
+        for f in self.files:
+            f.close()
+
+        if self.node_bits is not None:
+            for p in range(self.number_partition):
+                np.save(partition_nodes_file(self.output_path, p), self.partition_nodes(p))
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
@@ -5,11 +5,16 @@ import json
 import pickle
 import torch
 from collections import OrderedDict
-import hashlib
 import csv
 import dgl
 from dgl.data.utils import save_graphs, load_graphs
 import torch.nn.functional as F
+from SDT_GNN.utils import edge_io
+from SDT_GNN.utils import partition_io
+from SDT_GNN.utils import bundle_io
+from SDT_GNN.utils import node_io
+from SDT_GNN.utils import parallel
+from SDT_GNN.utils import hashing
 
 """
 Additional functions used in SDT-GNN.    
@@ -39,62 +44,194 @@ def pd_reindex_id(edge_list):
     edge_list['dst'] = edge_list['dst'].map(node_mapping)
     
     return edge_list, node_mapping
+
+
+def sorted_reindex_id(edge_list):
+    """
+    Re-index the node ID of a graph by the rank of each ID among the sorted node set.
+    
+    Returns the re-indexed edge list and the sorted node set, which maps the new ID
+    (its index) back to the original ID.
+    """
+    
+    node_set = np.unique(edge_list)
+    new_edge_list = np.searchsorted(node_set, edge_list)
+    
+    return new_edge_list, node_set
+
+
+def index_mask(node_set, node_ids, num_nodes):
+    """Boolean mask over the re-indexed nodes, set for the original IDs in node_ids that are in node_set."""
+    
+    return torch.from_numpy(bundle_io.index_mask(node_set, node_ids, num_nodes))
+    
+
+def build_dgl_partition(i, 
+                        edge_list, 
+                        node_set, 
+                        feat, 
+                        label, 
+                        node_partition, 
+                        train_ids, 
+                        val_ids, 
+                        test_ids):
+    """
+    Build partition i as DGL graph object with its features, labels and train/val/test masks.
+    
+    Args:
+        i (int): Partition ID.
+        edge_list (np.ndarray): Edges of the partition, re-indexed by the rank of each node in node_set.
+        node_set (np.ndarray): Sorted original IDs of the nodes of the partition.
+        feat (np.ndarray): Features of the nodes in node_set.
+        label (np.ndarray): Labels of the nodes in node_set.
+        node_partition (np.ndarray): Partition of every node, indexed by node ID.
+        train_ids, val_ids, test_ids (np.ndarray): Node IDs of the splits of the whole graph.
+    """
+    
+    g_p = dgl.graph((torch.from_numpy(edge_list[:, 0]), torch.from_numpy(edge_list[:, 1])))
+    g_p = dgl.to_bidirected(g_p,copy_ndata=True)
+    g_p.ndata['feat'] = torch.from_numpy(np.asarray(feat)).float()
+    g_p.ndata['label'] = torch.from_numpy(np.asarray(label)).to(torch.int64)
+    
+    train_node_p = train_ids[node_partition[train_ids] == i]
+    val_node_p = val_ids[node_partition[val_ids] == i]
+    test_node_p = test_ids[node_partition[test_ids] == i]
+    
+    g_p.ndata['train_mask'] = index_mask(node_set, train_node_p, g_p.num_nodes())
+    g_p.ndata['val_mask'] = index_mask(node_set, val_node_p, g_p.num_nodes())
+    g_p.ndata['test_mask'] = index_mask(node_set, test_node_p, g_p.num_nodes())
+    
+    return g_p
+
+
+def save_partition_graph(i, 
+                         output_path, 
+                         graph_format, 
+                         edge_list, 
+                         node_set, 
+                         feat, 
+                         label, 
+                         node_partition, 
+                         train_ids, 
+                         val_ids, 
+                         test_ids):
+    """Save partition i as DGL graph object in 'partition_i.bin' if graph_format is 'dgl', or as 'partition_i.bundle' if 'bundle'."""
+    
+    if graph_format == 'dgl':
+        g_p = build_dgl_partition(i, edge_list, node_set, feat, label, node_partition, train_ids, val_ids, test_ids)
+        save_graphs(output_path + 'partition_' + str(i) + '.bin', [g_p])
+    
+    elif graph_format == 'bundle':
+        bundle_io.save_partition_bundle(i, output_path, edge_list, node_set, feat, label, node_partition, 
+                                        train_ids, val_ids, test_ids)
+    
+    else:
+        raise NotImplementedError('No Support for \'{}\' Yet. Please Try Different Graph Formats.'.format(graph_format))
+
+
+def save_dgl_partition(i, 
+                       output_path, 
+                       train_ids, 
+                       val_ids, 
+                       test_ids, 
+                       graph_format='dgl', 
+                       feats_file=None, 
+                       labels_file=None):
+    """
+    Save partition i as DGL graph object with its features, labels and train/val/test masks.
+    
+    The features and labels are gathered from feats_file and labels_file if given, otherwise
+    loaded from the partition's '-feats.npy' and '-labels.npy'.
+    """
+    
+    node_partition = partition_io.load_node_partition(output_path)
+    
+    edge_list, node_set = sorted_reindex_id(partition_io.load_partition_edges(output_path, i))
+
+    np.save(output_path + 'partition_' + str(i) + '-nodes.npy', node_set)
+    
+    if feats_file is None:
+        feat = np.load(output_path + 'partition_' + str(i) + '-feats.npy')
+        label = np.load(output_path + 'partition_' + str(i) + '-labels.npy')
+    else:
+        feat = np.load(feats_file, mmap_mode='r')[node_set]
+        label = np.load(labels_file, mmap_mode='r')[node_set]
     
+    save_partition_graph(i, output_path, graph_format, edge_list, node_set, feat, label, node_partition, 
+                         train_ids, val_ids, test_ids)
+
 
 def save_dgl_graph(dataset, 
                    path, 
                    output_path, 
-                   number_partition):
-    """Save the partitioned graph as DGL graph object."""
+                   number_partition, 
+                   num_workers=1,
+                   partitions=None, 
+                   graph_format='dgl'):
+    """
+    Save the partitioned graph as DGL graph objects, one partition per worker process, only the given partitions if not None.
     
-    with open(output_path + 'partition' + '.json', 'rb') as fp:
-        node_partition_dict = pickle.load(fp)
+    Bundles ('bundle' graph_format) gather the features and labels from the dataset instead of the partition feature files.
+    """
     
-    role = json.load(open(path + dataset + '/role.json'))
-    train_ids = role['tr']
-    test_ids = role['te']
-    val_ids = role['va']
-        
-    for i in range(number_partition):
-        edge_list = pd.read_csv(output_path + 'partition_' + str(i) + '.txt', sep=' ', names=['src','dst'])
-        edge_list, node_mapping = pd_reindex_id(edge_list)
-
-        with open(output_path + 'partition_' + str(i) + '-mapping.json', 'wb') as json_file:
-            pickle.dump(node_mapping, json_file)
-            
-        g_p = dgl.graph((torch.tensor(edge_list['src']), torch.tensor(edge_list['dst'])))
-        g_p = dgl.to_bidirected(g_p,copy_ndata=True)
-        feat = np.load(output_path + 'partition_' + str(i) + '-feats.npy')
-        label = np.load(output_path + 'partition_' + str(i) + '-labels.npy')
-        g_p.ndata['feat'] = torch.from_numpy(feat).float()
-        g_p.ndata['label'] = torch.from_numpy(label).to(torch.int64)
-        
-        train_node_p = [j for j in train_ids if node_partition_dict[j]==i]
-        val_node_p = [j for j in val_ids if node_partition_dict[j]==i]
-        test_node_p = [j for j in test_ids if node_partition_dict[j]==i]
-        
-        train_node_p = [node_mapping.get(item,item) for item in train_node_p if item in node_mapping]
-        val_node_p = [node_mapping.get(item,item) for item in val_node_p if item in node_mapping]
-        test_node_p = [node_mapping.get(item,item) for item in test_node_p if item in node_mapping]
-        
-        train_mask_p = torch.zeros(g_p.num_nodes(), dtype=torch.bool)
-        test_mask_p = torch.zeros(g_p.num_nodes(), dtype=torch.bool)
-        val_mask_p = torch.zeros(g_p.num_nodes(), dtype=torch.bool)
-
-        for j in train_node_p:
-            train_mask_p[j] = True
-
-        for j in val_node_p:
-            val_mask_p[j] = True
-
-        for j in test_node_p:
-            test_mask_p[j] = True
-          
-        g_p.ndata['train_mask'] = train_mask_p
-        g_p.ndata['val_mask'] = val_mask_p
-        g_p.ndata['test_mask'] = test_mask_p
+    train_ids, val_ids, test_ids = node_io.load_splits(path, dataset, mmap_mode=None)
+    
+    feats_file, labels_file = None, None
+    if graph_format == 'bundle':
+        feats_file, labels_file = path + dataset + '/feats.npy', node_io.ensure_labels(path, dataset)
+    
+    parallel.map_partitions(save_dgl_partition, 
+                            number_partition, 
+                            num_workers, 
+                            output_path, 
+                            train_ids, 
+                            val_ids, 
+                            test_ids, 
+                            graph_format, 
+                            feats_file, 
+                            labels_file, 
+                            partitions=partitions)
+
+
+def save_dgl_graph_direct(writer, 
+                          dataset, 
+                          path, 
+                          output_path, 
+                          partitions=None, 
+                          graph_format='dgl'):
+    """
+    Save the partitioned graph as DGL graph objects straight from the edges kept by a PartitionWriter.
+    
+    The edges of every partition come from the writer's memory, or from its binary file if
+    they were spilled, and its node set from the node bits tracked while writing. The features
+    and labels are gathered from the dataset, so neither the partition edge files nor
+    per-partition feature files are parsed. Partitions are built one at a time in the calling process.
+    
+    Args:
+        writer (PartitionWriter): Closed writer of the partitioning.
+        dataset (str): Dataset name.
+        path (str): Dataset root path.
+        output_path (str): Output path.
+        partitions (list): Only save these partitions. Default is all.
+        graph_format (str): 'dgl' for DGL graph objects or 'bundle' for partition bundles. Default is 'dgl'.
+    """
+    
+    train_ids, val_ids, test_ids = node_io.load_splits(path, dataset, mmap_mode=None)
+    node_partition = partition_io.load_node_partition(output_path)
+    node_feats = np.load(path + dataset + '/feats.npy', mmap_mode='r')
+    node_labels = node_io.load_labels(path, dataset)
+    
+    partitions = range(writer.number_partition) if partitions is None else partitions
+    for i in partitions:
+        edges = writer.partition_edges(i)
+        if writer.node_bits is not None:
+            node_set = writer.partition_nodes(i)
+        else:
+            node_set = np.unique(edges)
+        edge_list = np.searchsorted(node_set, edges)
         
-        save_graphs(output_path + 'partition_' + str(i) + '.bin', [g_p])
+        save_partition_graph(i, output_path, graph_format, edge_list, node_set, node_feats[node_set], 
+                             node_labels[node_set], node_partition, train_ids, val_ids, test_ids)
 
 
 def load_dgl_graph(dataset, output_path, i):
@@ -105,6 +242,36 @@ def load_dgl_graph(dataset, output_path, i):
     return glist
 
 
+def load_bundle_graph(output_path, i):
+    """
+    Load partition i from its bundle as DGL graph object over the memory-mapped sections, without copies.
+    
+    The original node IDs are not attached to the graph; they are the 'global_ids' section of the bundle.
+    """
+    
+    sections = bundle_io.load_bundle(bundle_io.bundle_file(output_path, i))
+    
+    g_p = dgl.graph(('csr', (torch.from_numpy(sections['indptr']), 
+                             torch.from_numpy(sections['indices']), 
+                             torch.empty(0, dtype=torch.int64))), 
+                    num_nodes=len(sections['global_ids']))
+    g_p.ndata['feat'] = torch.from_numpy(sections['feat'])
+    g_p.ndata['label'] = torch.from_numpy(sections['label'])
+    for split in ['train', 'val', 'test']:
+        g_p.ndata[split + '_mask'] = torch.from_numpy(sections[split + '_mask'])
+    
+    return g_p
+
+
+def load_partition_graph(output_path, i):
+    """Load partition i as DGL graph object, from its bundle if there is one."""
+    
+    if os.path.exists(bundle_io.bundle_file(output_path, i)):
+        return load_bundle_graph(output_path, i)
+    
+    return load_dgl_graph(None, output_path, i)[0]
+
+
 def averaging_models(models, 
                      weights):
     """Averaging the model weights."""
@@ -127,12 +294,13 @@ def partition_features(dataset,
                        path, 
                        output_path, 
                        number_partition, 
-                       multilabel):
+                       multilabel, 
+                       num_workers=1, 
+                       chunk_size=partition_io.DEFAULT_GATHER_SIZE):
     """Partition the features of a graph."""
     
     node_feats = np.load(path + dataset +'/feats.npy', mmap_mode='r')
-    labels = json.load(open(path + dataset + '/class_map.json'))
-    node_labels = np.array(list(labels.values()), dtype=np.int64)
+    node_labels = node_io.load_labels(path, dataset)
 
     if multilabel:
         n_classes = len(node_labels[0])
@@ -147,14 +315,13 @@ def partition_features(dataset,
     with open(output_path + 'num_feats.txt', 'w') as f:
         f.write(str(n_feats))
     
-    for i in range(number_partition):
-        edge_list = np.loadtxt(output_path + 'partition_' + str(i) + '.txt', dtype=int)
-        node_set = np.unique(edge_list)
-        feat = node_feats[node_set]
-        np.save(output_path + 'partition_' + str(i) + '-feats.npy', feat)
-
-        label = node_labels[node_set]
-        np.save(output_path + 'partition_' + str(i) + '-labels.npy', label)
+    parallel.map_partitions(partition_io.save_partition_features, 
+                            number_partition, 
+                            num_workers, 
+                            output_path, 
+                            path + dataset + '/feats.npy', 
+                            node_io.labels_path(path, dataset), 
+                            chunk_size)
 
 
 def save_csv(data, csv_file):
@@ -167,26 +334,29 @@ def save_csv(data, csv_file):
             writer.writerow([key, value])
 
 
-def hash_function(x):
-    """A hash function."""
+def hash_function(x, seed=0, mode='splitmix64'):
+    """A hash function of a node ID, 'splitmix64' or the legacy 'sha256'."""
+    
+    if mode == 'sha256':
+        return hashing.sha256_hash(x)
     
-    return int(hashlib.sha256(str(x).encode()).hexdigest(), 16)
+    return int(hashing.splitmix64(x, seed))
 
 
-def partition_file(dataset, path, output_path, v2p):
+def partition_file(dataset, path, output_path, v2p, number_partition=None, output_format='txt'):
     """Partition the graph file based on the partitioing results."""
     
-    file = open(path + dataset + '/edge_list.csv', 'r')
-    reader = csv.reader(file, delimiter=',')
-    for number_edges, line in enumerate(reader):
-        i, j = int(line[0]), int(line[1])
-        partition_id = v2p[j]
-        
-        with open(os.path.join(output_path, 'partition_' + str(partition_id) + '.txt'), 'a') as f:
-            writer = csv.writer(f, delimiter=' ')
-            writer.writerow(line)
-        
-    file.close()
+    stream = edge_io.EdgeStream(edge_io.ensure_binary_edge_list(path, dataset))
+    partition = partition_io.node_partition_array(v2p, stream.number_nodes)
+    if number_partition is None:
+        number_partition = int(partition.max()) + 1
+    
+    with partition_io.PartitionWriter(output_path, number_partition, output_format, 
+                                      number_nodes=stream.number_nodes) as writer:
+        for src, dst in stream.chunks():
+            writer.write_block(src, dst, partition[dst])
+    
+    return writer
     
 
 def activation_funcation(activation):
@@ -0,0 +1,30 @@
+import os
+from SDT_GNN.utils import benchmark
+
+"""
+Benchmark the streaming partitioners of SDT_GNN.
+
+In this example, we generate a synthetic power-law (R-MAT) graph with 2^20 nodes and
+about 32M edges, partition it with every method into 4 and 16 partitions, and append
+the throughput, peak memory, replication factor and output size of each run to a CSV file.
+The methods with a parallel mode are run both sequentially and with one worker per CPU core.
+
+Keep the CSV file across versions to spot regressions in partitioning throughput.
+"""
+
+if __name__ == "__main__":
+
+    path = os.path.abspath(os.getcwd())
+
+    dataset = 'rmat-20'
+    ### Please change the scale (log2 of the number of nodes) and edge factor for other graph sizes
+    benchmark.synthetic_dataset(dataset, path + '/datasets/', scale=20, edge_factor=16)
+
+    benchmark.run_benchmark(dataset = dataset,
+                            path = path + '/datasets/',
+                            output_path = path + '/output/benchmark/' + dataset + '/',
+                            csv_file = path + '/output/benchmark/results.csv',
+                            methods = benchmark.METHODS,
+                            partition_counts = [4, 16],
+                            K = 0,
+                            worker_counts = sorted({1, os.cpu_count() or 1}))
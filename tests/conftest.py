@@ -0,0 +1,87 @@
+import os
+import shutil
+import numpy as np
+import pytest
+
+"""
+Shared fixtures: a small synthetic R-MAT dataset with train/val/test splits, and
+helpers to create partitioners on it and read back their outputs.
+"""
+
+NUMBER_PARTITION = 4
+
+
+@pytest.fixture(scope='session')
+def dataset(tmp_path_factory):
+    """Dataset root path and name of a 512-node R-MAT graph with random splits."""
+
+    pytest.importorskip('torch')
+    pytest.importorskip('dgl')
+    from SDT_GNN.utils import benchmark
+
+    path = str(tmp_path_factory.mktemp('data')) + '/'
+    benchmark.synthetic_dataset('rmat', path, scale=9, edge_factor=8)
+
+    return path, 'rmat'
+
+
+@pytest.fixture
+def copy_dataset(dataset, tmp_path):
+    """Copy the dataset with the given edges, e.g., a prefix of its edge list."""
+
+    from SDT_GNN.utils import edge_io
+
+    def copy(edges, name='copy'):
+        path = str(tmp_path / name) + '/'
+        os.makedirs(path + dataset[1])
+        for split in ['train', 'val', 'test']:
+            shutil.copy(dataset[0] + dataset[1] + '/' + split + '.npy', path + dataset[1])
+        edge_io.write_edge_list(path + dataset[1] + '/edge_list.bin', [edges], int(edges.max()) + 1)
+        return path
+
+    return copy
+
+
+@pytest.fixture
+def make_partitioner(dataset, tmp_path):
+    """Create a partitioner writing to a fresh output path, without features or printed statistics."""
+
+    def make(cls, output_path, path=None, **kwargs):
+        output_path = str(tmp_path / output_path) + '/'
+        os.makedirs(output_path, exist_ok=True)
+        return cls(dataset=dataset[1],
+                   path=path if path is not None else dataset[0],
+                   output_path=output_path,
+                   number_partition=NUMBER_PARTITION,
+                   partition_features_file=False,
+                   print_partition_statistics=False,
+                   **kwargs)
+
+    return make
+
+
+def partition_outputs(output_path):
+    """Edges of every partition, in file order, and the partition of every node."""
+
+    from SDT_GNN.utils import partition_io
+
+    edges = [partition_io.load_partition_edges(output_path, i) for i in range(NUMBER_PARTITION)]
+    return edges, partition_io.load_node_partition(output_path)
+
+
+@pytest.fixture
+def outputs():
+    return partition_outputs
+
+
+def assert_same_outputs(got, want):
+    """Assert that two partition_outputs are identical."""
+
+    for got_edges, want_edges in zip(got[0], want[0]):
+        np.testing.assert_array_equal(got_edges, want_edges)
+    np.testing.assert_array_equal(got[1], want[1])
+
+
+@pytest.fixture
+def same_outputs():
+    return assert_same_outputs
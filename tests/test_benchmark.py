@@ -0,0 +1,74 @@
+import csv
+import numpy as np
+import pytest
+
+pytest.importorskip('torch')
+pytest.importorskip('dgl')
+
+from SDT_GNN.data import preprocess
+from SDT_GNN.utils import benchmark, edge_io, node_io, partition_io
+from conftest import NUMBER_PARTITION
+
+
+def test_rmat_edges_quadrants():
+    rng = np.random.default_rng(0)
+    src, dst = preprocess.rmat_edges(4, 100, (1, 0, 0), rng)
+    assert not src.any() and not dst.any()
+
+    # Only the bottom-right quadrant sets every bit of both endpoints.
+    src, dst = preprocess.rmat_edges(4, 100, (0, 0, 0), rng)
+    assert (src == 15).all() and (dst == 15).all()
+
+    src, dst = preprocess.rmat_edges(6, 10000, rng=rng)
+    assert 0 <= src.min() and max(src.max(), dst.max()) < 64
+    # The top-left quadrant is the most likely at every bit, so node 0 has the largest degree.
+    assert np.bincount(dst, minlength=64).argmax() == 0
+
+
+def test_rmat_edge_list(tmp_path):
+    path = str(tmp_path) + '/'
+    header = preprocess.rmat_edge_list('a', 6, 4, path, seed=3, chunk_size=50)
+    edges = edge_io.load_edge_list(edge_io.binary_edge_list_path(path, 'a'))
+
+    assert header['number_nodes'] == 64 and header['number_edges'] == 2 * 4 * 64 == len(edges)
+    assert edges.min() >= 0 and edges.max() < 64
+    np.testing.assert_array_equal(edges[1::2], edges[::2, ::-1])
+
+    preprocess.rmat_edge_list('b', 6, 4, path, seed=3, chunk_size=50)
+    preprocess.rmat_edge_list('c', 6, 4, path, seed=4, chunk_size=50, bidirected=False)
+    np.testing.assert_array_equal(edge_io.load_edge_list(edge_io.binary_edge_list_path(path, 'b')), edges)
+    assert len(edge_io.load_edge_list(edge_io.binary_edge_list_path(path, 'c'))) == 4 * 64
+
+
+def test_synthetic_dataset_splits(dataset):
+    splits = node_io.load_splits(*dataset)
+    number_nodes = edge_io.read_header(edge_io.binary_edge_list_path(*dataset))['number_nodes']
+
+    nodes = np.concatenate([np.asarray(ids) for ids in splits])
+    np.testing.assert_array_equal(np.sort(nodes), np.arange(number_nodes))
+    assert [len(ids) for ids in splits] == [int(0.6 * number_nodes), int(0.2 * number_nodes),
+                                            number_nodes - int(0.6 * number_nodes) - int(0.2 * number_nodes)]
+
+
+def test_benchmark_run(dataset, tmp_path):
+    output_path = str(tmp_path / 'HDRF') + '/'
+    row = benchmark.benchmark_run(dataset[1], dataset[0], output_path, 'HDRF', NUMBER_PARTITION)
+
+    assert list(row) == benchmark.FIELDS
+    edges = [partition_io.load_partition_edges(output_path, i) for i in range(NUMBER_PARTITION)]
+    assert row['number_edges'] == sum(len(e) for e in edges)
+    assert row['replication_factor'] == pytest.approx(sum(len(np.unique(e)) for e in edges) / row['number_nodes'])
+    assert row['output_bytes'] == 16 * row['number_edges'] + (tmp_path / 'HDRF' / 'partition.npy').stat().st_size
+    assert row['edges_per_sec'] > 0
+
+
+def test_run_benchmark_appends_csv(dataset, tmp_path):
+    csv_file = str(tmp_path / 'benchmark.csv')
+    for _ in range(2):
+        benchmark.run_benchmark(dataset[1], dataset[0], str(tmp_path) + '/', csv_file, methods=['Random', 'HDRF'],
+                                worker_counts=(1, 2))
+
+    with open(csv_file) as f:
+        rows = list(csv.DictReader(f))
+    # Random has no parallel mode, so it only runs with one worker.
+    assert [(row['method'], row['partition_workers']) for row in rows] == [('Random', '1'), ('HDRF', '1'), ('HDRF', '2')] * 2
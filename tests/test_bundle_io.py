@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('torch')
+pytest.importorskip('dgl')
+
+from SDT_GNN.utils import bundle_io
+
+
+def test_save_load_round_trip(tmp_path):
+    rng = np.random.default_rng(0)
+    sections = {'indptr': np.arange(11, dtype=np.int64),
+                'feat': rng.random((10, 3)).astype(np.float32),
+                'label': rng.integers(0, 5, size=(10, 2)),
+                'train_mask': rng.random(10) < 0.5,
+                'empty': np.zeros(0, dtype=np.int64),
+                'odd': np.arange(3, dtype=np.uint8)}
+    file = str(tmp_path / 'partition_0.bundle')
+    bundle_io.save_bundle(file, sections)
+
+    loaded = bundle_io.load_bundle(file)
+    assert list(loaded) == list(sections)
+    for name, array in sections.items():
+        assert loaded[name].dtype == array.dtype
+        np.testing.assert_array_equal(loaded[name], array)
+        assert loaded[name].ctypes.data % bundle_io.BUNDLE_ALIGNMENT == 0 or loaded[name].size == 0
+
+    # Copy-on-write: the loaded arrays are writable without changing the file.
+    loaded['feat'][0] = 0
+    np.testing.assert_array_equal(bundle_io.load_bundle(file)['feat'], sections['feat'])
+
+
+def test_load_rejects_other_files(tmp_path):
+    file = str(tmp_path / 'partition_0.bundle')
+    np.save(file, np.arange(4))
+
+    with pytest.raises(ValueError):
+        bundle_io.load_bundle(file + '.npy')
+
+
+def test_symmetric_csr():
+    indptr, indices = bundle_io.symmetric_csr(np.array([[0, 1], [1, 0], [2, 1], [0, 1]]), 4)
+
+    np.testing.assert_array_equal(indptr, [0, 1, 3, 4, 4])
+    np.testing.assert_array_equal(indices, [1, 0, 2, 1])
+
+
+def test_index_mask():
+    node_set = np.array([2, 5, 7, 9])
+
+    np.testing.assert_array_equal(bundle_io.index_mask(node_set, [9, 3, 2, 11], 4), [True, False, False, True])
+    np.testing.assert_array_equal(bundle_io.index_mask(node_set, [], 4), [False] * 4)
+
+
+def test_save_partition_bundle(tmp_path):
+    output_path = str(tmp_path) + '/'
+    node_set = np.array([1, 4, 6])
+    feat = np.arange(6, dtype=np.float64).reshape(3, 2)
+    node_partition = np.array([0, 1, 0, 0, 1, 0, 1])
+    bundle_io.save_partition_bundle(1, output_path, np.array([[0, 1], [2, 0]]), node_set, feat, np.array([3, 4, 5]),
+                                    node_partition, np.array([0, 1, 6]), np.array([4]), np.array([2, 5]))
+
+    bundle = bundle_io.load_bundle(bundle_io.bundle_file(output_path, 1))
+    np.testing.assert_array_equal(bundle['global_ids'], node_set)
+    np.testing.assert_array_equal(bundle['indptr'], [0, 2, 3, 4])
+    np.testing.assert_array_equal(bundle['indices'], [1, 2, 0, 0])
+    np.testing.assert_array_equal(bundle['feat'], feat.astype(np.float32))
+    np.testing.assert_array_equal(bundle['label'], [3, 4, 5])
+    np.testing.assert_array_equal(bundle['train_mask'], [True, False, True])
+    np.testing.assert_array_equal(bundle['val_mask'], [False, True, False])
+    assert not bundle['test_mask'].any()
@@ -0,0 +1,62 @@
+import pytest
+
+pytest.importorskip('torch')
+pytest.importorskip('dgl')
+
+from SDT_GNN.partition import Hashing, HDRF, TwoPSL, Clustering, SPRING
+from SDT_GNN.partition import checkpoint
+
+# Partitioner, parameters and number of streaming passes, each checkpointed within the pass, with K = 2.
+METHODS = [(Hashing, {}, 3),
+           (HDRF, {}, 3),
+           (TwoPSL, {'stream_iters': 4, 'eval_cluster': True}, 9),
+           (Clustering, {'stream_iters': 2}, 4),
+           (SPRING, {'stream_iters': 2}, 5)]
+IDS = [cls.__name__ for cls, _, _ in METHODS]
+
+
+class Crash(Exception):
+    pass
+
+
+def record_checkpoints(monkeypatch, crash_at=None):
+    """Record the (step, offset) of every checkpoint, raising Crash after the crash_at-th."""
+
+    save_checkpoint = checkpoint.save_checkpoint
+    saved = []
+
+    def record(output_path, state):
+        save_checkpoint(output_path, state)
+        saved.append((state['step'], state['offset']))
+        if len(saved) == crash_at:
+            raise Crash()
+
+    monkeypatch.setattr(checkpoint, 'save_checkpoint', record)
+    return saved
+
+
+@pytest.mark.parametrize('cls, kwargs, passes', METHODS, ids=IDS)
+def test_passes_checkpoint_within_steps(cls, kwargs, passes, make_partitioner, monkeypatch):
+    saved = record_checkpoints(monkeypatch)
+    make_partitioner(cls, 'out', K=2, chunk_size=500, checkpoint_interval=1000, **kwargs).run()
+
+    assert len({step for step, offset in saved if offset > 0}) == passes
+
+
+@pytest.mark.parametrize('cls, kwargs, passes', METHODS, ids=IDS)
+@pytest.mark.parametrize('crash_at', [1, 4, 9, 14])
+def test_resume_equals_uninterrupted_run(cls, kwargs, passes, crash_at, make_partitioner, outputs, same_outputs,
+                                         monkeypatch):
+    params = dict(kwargs, K=2, chunk_size=500, checkpoint_interval=1000)
+
+    make_partitioner(cls, 'ref', **params).run()
+    want = outputs(make_partitioner(cls, 'ref').output_path)
+
+    record_checkpoints(monkeypatch, crash_at)
+    with pytest.raises(Crash):
+        make_partitioner(cls, 'resumed', **params).run()
+    monkeypatch.undo()
+
+    sp = make_partitioner(cls, 'resumed', **params)
+    sp.run(resume=True)
+    same_outputs(outputs(sp.output_path), want)
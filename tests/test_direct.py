@@ -0,0 +1,48 @@
+import os
+import numpy as np
+import pytest
+
+pytest.importorskip('torch')
+pytest.importorskip('dgl')
+
+from SDT_GNN import Partitioning
+from SDT_GNN.utils import edge_io, node_io, bundle_io, partition_io
+from conftest import NUMBER_PARTITION
+
+
+@pytest.fixture
+def attributed_dataset(dataset, copy_dataset):
+    """Copy of the dataset with random features and labels."""
+
+    path = copy_dataset(edge_io.load_edge_list(dataset[0] + dataset[1] + '/edge_list.bin'))
+    number_nodes = edge_io.read_header(path + dataset[1] + '/edge_list.bin')['number_nodes']
+    rng = np.random.default_rng(0)
+    np.save(path + dataset[1] + '/feats.npy', rng.random((number_nodes, 5)).astype(np.float32))
+    node_io.save_labels(path, dataset[1], rng.integers(0, 7, size=number_nodes))
+    return path, dataset[1]
+
+
+@pytest.mark.parametrize('spill_size', [1 << 20, 100], ids=['kept', 'spilled'])
+@pytest.mark.parametrize('method', ['HDRF', 'SPRING'])
+def test_direct_bundles_match_text_pipeline(method, spill_size, attributed_dataset, tmp_path):
+    path, dataset = attributed_dataset
+
+    def run(output_path, direct):
+        output_path = str(tmp_path / output_path) + '/'
+        partitioning = Partitioning(dataset=dataset, path=path, output_path=output_path, method=method, 
+                                    number_partition=NUMBER_PARTITION, K=1, print_partition_statistics=False, 
+                                    direct=direct, spill_size=spill_size, graph_format='bundle')
+        partitioning.run()
+        return output_path, partitioning.sp.writer
+
+    (direct, writer), (text, _) = run('direct', True), run('text', False)
+    assert any(writer.spilled) == (spill_size == 100)
+
+    for i in range(NUMBER_PARTITION):
+        assert not os.path.exists(partition_io.partition_edge_file(direct, i, 'txt'))
+        assert not os.path.exists(direct + 'partition_%d-feats.npy' % i)
+        got = bundle_io.load_bundle(bundle_io.bundle_file(direct, i))
+        want = bundle_io.load_bundle(bundle_io.bundle_file(text, i))
+        assert list(got) == list(want)
+        for name in want:
+            np.testing.assert_array_equal(got[name], want[name])
@@ -0,0 +1,123 @@
+import os
+import numpy as np
+import pytest
+
+pytest.importorskip('torch')
+pytest.importorskip('dgl')
+
+from SDT_GNN.utils import edge_io
+
+
+def write_csv(path, edges):
+    os.makedirs(path + 'g', exist_ok=True)
+    with open(edge_io.csv_edge_list_path(path, 'g'), 'w') as f:
+        f.writelines('%d,%d\n' % (i, j) for i, j in edges)
+
+
+def test_convert_round_trip(tmp_path):
+    path = str(tmp_path) + '/'
+    edges = np.random.default_rng(0).integers(0, 100, size=(1000, 2))
+    write_csv(path, edges)
+
+    bin_file = edge_io.ensure_binary_edge_list(path, 'g', chunk_size=64)
+    header = edge_io.read_header(bin_file)
+
+    assert header == {'dtype': np.dtype('int32'), 'number_nodes': int(edges.max()) + 1, 'number_edges': 1000}
+    np.testing.assert_array_equal(edge_io.load_edge_list(bin_file), edges)
+    assert not os.path.exists(bin_file + '.tmp')
+
+
+def test_large_ids_stay_int64(tmp_path):
+    path = str(tmp_path) + '/'
+    edges = np.array([[0, 1], [2 ** 33, 5]])
+    write_csv(path, edges)
+
+    bin_file = edge_io.ensure_binary_edge_list(path, 'g')
+
+    assert edge_io.read_header(bin_file)['dtype'] == np.dtype('int64')
+    np.testing.assert_array_equal(edge_io.load_edge_list(bin_file), edges)
+
+
+def test_empty_edge_list(tmp_path):
+    path = str(tmp_path) + '/'
+    write_csv(path, [])
+
+    bin_file = edge_io.ensure_binary_edge_list(path, 'g')
+
+    assert edge_io.read_header(bin_file)['number_edges'] == 0
+    assert edge_io.load_edge_list(bin_file).shape == (0, 2)
+
+
+def test_newer_csv_is_converted_again(tmp_path):
+    path = str(tmp_path) + '/'
+    write_csv(path, [[0, 1]])
+    bin_file = edge_io.ensure_binary_edge_list(path, 'g')
+
+    write_csv(path, [[0, 1], [1, 2]])
+    os.utime(edge_io.csv_edge_list_path(path, 'g'), ns=(0, os.stat(bin_file).st_mtime_ns + 10 ** 9))
+
+    np.testing.assert_array_equal(edge_io.load_edge_list(edge_io.ensure_binary_edge_list(path, 'g')), [[0, 1], [1, 2]])
+
+
+def test_write_edge_list_blocks(tmp_path):
+    bin_file = str(tmp_path / 'edge_list.bin')
+    header = edge_io.write_edge_list(bin_file, [np.array([[0, 1], [1, 2]]), np.array([[3, 0]])], 10)
+
+    assert header['number_nodes'] == 10
+    np.testing.assert_array_equal(edge_io.load_edge_list(bin_file), [[0, 1], [1, 2], [3, 0]])
+
+
+def test_read_header_rejects_other_files(tmp_path):
+    bin_file = str(tmp_path / 'edge_list.bin')
+    with open(bin_file, 'wb') as f:
+        f.write(b'0,1\n1,2\n' * 8)
+
+    with pytest.raises(ValueError):
+        edge_io.read_header(bin_file)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 64, 1000])
+def test_stream_chunks(tmp_path, chunk_size):
+    bin_file = str(tmp_path / 'edge_list.bin')
+    edges = np.random.default_rng(1).integers(0, 50, size=(200, 2))
+    edge_io.write_edge_list(bin_file, [edges], 50)
+    stream = edge_io.EdgeStream(bin_file, chunk_size)
+
+    chunks = list(stream.chunks())
+    assert all(len(src) <= chunk_size and src.dtype == np.int64 and dst.dtype == np.int64 for src, dst in chunks)
+    np.testing.assert_array_equal(np.concatenate([src for src, _ in chunks]), edges[:, 0])
+    np.testing.assert_array_equal(np.concatenate([dst for _, dst in chunks]), edges[:, 1])
+
+    # A sub-range starts its chunks at 'start', and 'end' past the stream is clipped.
+    src = np.concatenate([src for src, _ in stream.chunks(start=13, end=500)])
+    np.testing.assert_array_equal(src, edges[13:, 0])
+    assert list(stream.chunks(start=200)) == []
+
+
+def test_degree_cache(tmp_path):
+    path = str(tmp_path) + '/'
+    edges = np.random.default_rng(2).integers(0, 30, size=(300, 2))
+    write_csv(path, edges)
+
+    degree, number_nodes, number_edges = edge_io.load_degree(path, 'g', chunk_size=16)
+    np.testing.assert_array_equal(degree, np.bincount(edges[:, 1], minlength=number_nodes))
+    assert (number_nodes, number_edges) == (int(edges.max()) + 1, 300)
+
+    # The cache is read back while the edge list is unchanged, and recomputed once it grows.
+    np.save(path + 'g/degrees.npy', np.zeros_like(degree))
+    assert not edge_io.load_degree(path, 'g')[0].any()
+
+    edge_io.append_edges(path, 'g', np.array([[0, 40]]))
+    degree, number_nodes, number_edges = edge_io.load_degree(path, 'g')
+    np.testing.assert_array_equal(degree, np.bincount(np.append(edges[:, 1], 40), minlength=41))
+    assert (number_nodes, number_edges) == (41, 301)
+
+
+def test_count_degree_small_chunks(tmp_path):
+    # Chunks much smaller than the ID range take the np.unique path.
+    bin_file = str(tmp_path / 'edge_list.bin')
+    edges = np.array([[0, 999], [5, 3], [7, 999], [1, 0]])
+    edge_io.write_edge_list(bin_file, [edges], 1000)
+
+    degree = edge_io.count_degree(edge_io.EdgeStream(bin_file, 2))
+    np.testing.assert_array_equal(degree, np.bincount(edges[:, 1], minlength=1000))
@@ -0,0 +1,90 @@
+import os
+from collections import Counter
+import numpy as np
+import pytest
+
+pytest.importorskip('torch')
+pytest.importorskip('dgl')
+
+from SDT_GNN.partition import HDRF, DBH
+from SDT_GNN.partition import halo
+from SDT_GNN.partition.replica import ReplicaMatrix
+from SDT_GNN.utils import edge_io, partition_io
+from conftest import NUMBER_PARTITION
+
+
+def reference_halo(edges, partition, K, number_partition):
+    """K-hop halo with one node set per partition, grown only between hops."""
+
+    out = [[] for _ in range(number_partition)]
+    reached = [set() for _ in range(number_partition)]
+    for i, j in edges.tolist():
+        out[partition[j]].append((i, j))
+        reached[partition[j]].add(i)
+
+    for _ in range(1, K):
+        frontier = [set(nodes) for nodes in reached]
+        for i, j in edges.tolist():
+            for p in range(number_partition):
+                if j in frontier[p]:
+                    out[p].append((i, j))
+                    reached[p].add(i)
+
+    return [np.array(e, dtype=np.int64).reshape(-1, 2) for e in out]
+
+
+def write_halo(edges, partition, K, number_partition, output_path, chunk_size=7):
+    """Run the hops of write_hop as Partitioner.write_halo does, on in-memory edge chunks."""
+
+    chunks = lambda: ((edges[s:s + chunk_size, 0], edges[s:s + chunk_size, 1]) for s in range(0, len(edges), chunk_size))
+    reached = ReplicaMatrix(len(partition), number_partition) if K > 1 else None
+    os.makedirs(output_path, exist_ok=True)
+    with partition_io.PartitionWriter(output_path, number_partition, 'bin') as writer:
+        for hop in range(K):
+            frontier = reached.bits.copy() if hop > 0 else None
+            halo.write_hop(chunks(), partition, hop, K, reached, frontier, writer)
+
+    return [partition_io.load_partition_edges(output_path, p) for p in range(number_partition)]
+
+
+@pytest.mark.parametrize('K', [1, 2, 3])
+@pytest.mark.parametrize('number_partition', [3, 10])
+def test_write_hop_matches_reference(tmp_path, K, number_partition):
+    rng = np.random.default_rng(K)
+    edges = rng.integers(0, 60, size=(400, 2))
+    partition = rng.integers(0, number_partition, size=60)
+
+    got = write_halo(edges, partition, K, number_partition, str(tmp_path) + '/')
+
+    for g, want in zip(got, reference_halo(edges, partition, K, number_partition)):
+        np.testing.assert_array_equal(g, want)
+
+
+def test_frontier_is_fixed_within_a_hop(tmp_path):
+    # 3 -> 2 -> 1 -> 0 with node 0 in partition 0: each hop reaches one node further, whatever the edge order,
+    # and the edges into the earlier frontiers are written again.
+    partition = np.array([0, 1, 1, 1, 1])
+    edges = np.array([[3, 2], [2, 1], [1, 0], [4, 3]])
+
+    for order, name in [([0, 1, 2, 3], 'forward'), ([3, 2, 1, 0], 'backward')]:
+        got = write_halo(edges[order], partition, 3, 2, str(tmp_path / name) + '/', chunk_size=1)
+        assert Counter(map(tuple, got[0].tolist())) == Counter([(1, 0), (2, 1), (2, 1), (3, 2)])
+
+
+@pytest.mark.parametrize('cls', [HDRF, DBH], ids=['HDRF', 'DBH'])
+@pytest.mark.parametrize('K', [2, 3])
+def test_partitioner_halo(cls, K, dataset, make_partitioner, outputs):
+    edges = np.asarray(edge_io.load_edge_list(dataset[0] + dataset[1] + '/edge_list.bin'), dtype=np.int64)
+    assigned = make_partitioner(cls, 'assigned', K=0)
+    assigned.run()
+    sp = make_partitioner(cls, 'halo', K=K, chunk_size=1000)
+    sp.run()
+
+    got, node_partition = outputs(sp.output_path)
+    node_partition = np.asarray(node_partition)
+    for g, a, w in zip(got, outputs(assigned.output_path)[0], reference_halo(edges, node_partition, K, NUMBER_PARTITION)):
+        np.testing.assert_array_equal(g, np.concatenate([a, w]))
+
+    written = [np.zeros(NUMBER_PARTITION, dtype=np.int64)] + [[len(w) for w in reference_halo(edges, node_partition, k, NUMBER_PARTITION)] 
+                                                            for k in range(1, K + 1)]
+    assert sp.stats['halo_edges'] == np.diff(written, axis=0).tolist()
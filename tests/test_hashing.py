@@ -0,0 +1,41 @@
+import hashlib
+import numpy as np
+import pytest
+
+pytest.importorskip('torch')
+pytest.importorskip('dgl')
+
+from SDT_GNN.utils import hashing
+
+MASK = (1 << 64) - 1
+
+
+def reference_splitmix64(x, seed):
+    z = (x + seed * 0x9E3779B97F4A7C15 + 0x9E3779B97F4A7C15) & MASK
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK
+    return z ^ (z >> 31)
+
+
+def test_first_splitmix64_output():
+    assert int(hashing.splitmix64(np.array([0]))[0]) == 0xE220A8397B1DCDAF
+
+
+@pytest.mark.parametrize('seed', [0, 7, 2 ** 40])
+def test_splitmix64_matches_integer_arithmetic(seed):
+    nodes = np.concatenate([np.arange(100), np.random.default_rng(0).integers(0, 2 ** 62, size=100)])
+
+    got = hashing.splitmix64(nodes, seed)
+    assert got.dtype == np.uint64
+    assert got.tolist() == [reference_splitmix64(x, seed) for x in nodes.tolist()]
+
+
+def test_hash_partition():
+    nodes = np.array([[5, 3], [5, 1000000]])
+
+    np.testing.assert_array_equal(hashing.hash_partition(nodes, 7, seed=3).reshape(2, 2), 
+                                  [[reference_splitmix64(x, 3) % 7 for x in row] for row in nodes.tolist()])
+    np.testing.assert_array_equal(hashing.hash_partition(nodes.ravel(), 7, mode='sha256'),
+                                  [int(hashlib.sha256(str(x).encode()).hexdigest(), 16) % 7 for x in nodes.ravel()])
+    with pytest.raises(NotImplementedError):
+        hashing.hash_partition(nodes, 7, mode='md5')
@@ -0,0 +1,65 @@
+import os
+import numpy as np
+import pytest
+
+pytest.importorskip('torch')
+pytest.importorskip('dgl')
+
+from SDT_GNN import Partitioning
+from SDT_GNN.partition import checkpoint
+from SDT_GNN.utils import edge_io, manifest
+
+
+@pytest.fixture
+def partitioning(dataset, copy_dataset, tmp_path, capsys):
+    """Run a partitioning on a copy of the dataset and tell whether it reused the previous outputs."""
+
+    path = copy_dataset(edge_io.load_edge_list(dataset[0] + dataset[1] + '/edge_list.bin'))
+    output_path = str(tmp_path / 'out') + '/'
+
+    def run(**kwargs):
+        params = dict(dataset=dataset[1], path=path, output_path=output_path, method='HDRF', number_partition=4, K=0,
+                      partition_features_file=False, print_partition_statistics=False, save_dgl_graph=False)
+        params.update(kwargs)
+        p = Partitioning(**params)
+        capsys.readouterr()
+        p.run()
+        return 'Reusing' in capsys.readouterr().out
+
+    run.path = path + dataset[1] + '/'
+    run.output_path = output_path
+    return run
+
+
+def test_unchanged_run_is_reused(partitioning):
+    assert not partitioning()
+    assert manifest.load_manifest(partitioning.output_path) is not None
+    assert partitioning()
+
+
+def test_changed_parameters_invalidate(partitioning):
+    assert not partitioning()
+    assert not partitioning(K=1)
+    assert not partitioning(K=0)
+
+
+def test_changed_input_invalidates(partitioning):
+    assert not partitioning()
+
+    train = np.load(partitioning.path + 'train.npy')
+    np.save(partitioning.path + 'train.npy', train[:-1])
+    assert not partitioning()
+    assert partitioning()
+
+
+@pytest.mark.parametrize('artifact', ['partition_0.txt', 'partition.npy', checkpoint.STATE_FILE])
+def test_missing_or_truncated_artifact_invalidates(partitioning, artifact):
+    assert not partitioning()
+
+    with open(partitioning.output_path + artifact, 'r+b') as f:
+        f.truncate(os.path.getsize(partitioning.output_path + artifact) // 2)
+    assert not partitioning()
+
+    os.remove(partitioning.output_path + artifact)
+    assert not partitioning()
+    assert partitioning()
@@ -0,0 +1,57 @@
+import os
+import json
+import numpy as np
+import pytest
+
+pytest.importorskip('torch')
+pytest.importorskip('dgl')
+
+from SDT_GNN.utils import node_io
+
+
+def write_json(file, obj):
+    with open(file, 'w') as f:
+        json.dump(obj, f)
+    # A new modification time even on file systems with coarse timestamps.
+    stat = os.stat(file)
+    os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_labels_converted_again_when_class_map_changes(tmp_path):
+    path = str(tmp_path) + '/'
+    os.makedirs(path + 'd')
+
+    write_json(path + 'd/class_map.json', {'0': 1, '1': 2})
+    np.testing.assert_array_equal(np.load(node_io.ensure_labels(path, 'd')), [1, 2])
+
+    write_json(path + 'd/class_map.json', {'0': 3, '1': 4, '2': 5})
+    np.testing.assert_array_equal(np.load(node_io.ensure_labels(path, 'd')), [3, 4, 5])
+
+
+def test_splits_converted_again_when_role_changes(tmp_path):
+    path = str(tmp_path) + '/'
+    os.makedirs(path + 'd')
+
+    write_json(path + 'd/role.json', {'tr': [0], 'va': [1], 'te': [2]})
+    np.testing.assert_array_equal(node_io.load_split(path, 'd', 'train'), [0])
+
+    write_json(path + 'd/role.json', {'tr': [1, 2], 'va': [0], 'te': []})
+    np.testing.assert_array_equal(node_io.load_split(path, 'd', 'train'), [1, 2])
+    np.testing.assert_array_equal(node_io.load_split(path, 'd', 'val'), [0])
+
+
+def test_saved_splits_supersede_older_role(tmp_path):
+    path = str(tmp_path) + '/'
+    os.makedirs(path + 'd')
+
+    write_json(path + 'd/role.json', {'tr': [0], 'va': [1], 'te': [2]})
+    node_io.save_splits(path, 'd', [2], [1], [0])
+    np.testing.assert_array_equal(node_io.load_split(path, 'd', 'train'), [2])
+
+
+def test_arrays_without_json_are_used_as_is(tmp_path):
+    path = str(tmp_path) + '/'
+    os.makedirs(path + 'd')
+
+    node_io.save_labels(path, 'd', [7, 8])
+    np.testing.assert_array_equal(np.load(node_io.ensure_labels(path, 'd')), [7, 8])
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('torch')
+pytest.importorskip('dgl')
+
+from SDT_GNN.partition import HDRF
+from SDT_GNN.utils import edge_io, parallel, partition_io, node_io
+
+
+@pytest.mark.parametrize('num_workers', [1, 2])
+def test_map_partitions_keeps_partition_order(num_workers):
+    assert parallel.map_partitions(pow, 5, num_workers, 3) == [0, 1, 8, 27, 64]
+    assert parallel.map_partitions(pow, 5, num_workers, 2, partitions=[4, 1]) == [16, 1]
+
+
+def test_parallel_features_match_sequential(dataset, copy_dataset, make_partitioner):
+    path = copy_dataset(edge_io.load_edge_list(dataset[0] + dataset[1] + '/edge_list.bin'))
+    sp = make_partitioner(HDRF, 'out', path=path, K=1)
+    sp.run()
+
+    rng = np.random.default_rng(0)
+    number_nodes = sp.edge_stream().number_nodes
+    feats = rng.random((number_nodes, 5)).astype(np.float32)
+    labels = rng.integers(0, 7, size=number_nodes)
+    np.save(path + dataset[1] + '/feats.npy', feats)
+    node_io.save_labels(path, dataset[1], labels)
+
+    outputs = []
+    for num_workers in [1, 2]:
+        sp.num_workers = num_workers
+        sp.feature_chunk_size = 17
+        sp.partition_features()
+        outputs.append([(np.load(sp.output_path + 'partition_%d-feats.npy' % i),
+                         np.load(sp.output_path + 'partition_%d-labels.npy' % i)) for i in range(sp.number_partition)])
+
+    for i in range(sp.number_partition):
+        node_set = partition_io.load_partition_nodes(sp.output_path, i)
+        for (feat, label) in (outputs[0][i], outputs[1][i]):
+            np.testing.assert_array_equal(feat, feats[node_set])
+            np.testing.assert_array_equal(label, labels[node_set])
@@ -0,0 +1,139 @@
+import os
+import pickle
+from collections import defaultdict
+import numpy as np
+import pytest
+
+pytest.importorskip('torch')
+pytest.importorskip('dgl')
+
+from SDT_GNN.utils import partition_io
+
+
+@pytest.fixture
+def output_path(tmp_path):
+    return str(tmp_path) + '/'
+
+
+@pytest.mark.parametrize('output_format', ['txt', 'bin'])
+def test_writer_keeps_stream_order(output_path, output_format):
+    src = np.array([0, 1, 2, 3, 4, 5])
+    dst = np.array([5, 4, 3, 2, 1, 0])
+    with partition_io.PartitionWriter(output_path, 2, output_format, buffer_size=2, number_nodes=10) as writer:
+        writer.write(1, 9, 9)
+        writer.write_block(src, dst, np.array([1, 0, 1, 1, 0, 0]))
+        writer.write(0, 7, 7)
+        writer.write_partition(1, np.array([8]), np.array([8]))
+        assert writer.edge_counts() == [4, 5]
+
+    np.testing.assert_array_equal(partition_io.load_partition_edges(output_path, 0), [[1, 4], [4, 1], [5, 0], [7, 7]])
+    np.testing.assert_array_equal(partition_io.load_partition_edges(output_path, 1), [[9, 9], [0, 5], [2, 3], [3, 2], [8, 8]])
+    np.testing.assert_array_equal(partition_io.load_partition_nodes(output_path, 0), [0, 1, 4, 5, 7])
+
+
+def test_txt_lines(output_path):
+    with partition_io.PartitionWriter(output_path, 1) as writer:
+        writer.write_block(np.array([3, 10]), np.array([1, 2]), np.array([0, 0]))
+
+    with open(partition_io.partition_edge_file(output_path, 0)) as f:
+        assert f.read() == '3 1\n10 2\n'
+
+
+def test_writer_drops_the_other_format(output_path):
+    with partition_io.PartitionWriter(output_path, 2, 'bin') as writer:
+        writer.write(0, 1, 2)
+    with partition_io.PartitionWriter(output_path, 2, 'txt') as writer:
+        writer.write(1, 2, 3)
+
+    assert not os.path.exists(partition_io.partition_edge_file(output_path, 0, 'bin'))
+    assert os.path.getsize(partition_io.partition_edge_file(output_path, 0)) == 0
+
+
+def test_append(output_path):
+    with partition_io.PartitionWriter(output_path, 1) as writer:
+        writer.write(0, 1, 2)
+    with partition_io.PartitionWriter(output_path, 1, append=True) as writer:
+        writer.write(0, 3, 4)
+
+    np.testing.assert_array_equal(partition_io.load_partition_edges(output_path, 0), [[1, 2], [3, 4]])
+
+
+def test_node_partition_round_trip(output_path):
+    partition_io.save_node_partition(output_path, {4: 2, 1: 1}, 6, 3)
+
+    partition = partition_io.load_node_partition(output_path)
+    assert partition.dtype == partition_io.partition_dtype(3)
+    np.testing.assert_array_equal(partition, [0, 1, 0, 0, 2, 0])
+
+    partition_io.save_node_partition(output_path, np.array([1, 1, 0]), 5, 2)
+    np.testing.assert_array_equal(partition_io.load_node_partition(output_path), [1, 1, 0, 0, 0])
+
+
+def test_legacy_pickled_partition(output_path):
+    with open(output_path + 'partition.json', 'wb') as f:
+        pickle.dump(defaultdict(int, {0: 1, 3: 2}), f)
+    np.testing.assert_array_equal(partition_io.load_node_partition(output_path), [1, 0, 0, 2])
+
+    # Saving the dense array drops the pickle, so it is never read instead of a newer result.
+    partition_io.save_node_partition(output_path, np.array([1, 0]), 2, 2)
+    assert not os.path.exists(output_path + 'partition.json')
+
+
+def test_update_node_partition_keeps_the_last_assignment():
+    partition = np.zeros(5, dtype=np.int16)
+    partition_io.update_node_partition(partition, np.array([3, 1, 3, 4, 3]), np.array([1, 2, 2, 1, 3]))
+
+    np.testing.assert_array_equal(partition, [0, 2, 0, 3, 1])
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 1000])
+def test_gather_rows(output_path, chunk_size):
+    rng = np.random.default_rng(0)
+    np.save(output_path + 'feats.npy', rng.random((50, 3)))
+    source = np.load(output_path + 'feats.npy', mmap_mode='r')
+    index = np.unique(rng.integers(0, 50, size=20))
+
+    partition_io.gather_rows(source, index, output_path + 'out.npy', chunk_size)
+    np.testing.assert_array_equal(np.load(output_path + 'out.npy'), source[index])
+
+    partition_io.gather_rows(source, index[:0], output_path + 'out.npy', chunk_size)
+    assert np.load(output_path + 'out.npy').shape == (0, 3)
+
+
+@pytest.mark.parametrize('track_nodes', [True, False], ids=['nodes', 'edges'])
+def test_save_partition_features(output_path, track_nodes):
+    rng = np.random.default_rng(1)
+    feats, labels = rng.random((30, 4)), rng.integers(0, 5, size=30)
+    np.save(output_path + 'feats.npy', feats)
+    np.save(output_path + 'labels.npy', labels)
+    with partition_io.PartitionWriter(output_path, 2, number_nodes=30 if track_nodes else None) as writer:
+        writer.write_block(rng.integers(0, 30, size=40), rng.integers(0, 30, size=40), rng.integers(0, 2, size=40))
+
+    for i in range(2):
+        partition_io.save_partition_features(i, output_path, output_path + 'feats.npy', output_path + 'labels.npy', 4)
+
+        # The features of the node set read back from the edge file, as before the chunked gather.
+        node_set = np.unique(np.loadtxt(partition_io.partition_edge_file(output_path, i), dtype=np.int64))
+        assert os.path.exists(partition_io.partition_nodes_file(output_path, i)) == track_nodes
+        np.testing.assert_array_equal(np.load(output_path + 'partition_%d-feats.npy' % i), feats[node_set])
+        np.testing.assert_array_equal(np.load(output_path + 'partition_%d-labels.npy' % i), labels[node_set])
+
+
+@pytest.mark.parametrize('spill_size', [1000, 3], ids=['kept', 'spilled'])
+def test_kept_edges_match_files(output_path, spill_size):
+    rng = np.random.default_rng(2)
+    with partition_io.PartitionWriter(output_path, 3, 'bin', buffer_size=2, keep_edges=True, 
+                                      spill_size=spill_size) as writer:
+        writer.write(2, 7, 7)
+        writer.write_block(rng.integers(0, 20, size=30), rng.integers(0, 20, size=30), rng.integers(0, 2, size=30))
+
+    assert writer.spilled == [spill_size == 3] * 2 + [False]
+    for i in range(3):
+        np.testing.assert_array_equal(writer.partition_edges(i), partition_io.load_partition_edges(output_path, i))
+    assert writer.partition_edges(2).dtype == np.int64
+
+    # Edges kept by an appending writer are only the new ones, so it reads the whole partition from the file.
+    with partition_io.PartitionWriter(output_path, 3, 'bin', append=True, keep_edges=True) as writer:
+        writer.write(0, 1, 1)
+    np.testing.assert_array_equal(writer.partition_edges(0), partition_io.load_partition_edges(output_path, 0))
+    np.testing.assert_array_equal(writer.partition_edges(0)[-1], [1, 1])
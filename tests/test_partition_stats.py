@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('torch')
+pytest.importorskip('dgl')
+
+from SDT_GNN.partition import HDRF, Clustering, SPRING
+
+
+def imbalance(counts):
+    return max(counts) / np.mean(counts)
+
+
+@pytest.mark.parametrize('cls', [HDRF, Clustering, SPRING], ids=['HDRF', 'Clustering', 'SPRING'])
+@pytest.mark.parametrize('K', [0, 1, 2])
+def test_edge_imbalance_excludes_halo(cls, K, make_partitioner):
+    sp = make_partitioner(cls, 'out', K=K)
+    sp.run()
+    stats = sp.stats
+
+    assigned = np.array(stats['assigned_edges'])
+    halo_total = np.array(stats['halo_total_edges'])
+    assert assigned.sum() == stats['number_edges']
+    np.testing.assert_array_equal(assigned + halo_total, stats['partition_edges'])
+    assert stats['edge_imbalance'] == pytest.approx(imbalance(assigned))
+    assert stats['total_edge_imbalance'] == pytest.approx(imbalance(stats['partition_edges']))
+    assert len(stats['halo_edges']) == K
+    # Clustering and SPRING write their edges through the first hop, the others in addition to it.
+    if K == 0 or (K == 1 and cls is not HDRF):
+        assert not halo_total.any()
+    else:
+        assert halo_total.all()
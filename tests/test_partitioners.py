@@ -0,0 +1,114 @@
+import hashlib
+import numpy as np
+import pytest
+
+pytest.importorskip('torch')
+pytest.importorskip('dgl')
+
+from SDT_GNN.partition import Hashing, DBH, Greedy, HDRF, TwoPSL, Clustering, SPRING
+from SDT_GNN.utils import edge_io, partition_io
+from conftest import NUMBER_PARTITION
+from test_scoring import reference_assign
+from test_streamcom import reference_clustering
+
+METHODS = [Hashing, DBH, Greedy, HDRF, TwoPSL, Clustering, SPRING]
+
+
+@pytest.fixture
+def edges(dataset):
+    return np.asarray(edge_io.load_edge_list(dataset[0] + dataset[1] + '/edge_list.bin'), dtype=np.int64)
+
+
+def reference_outputs(edges, partition_ids, K):
+    """
+    Outputs of an edge partitioning as the partitioners wrote them before streaming in chunks:
+    every edge to its partition in stream order, then with K = 1 every edge again to the partition of its destination.
+    """
+
+    node_partition = np.zeros(int(edges.max()) + 1, dtype=np.int64)
+    for j, p in zip(edges[:, 1].tolist(), partition_ids):
+        node_partition[j] = p
+
+    partition_ids = np.asarray(partition_ids)
+    partition_edges = [edges[partition_ids == p] for p in range(NUMBER_PARTITION)]
+    if K == 1:
+        partition_edges = [np.concatenate([e, edges[node_partition[edges[:, 1]] == p]]) 
+                           for p, e in enumerate(partition_edges)]
+
+    return partition_edges, node_partition
+
+
+@pytest.mark.parametrize('cls', METHODS, ids=[cls.__name__ for cls in METHODS])
+def test_chunk_size_does_not_change_the_result(cls, make_partitioner, outputs, same_outputs):
+    whole = make_partitioner(cls, 'whole', K=1)
+    whole.run()
+    chunked = make_partitioner(cls, 'chunked', K=1, chunk_size=37)
+    chunked.run()
+
+    same_outputs(outputs(chunked.output_path), outputs(whole.output_path))
+
+
+@pytest.mark.parametrize('cls, hdrf', [(HDRF, True), (Greedy, False)], ids=['HDRF', 'Greedy'])
+@pytest.mark.parametrize('K', [0, 1])
+def test_vertex_cut_matches_per_edge_scoring(cls, hdrf, K, edges, make_partitioner, outputs, same_outputs):
+    sp = make_partitioner(cls, 'out', K=K, chunk_size=1000)
+    sp.run()
+
+    same_outputs(outputs(sp.output_path), reference_outputs(edges, reference_assign(edges, NUMBER_PARTITION, hdrf), K))
+
+
+@pytest.mark.parametrize('K', [0, 1])
+@pytest.mark.parametrize('stream_iters', [1, 2])
+def test_clustering_matches_reference(K, stream_iters, edges, make_partitioner, outputs, same_outputs):
+    sp = make_partitioner(Clustering, 'out', K=K, stream_iters=stream_iters, chunk_size=1000)
+    sp.run()
+
+    # Clusters in order of their first node, placed largest first on the partition with the fewest nodes.
+    degree = np.bincount(edges[:, 1], minlength=int(edges.max()) + 1)
+    clusters = {}
+    for v, c in reference_clustering(edges, degree, 0.1 * len(edges) / NUMBER_PARTITION, stream_iters).items():
+        clusters.setdefault(c, []).append(v)
+    sizes = [0] * NUMBER_PARTITION
+    node_partition = np.zeros(len(degree), dtype=np.int64)
+    for members in sorted(clusters.values(), key=len, reverse=True):
+        p = int(np.argmin(sizes))
+        node_partition[members] = p
+        sizes[p] += len(members)
+
+    src, dst = edges[:, 0], edges[:, 1]
+    if K == 0:
+        partition_ids = np.where((node_partition[src] != node_partition[dst]) & (src < dst), 
+                                 node_partition[src], node_partition[dst])
+    else:
+        partition_ids = node_partition[dst]
+    same_outputs(outputs(sp.output_path), ([edges[partition_ids == p] for p in range(NUMBER_PARTITION)], node_partition))
+
+
+@pytest.mark.parametrize('K', [0, 1])
+def test_dbh_sha256_matches_reference(K, edges, make_partitioner, outputs, same_outputs):
+    sp = make_partitioner(DBH, 'out', K=K, hash_mode='sha256', chunk_size=1000)
+    sp.run()
+
+    degree = np.bincount(edges[:, 1], minlength=int(edges.max()) + 1)
+    partition_ids = [int(hashlib.sha256(str(i if degree[i] < degree[j] else j).encode()).hexdigest(), 16) % NUMBER_PARTITION
+                     for i, j in edges.tolist()]
+    same_outputs(outputs(sp.output_path), reference_outputs(edges, partition_ids, K))
+
+
+def test_hashing_matches_per_edge_draws(edges, make_partitioner, outputs, same_outputs):
+    sp = make_partitioner(Hashing, 'out', K=0, seed=5, chunk_size=1000)
+    sp.run()
+
+    np.random.seed(5)
+    partition_ids = [abs(int(i * j * np.random.random()) % NUMBER_PARTITION) for i, j in edges.tolist()]
+    same_outputs(outputs(sp.output_path), reference_outputs(edges, partition_ids, 0))
+
+
+@pytest.mark.parametrize('cls', METHODS, ids=[cls.__name__ for cls in METHODS])
+def test_tracked_node_sets(cls, make_partitioner):
+    sp = make_partitioner(cls, 'out', K=2)
+    sp.run()
+
+    for i in range(NUMBER_PARTITION):
+        node_set = np.load(partition_io.partition_nodes_file(sp.output_path, i))
+        np.testing.assert_array_equal(node_set, np.unique(partition_io.load_partition_edges(sp.output_path, i)))
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('torch')
+pytest.importorskip('dgl')
+
+from SDT_GNN.partition.replica import ReplicaMatrix
+
+
+@pytest.mark.parametrize('number_partition', [3, 8, 21])
+def test_matches_a_set_per_node(number_partition):
+    rng = np.random.default_rng(0)
+    replicas = ReplicaMatrix(50, number_partition)
+    expected = [set() for _ in range(50)]
+
+    for i, j, p in zip(*rng.integers(0, 50, size=(2, 100)), rng.integers(0, number_partition, size=100)):
+        replicas.add_edge(i, j, p)
+        expected[i].add(p)
+        expected[j].add(p)
+    nodes, partition_ids = rng.integers(0, 50, size=200), rng.integers(0, number_partition, size=200)
+    replicas.add_block(nodes, partition_ids)
+    for v, p in zip(nodes, partition_ids):
+        expected[v].add(p)
+
+    assert replicas.bits.shape == (50, (number_partition + 7) // 8)
+    for v in range(50):
+        assert set(np.flatnonzero(replicas.row(v))) == expected[v]
+        assert all(replicas.has(v, p) == (p in expected[v]) for p in range(number_partition))
+
+
+def test_add_rows_and_resize():
+    replicas = ReplicaMatrix(3, 10)
+    other = ReplicaMatrix(3, 10)
+    other.add(1, 9)
+    other.add(2, 0)
+    replicas.add(1, 2)
+
+    replicas.add_rows(np.array([1, 2, 2]), other.bits[[1, 2, 2]])
+    replicas.resize(5)
+
+    assert replicas.number_nodes == 5
+    assert list(np.flatnonzero(replicas.row(1))) == [2, 9]
+    assert list(np.flatnonzero(replicas.row(2))) == [0]
+    assert not replicas.row(4).any()
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('torch')
+pytest.importorskip('dgl')
+
+from SDT_GNN.partition import scoring
+from SDT_GNN.partition.replica import ReplicaMatrix
+
+NUMBER_PARTITION = 5
+
+
+def reference_assign(edges, number_partition, hdrf, Lambda=1.0, epsilon=1):
+    """Per-edge HDRF/Greedy scoring over Python lists, as the partitioners did before the shared kernel."""
+
+    load = [0] * number_partition
+    replicas = {}
+    degree = {}
+    out = []
+    for i, j in edges.tolist():
+        degree[i] = degree.get(i, 0) + 1
+        degree[j] = degree.get(j, 0) + 1
+        rep_i = replicas.setdefault(i, [False] * number_partition)
+        rep_j = replicas.setdefault(j, [False] * number_partition)
+        d_i, d_j = degree[i], degree[j]
+        maxsize, minsize = max(load), min(load)
+
+        scores = []
+        for p in range(number_partition):
+            g_i = (1 + (1 - d_i / (d_i + d_j)) if hdrf else 1) if rep_i[p] else 0
+            g_j = (1 + (1 - d_j / (d_i + d_j)) if hdrf else 1) if rep_j[p] else 0
+            scores.append(g_i + g_j + Lambda * (maxsize - load[p]) / (epsilon + maxsize - minsize))
+        p = int(np.argmax(scores))
+        load[p] += 1
+        rep_i[p] = rep_j[p] = True
+        out.append(p)
+
+    return out
+
+
+@pytest.fixture(params=['numba', 'numpy'])
+def kernel(request, monkeypatch):
+    if request.param == 'numba' and scoring.numba is None:
+        pytest.skip('numba is not installed')
+    if request.param == 'numpy':
+        monkeypatch.setattr(scoring, 'numba', None)
+    return request.param
+
+
+@pytest.mark.parametrize('hdrf', [True, False], ids=['HDRF', 'Greedy'])
+@pytest.mark.parametrize('Lambda', [1.0, 0.3])
+def test_assign_chunk_matches_per_edge_scoring(kernel, hdrf, Lambda):
+    edges = np.random.default_rng(0).zipf(1.6, size=(3000, 2)) % 200
+    replicas = ReplicaMatrix(200, NUMBER_PARTITION)
+    edge_load = scoring.EdgeLoad(NUMBER_PARTITION)
+    degree = np.zeros(200, dtype=np.int64) if hdrf else None
+
+    out = [scoring.assign_chunk(edges[start:start + 128, 0], edges[start:start + 128, 1], replicas, edge_load,
+                                Lambda=Lambda, degree=degree)
+           for start in range(0, len(edges), 128)]
+
+    expected = reference_assign(edges, NUMBER_PARTITION, hdrf, Lambda)
+    np.testing.assert_array_equal(np.concatenate(out), expected)
+    np.testing.assert_array_equal(edge_load.load, np.bincount(expected, minlength=NUMBER_PARTITION))
+
+
+def test_edge_load_tracks_min_and_max():
+    rng = np.random.default_rng(1)
+    edge_load = scoring.EdgeLoad(4)
+
+    for p in rng.integers(0, 4, size=200):
+        edge_load.add(p)
+        assert (edge_load.min_load, edge_load.max_load) == (edge_load.load.min(), edge_load.load.max())
+        assert edge_load.state[2] == np.count_nonzero(edge_load.load == edge_load.load.min())
+
+    edge_load.set_loads([3, 1, 1, 7])
+    assert (edge_load.min_load, edge_load.max_load, int(edge_load.state[2])) == (1, 7, 2)
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('torch')
+pytest.importorskip('dgl')
+
+from SDT_GNN.partition import DBH, Greedy, HDRF, TwoPSL
+from SDT_GNN.partition import sharded
+from SDT_GNN.utils import edge_io
+
+METHODS = [(DBH, {}),
+           (Greedy, {}),
+           (HDRF, {}),
+           (TwoPSL, {'score': 'linear'}),
+           (TwoPSL, {'score': 'hdrf'})]
+IDS = ['DBH', 'Greedy', 'HDRF', '2PSL-linear', '2PSL-hdrf']
+
+
+def edge_set(edges):
+    return sorted(map(tuple, np.concatenate(edges).tolist()))
+
+
+@pytest.mark.parametrize('cls, kwargs', METHODS, ids=IDS)
+def test_one_shard_equals_sequential(cls, kwargs, make_partitioner, outputs, same_outputs, monkeypatch):
+    sequential = make_partitioner(cls, 'sequential', K=0, output_format='bin', chunk_size=500, **kwargs)
+    sequential.run()
+
+    # All edges in one shard: the parallel path must assign exactly like the sequential one.
+    monkeypatch.setattr(sharded, 'shard_bounds', lambda number_edges, num_shards, start=0: ([start], [number_edges]))
+    parallel = make_partitioner(cls, 'parallel', K=0, output_format='bin', chunk_size=500,
+                                partition_workers=2, sync_interval=10**9, **kwargs)
+    parallel.run()
+
+    same_outputs(outputs(parallel.output_path), outputs(sequential.output_path))
+
+
+@pytest.mark.parametrize('cls, kwargs', METHODS, ids=IDS)
+def test_shards_assign_every_edge_once(cls, kwargs, dataset, make_partitioner, outputs):
+    sp = make_partitioner(cls, 'parallel', K=0, output_format='bin', chunk_size=500,
+                          partition_workers=3, sync_interval=200, **kwargs)
+    sp.run()
+
+    edges = edge_io.load_edge_list(dataset[0] + dataset[1] + '/edge_list.bin')
+    assert edge_set(outputs(sp.output_path)[0]) == edge_set([edges])
+
+
+def test_linear_kernel_falls_back_to_least_loaded_partition():
+    # Node 1 prefers partition 1 by degree, which is full; partition 2 has the lowest load.
+    src, dst = np.array([0]), np.array([1])
+    communities, com2part = np.array([1, 2]), np.array([0, 0, 1])
+    bits = np.zeros((2, 1), dtype=np.uint8)
+    load = np.array([5, 9, 2, 4], dtype=np.int64)
+    out = np.empty(1, dtype=np.int64)
+
+    sharded._twopsl_linear_kernel(src, dst, communities, com2part, np.array([1, 3]), bits, load, 9, 4, out)
+    assert out[0] == 2
+    assert load[2] == 3
+
+
+def test_hdrf_kernel_raises_on_negative_score():
+    src, dst = np.array([0]), np.array([1])
+    communities, com2part = np.array([1, 2]), np.array([0, 0, 1])
+    bits = np.zeros((2, 1), dtype=np.uint8)
+    load = np.array([1, 0], dtype=np.int64)
+    out = np.empty(1, dtype=np.int64)
+
+    # A minimum load above the maximum makes the balance term negative.
+    with pytest.raises(ValueError):
+        sharded._twopsl_hdrf_kernel(src, dst, communities, com2part, np.array([1, 1]), bits, load,
+                                    10, 2, 1.0, 1.0, 100, out)
@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('torch')
+pytest.importorskip('dgl')
+
+from SDT_GNN.partition import SPRING
+from SDT_GNN.utils import edge_io
+from conftest import NUMBER_PARTITION
+
+
+def reference_merge(v2c, max_degree_neighbor, degree, number_nodes, number_partition):
+    """
+    Merge clusters with Python sets: visit the unvisited cluster with the smallest current size,
+    lowest ID first, and merge it into the cluster of its richest neighbor if the merged size fits.
+    """
+
+    v2c = v2c.copy()
+    nodes = {}
+    for v in np.flatnonzero(v2c).tolist():
+        nodes.setdefault(int(v2c[v]), set()).add(v)
+    size = {c: len(members) for c, members in nodes.items()}
+    target_size = 1.05 * number_nodes / number_partition
+    visited = set()
+
+    for _ in range(len(size) - 1):
+        candidates = [(s, c) for c, s in size.items() if c not in visited and s > 0]
+        if not candidates:
+            break
+        s, c = min(candidates)
+        visited.add(c)
+
+        richest = sorted({int(max_degree_neighbor[v]) for v in nodes[c]} - {-1})
+        if not richest:
+            continue
+        r = max(richest, key=lambda v: degree[v])
+        if v2c[r] == 0:
+            continue
+        rc = int(v2c[r])
+        if rc != c and size[rc] + s <= target_size:
+            for v in nodes[c]:
+                v2c[v] = rc
+            nodes[rc] |= nodes.pop(c)
+            size[rc] += s
+            size[c] = 0
+
+    return v2c
+
+
+@pytest.fixture
+def spring(make_partitioner):
+    """A SPRING partitioner with its clusters streamed, before they are merged."""
+
+    def make(**kwargs):
+        sp = make_partitioner(SPRING, 'out', K=0, **kwargs)
+        sp.get_degree()
+        sp.restream_clustering()
+        sp.find_max_degree_neighbor()
+        return sp
+
+    return make
+
+
+@pytest.mark.parametrize('stream_iters', [1, 2])
+def test_merge_order_matches_reference(spring, stream_iters):
+    sp = spring(stream_iters=stream_iters)
+    before = sp.v2c.copy()
+    sp.cluster_merge()
+
+    expected = reference_merge(before, sp.max_degree_neighbor, sp.node_degree, sp.number_nodes, NUMBER_PARTITION)
+    np.testing.assert_array_equal(sp.v2c, expected)
+    assert len(np.unique(sp.v2c)) < len(np.unique(before))
+
+
+def test_merge_revisits_grown_clusters_at_their_new_size():
+    # Cluster 1 {0} merges into 2 {1, 2}, which then is larger than 3 {3, 4}, so 3 is visited next and merges
+    # into it too. Visited by their initial sizes, 2 would come next and find no richer cluster than itself.
+    sp = SPRING(number_partition=1)
+    sp.number_nodes = 100
+    sp.node_degree = np.array([1, 9, 1, 8, 1])
+    sp.max_degree_neighbor = np.array([1, -1, 3, -1, 1])
+
+    class Clustering:
+        community = np.array([1, 2, 2, 3, 3])
+
+        def nodes(self):
+            return np.arange(5)
+
+    sp.clustering = Clustering()
+    sp.v2c = sp.clustering.community
+    before = sp.v2c.copy()
+    sp.cluster_merge()
+
+    np.testing.assert_array_equal(sp.v2c, reference_merge(before, sp.max_degree_neighbor, sp.node_degree, 100, 1))
+    np.testing.assert_array_equal(sp.v2c, [2, 2, 2, 2, 2])
+
+
+@pytest.mark.parametrize('chunk_size', [1, 100, 1 << 20])
+def test_richest_neighbor_matches_per_edge_scan(spring, dataset, chunk_size):
+    sp = spring(chunk_size=chunk_size)
+    degree = sp.node_degree
+
+    # The first streamed in-neighbor of the highest degree, as the clustering pass tracked it per edge.
+    expected = {}
+    for i, j in edge_io.load_edge_list(dataset[0] + dataset[1] + '/edge_list.bin').tolist():
+        if j not in expected or degree[expected[j]] < degree[i]:
+            expected[j] = i
+
+    want = np.full(sp.number_nodes, -1)
+    want[list(expected)] = list(expected.values())
+    np.testing.assert_array_equal(sp.max_degree_neighbor, want)
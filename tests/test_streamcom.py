@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('torch')
+pytest.importorskip('dgl')
+
+from SDT_GNN.partition import streamcom
+from SDT_GNN.partition.streamcom import StreamClustering
+
+
+def reference_clustering(edges, degree, max_vol, passes):
+    """The 'volume' rule with dicts, edge by edge, as SPRING and Clustering streamed before the shared engine."""
+
+    community, volume = {}, {}
+    next_id = 1
+    for _ in range(passes):
+        for i, j in edges.tolist():
+            for v in (i, j):
+                if v not in community:
+                    community[v] = next_id
+                    volume[next_id] = volume.get(next_id, 0) + degree[v]
+                    next_id += 1
+            c_i, c_j = community[i], community[j]
+            if volume[c_i] <= max_vol and volume[c_j] <= max_vol:
+                if volume[c_i] <= volume[c_j]:
+                    volume[c_j] += degree[i]
+                    volume[c_i] -= degree[i]
+                    community[i] = c_j
+                else:
+                    volume[c_i] += degree[j]
+                    volume[c_j] -= degree[j]
+                    community[j] = c_i
+
+    return community
+
+
+@pytest.fixture(params=['numba', 'python'])
+def kernel(request, monkeypatch):
+    if request.param == 'numba' and streamcom.numba is None:
+        pytest.skip('numba is not installed')
+    if request.param == 'python':
+        monkeypatch.setattr(streamcom, 'numba', None)
+    return request.param
+
+
+@pytest.fixture
+def graph():
+    edges = np.random.default_rng(0).zipf(1.5, size=(2000, 2)) % 300
+    return edges, np.bincount(edges[:, 1], minlength=300)
+
+
+def chunks(edges, chunk_size):
+    return ((edges[s:s + chunk_size, 0], edges[s:s + chunk_size, 1]) for s in range(0, len(edges), chunk_size))
+
+
+class Stream(object):
+    def __init__(self, edges):
+        self.edges = edges
+
+    def chunks(self, start=0):
+        return chunks(self.edges[start:], 128)
+
+
+@pytest.mark.parametrize('passes', [1, 2])
+def test_volume_rule_matches_reference(kernel, graph, passes):
+    edges, degree = graph
+    clustering = StreamClustering(degree, 40, 'volume')
+    for _ in range(passes):
+        clustering.stream(Stream(edges))
+
+    expected = reference_clustering(edges, degree, 40, passes)
+    np.testing.assert_array_equal(clustering.nodes(), list(expected))
+    np.testing.assert_array_equal(clustering.community[list(expected)], list(expected.values()))
+
+
+@pytest.mark.parametrize('rule', streamcom.CLUSTERING_RULES)
+def test_chunked_passes_match_whole_passes(kernel, graph, rule):
+    edges, degree = graph
+    whole = StreamClustering(degree, 40, rule)
+    chunked = StreamClustering(degree, 40, rule)
+
+    for use_quality in [False, True]:
+        whole.stream(Stream(edges), use_quality=use_quality)
+        whole.evaluate(Stream(edges), len(edges))
+        chunked.stream(None, use_quality=use_quality, chunks=chunks(edges, 7))
+        chunked.evaluate(None, len(edges), chunks=chunks(edges, 7))
+
+    for name in ['community', 'volume', 'quality', 'seen_nodes', 'state']:
+        np.testing.assert_array_equal(getattr(chunked, name), getattr(whole, name))
+
+
+@pytest.mark.parametrize('rule', streamcom.CLUSTERING_RULES)
+def test_python_loop_matches_numba(graph, rule, monkeypatch):
+    if streamcom.numba is None:
+        pytest.skip('numba is not installed')
+    edges, degree = graph
+    compiled = StreamClustering(degree, 40, rule)
+    compiled.stream(Stream(edges))
+    compiled.evaluate(Stream(edges), len(edges))
+    compiled.stream(Stream(edges), use_quality=True)
+
+    monkeypatch.setattr(streamcom, 'numba', None)
+    python = StreamClustering(degree, 40, rule)
+    python.stream(Stream(edges))
+    python.evaluate(Stream(edges), len(edges))
+    python.stream(Stream(edges), use_quality=True)
+
+    for name in ['community', 'volume', 'quality', 'seen_nodes', 'state']:
+        np.testing.assert_array_equal(getattr(python, name), getattr(compiled, name))
+
+
+def test_clusters_in_first_streamed_order():
+    clustering = StreamClustering(np.ones(6, dtype=np.int64), 0, 'volume')
+    clustering.community[:] = [3, 1, 3, 2, 1, 0]
+    clustering.seen_nodes[:5] = [2, 4, 3, 0, 1]
+    clustering.state[0] = 6
+
+    cluster_ids, sizes, nodes, offsets = clustering.clusters()
+    assert cluster_ids.tolist() == [3, 1, 2]
+    assert sizes.tolist() == [2, 2, 1]
+    assert nodes.tolist() == [2, 0, 4, 1, 3]
+    assert offsets.tolist() == [0, 2, 4, 5]
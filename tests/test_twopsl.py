@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('torch')
+pytest.importorskip('dgl')
+
+from SDT_GNN.partition import TwoPSL
+
+
+def scorer(edge_load, max_partition_load):
+    sp = TwoPSL(number_partition=len(edge_load))
+    sp.node_degree = np.array([1, 3])
+    sp.edge_load = list(edge_load)
+    sp.max_partition_load = max_partition_load
+    return sp
+
+
+def test_linear_score_falls_back_to_least_loaded_partition():
+    # Node 1 prefers partition 1 by degree, which is full.
+    assert scorer([5, 9, 2, 4], 9).find_max_score_partition_linear((0, 1)) == 2
+    assert scorer([5, 8, 2, 4], 9).find_max_score_partition_linear((0, 1)) == 1
+
+
+def test_least_loaded_partition_breaks_ties_by_id():
+    assert scorer([3, 1, 1, 2], 9).least_loaded_partition() == 1
+
+
+def reference_assign_communities(volumes, communities, number_partition):
+    """Phase 1 of the baseline: sorted (volume, id) pairs and a linear scan for the partition of least volume."""
+
+    sorted_communities = sorted([(volumes[i], i) for i in range(len(volumes))], key=lambda x: x[0], reverse=True)
+    partition_volume = [0] * number_partition
+    com2part = [0] * len(volumes)
+    for vol, com in sorted_communities:
+        if vol == 0:
+            break
+        min_p = min(range(number_partition), key=lambda p: (partition_volume[p], p))
+        partition_volume[min_p] += vol
+        com2part[com] = min_p
+    return com2part, partition_volume, [com2part[c] for c in communities]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_assign_communities_matches_linear_scan(seed):
+    rng = np.random.default_rng(seed)
+    number_nodes, number_partition = 200, 4
+    # Few distinct volumes, so that communities and partitions tie.
+    volumes = rng.integers(0, 4, size=number_nodes + 1) * rng.integers(0, 2, size=number_nodes + 1)
+    communities = rng.integers(0, number_nodes + 1, size=number_nodes)
+
+    sp = TwoPSL(number_partition=number_partition)
+    sp.volumes, sp.communities = volumes, communities
+    sp.partition_volume = [0] * number_partition
+    sp.com2part = np.zeros(number_nodes + 1, dtype=np.int64)
+    sp.assign_communities()
+
+    com2part, partition_volume, node_p = reference_assign_communities(volumes, communities, number_partition)
+    np.testing.assert_array_equal(sp.com2part, com2part)
+    assert sp.partition_volume == partition_volume
+    np.testing.assert_array_equal(sp.node_p, node_p)
@@ -0,0 +1,173 @@
+from collections import Counter
+import numpy as np
+import pytest
+
+pytest.importorskip('torch')
+pytest.importorskip('dgl')
+
+from SDT_GNN import Partitioning
+from SDT_GNN.partition import Hashing, DBH, Greedy, HDRF, TwoPSL, Clustering, SPRING
+from SDT_GNN.utils import edge_io, partition_io, node_io, bundle_io, manifest
+from conftest import partition_outputs
+
+NEW_EDGES = 1000
+METHODS = [Hashing, Greedy, HDRF]
+
+
+@pytest.fixture
+def edges(dataset):
+    return edge_io.load_edge_list(dataset[0] + dataset[1] + '/edge_list.bin')
+
+
+def partition_masks(output_path, splits):
+    """Train/val/test masks over the node set of every partition, as materialized from the outputs."""
+
+    edges, node_partition = partition_outputs(output_path)
+    masks = []
+    for p, partition_edges in enumerate(edges):
+        node_set = np.unique(partition_edges)
+        owned = [ids[(ids < len(node_partition))] for ids in splits]
+        masks.append([bundle_io.index_mask(node_set, ids[node_partition[ids] == p], len(node_set)) for ids in owned])
+    return masks
+
+
+def edge_counter(partition_edges):
+    return Counter(map(tuple, partition_edges.tolist()))
+
+
+@pytest.mark.parametrize('cls', METHODS, ids=[cls.__name__ for cls in METHODS])
+def test_update_equals_full_run(cls, edges, copy_dataset, make_partitioner, outputs, same_outputs):
+    params = dict(K=0, seed=7, chunk_size=300)
+    full = make_partitioner(cls, 'full', path=copy_dataset(edges, 'full'), **params)
+    full.run()
+
+    path = copy_dataset(edges[:-NEW_EDGES], 'prefix')
+    make_partitioner(cls, 'updated', path=path, **params).run()
+    before = outputs(make_partitioner(cls, 'updated', path=path).output_path)
+
+    sp = make_partitioner(cls, 'updated', path=path, **params)
+    sp.update(edges[-NEW_EDGES:-NEW_EDGES // 2])
+    stale = sp.update(edges[-NEW_EDGES // 2:])
+    after = outputs(sp.output_path)
+
+    same_outputs(after, outputs(full.output_path))
+    np.testing.assert_array_equal(edge_io.load_edge_list(path + 'rmat/edge_list.bin'), edges)
+    for old, new in zip(before[0], after[0]):
+        np.testing.assert_array_equal(new[:len(old)], old)
+    assert stale == [p for p in range(len(after[0])) if len(after[0][p]) > len(before[0][p])]
+    assert sp.stats['number_edges'] == len(edges)
+
+
+def test_update_requires_state(make_partitioner):
+    with pytest.raises(ValueError):
+        make_partitioner(HDRF, 'out', K=0).update(np.array([[0, 1]]))
+
+
+@pytest.mark.parametrize('cls', [Hashing, DBH, Greedy, HDRF], ids=['Hashing', 'DBH', 'Greedy', 'HDRF'])
+def test_stale_partitions_cover_changed_masks(cls, dataset, edges, copy_dataset, make_partitioner):
+    path = copy_dataset(edges[:-NEW_EDGES])
+    splits = [np.asarray(ids) for ids in node_io.load_splits(path, dataset[1])]
+    sp = make_partitioner(cls, 'out', path=path, K=0)
+    sp.run()
+
+    left_only = 0
+    for edge in edges[-NEW_EDGES:][:20]:
+        before = partition_masks(sp.output_path, splits)
+        counts = sp.writer.edge_counts()
+        stale = sp.update(edge[None])
+        partition_io.clear_stale_partitions(sp.output_path)
+
+        # Rebuilding only the stale partitions gives the masks of rebuilding all of them.
+        after = partition_masks(sp.output_path, splits)
+        for p in set(range(len(after))) - set(stale):
+            for old, new in zip(before[p], after[p]):
+                np.testing.assert_array_equal(new, old)
+        received = [p for p, (old, new) in enumerate(zip(counts, sp.writer.edge_counts())) if new != old]
+        left_only += len(set(stale) - set(received))
+
+    if cls is Hashing:
+        assert left_only > 0
+
+
+@pytest.mark.parametrize('cls', METHODS, ids=[cls.__name__ for cls in METHODS])
+def test_update_with_halo(cls, edges, copy_dataset, make_partitioner, outputs):
+    params = dict(K=1, seed=7, chunk_size=300)
+    full = make_partitioner(cls, 'full', path=copy_dataset(edges, 'full'), **params)
+    full.run()
+
+    path = copy_dataset(edges[:-NEW_EDGES], 'prefix')
+    make_partitioner(cls, 'updated', path=path, **params).run()
+    sp = make_partitioner(cls, 'updated', path=path, **params)
+    sp.update(edges[-NEW_EDGES:-NEW_EDGES // 2])
+    sp.update(edges[-NEW_EDGES // 2:])
+    got, want = outputs(sp.output_path), outputs(full.output_path)
+
+    np.testing.assert_array_equal(got[1], want[1])
+    for p in range(len(got[0])):
+        # The earlier halo of a node that moved stays behind in the partition it left.
+        assert not edge_counter(want[0][p]) - edge_counter(got[0][p])
+        assert not edge_counter(edges[got[1][edges[:, 1]] == p]) - edge_counter(got[0][p])
+    stats = sp.stats
+    np.testing.assert_array_equal(np.add(stats['assigned_edges'], stats['halo_total_edges']), 
+                                  [len(e) for e in got[0]])
+    assert sum(stats['assigned_edges']) == len(edges)
+
+
+@pytest.mark.parametrize('cls', [Clustering, SPRING], ids=['Clustering', 'SPRING'])
+def test_clustering_update_with_halo(cls, edges, copy_dataset, make_partitioner, outputs):
+    path = copy_dataset(edges[:-NEW_EDGES])
+    make_partitioner(cls, 'out', path=path, K=1).run()
+    before = outputs(make_partitioner(cls, 'out', path=path).output_path)
+
+    sp = make_partitioner(cls, 'out', path=path, K=1)
+    sp.update(edges[-NEW_EDGES:])
+    after = outputs(sp.output_path)
+
+    # The nodes keep their partitions, and every new edge is written once, to the partition of its destination.
+    np.testing.assert_array_equal(after[1][:len(before[1])], before[1])
+    for p, (old, new) in enumerate(zip(before[0], after[0])):
+        np.testing.assert_array_equal(new[:len(old)], old)
+        np.testing.assert_array_equal(new[len(old):], edges[-NEW_EDGES:][after[1][edges[-NEW_EDGES:, 1]] == p])
+
+
+@pytest.mark.parametrize('cls, K', [(TwoPSL, 0), (HDRF, 2)])
+def test_update_unsupported(cls, K, make_partitioner):
+    with pytest.raises(NotImplementedError):
+        make_partitioner(cls, 'out', K=K).update(np.array([[0, 1]]))
+
+
+def test_unsupported_update_leaves_dataset(dataset, edges, copy_dataset, tmp_path, capsys):
+    path = copy_dataset(edges[:-NEW_EDGES])
+    output_path = str(tmp_path / 'out') + '/'
+
+    def partitioning():
+        return Partitioning(dataset=dataset[1], path=path, output_path=output_path, method='HDRF', number_partition=4,
+                            K=2, partition_features_file=False, print_partition_statistics=False, save_dgl_graph=False)
+
+    partitioning().run()
+    with pytest.raises(NotImplementedError):
+        partitioning().update(edges[-NEW_EDGES:])
+    np.testing.assert_array_equal(edge_io.load_edge_list(path + 'rmat/edge_list.bin'), edges[:-NEW_EDGES])
+
+    capsys.readouterr()
+    partitioning().run()
+    assert 'Reusing' in capsys.readouterr().out
+
+
+def test_updated_result_is_not_reused_by_full_run(dataset, edges, copy_dataset, tmp_path, capsys):
+    path = copy_dataset(edges[:-NEW_EDGES])
+    output_path = str(tmp_path / 'out') + '/'
+
+    def partitioning():
+        return Partitioning(dataset=dataset[1], path=path, output_path=output_path, method='DBH', number_partition=4,
+                            K=0, partition_features_file=False, print_partition_statistics=False, save_dgl_graph=False)
+
+    partitioning().run()
+    partitioning().update(edges[-NEW_EDGES:])
+    assert manifest.load_manifest(output_path)['params']['appended_edges'] == NEW_EDGES
+
+    capsys.readouterr()
+    partitioning().run()
+    assert 'Reusing' not in capsys.readouterr().out
+    assert 'appended_edges' not in manifest.load_manifest(output_path)['params']
+    assert partition_io.load_node_partition(output_path).shape == (int(edges.max()) + 1,)
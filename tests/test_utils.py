@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('torch')
+pytest.importorskip('dgl')
+
+from SDT_GNN.utils import utils, bundle_io
+
+
+def test_sorted_reindex_matches_the_mapping():
+    edges = np.random.default_rng(0).integers(0, 10 ** 6, size=(500, 2))
+
+    new_edges, node_set = utils.sorted_reindex_id(edges)
+    old_edges, node_mapping = utils.np_reindex_id(edges)
+
+    np.testing.assert_array_equal(new_edges, old_edges)
+    np.testing.assert_array_equal(node_set[new_edges], edges)
+    assert [node_mapping[v] for v in node_set] == list(range(len(node_set)))
+
+
+def test_masks_match_the_per_node_loop():
+    rng = np.random.default_rng(1)
+    edges = rng.integers(0, 300, size=(400, 2))
+    node_partition = rng.integers(0, 3, size=300)
+    split = rng.choice(300, size=120, replace=False)
+    _, node_set = utils.sorted_reindex_id(edges)
+    _, node_mapping = utils.np_reindex_id(edges)
+
+    for i in range(3):
+        # As save_dgl_graph built the masks through the pickled node mapping.
+        expected = np.zeros(len(node_set), dtype=bool)
+        for j in split:
+            if node_partition[j] == i and j in node_mapping:
+                expected[node_mapping[j]] = True
+
+        np.testing.assert_array_equal(bundle_io.index_mask(node_set, split[node_partition[split] == i], len(node_set)),
+                                      expected)